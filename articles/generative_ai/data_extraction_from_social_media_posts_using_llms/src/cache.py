@@ -0,0 +1,84 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+INDEX_OPTIONS_CONFLICT = 85
+
+
+def template_version(template: str) -> str:
+    """Short hash of the template, so that editing a template invalidates its cached responses."""
+    return hashlib.sha256(template.encode()).hexdigest()[:12]
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses, keyed by a hash of the model, the template version and the
+    rendered prompt. Entries expire `ttl` seconds after they were written, and past `max_entries`
+    the least recently used ones are evicted. Database errors are printed and treated as misses.
+    """
+
+    def __init__(self, collection: Collection, ttl: int, max_entries: int):
+        self.collection = collection
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.indexed = False
+
+    @staticmethod
+    def key(model: str, template: str, prompt: str) -> str:
+        content = "\0".join([model, template_version(template), prompt])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            entry = self.collection.find_one_and_update(
+                {'_id': key}, {'$set': {'used_at': datetime.now()}}, projection={'response': 1}
+            )
+        except PyMongoError as exc:
+            print(f'Exception while reading the LLM cache: {exc}')
+            return None
+
+        return entry['response'] if entry else None
+
+    def put(self, key: str, response: str, model: str):
+        now = datetime.now()
+        try:
+            if not self.indexed:
+                self.create_indexes()
+
+            self.collection.replace_one(
+                {'_id': key},
+                {'response': response, 'model': model, 'created_at': now, 'used_at': now},
+                upsert=True,
+            )
+
+            excess = self.collection.estimated_document_count() - self.max_entries
+            if excess > 0:
+                oldest = self.collection.find(projection={'_id': 1}).sort('used_at', ASCENDING).limit(excess)
+                self.collection.delete_many({'_id': {'$in': [entry['_id'] for entry in oldest]}})
+        except PyMongoError as exc:
+            print(f'Exception while writing to the LLM cache: {exc}')
+
+    def delete(self, key: str):
+        try:
+            self.collection.delete_one({'_id': key})
+        except PyMongoError as exc:
+            print(f'Exception while deleting from the LLM cache: {exc}')
+
+    def create_indexes(self):
+        try:
+            self.collection.create_index([('created_at', ASCENDING)], expireAfterSeconds=self.ttl)
+        except OperationFailure as exc:
+            if exc.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # The TTL changed since the index was created, update it in place.
+            self.collection.database.command(
+                'collMod',
+                self.collection.name,
+                index={'keyPattern': {'created_at': ASCENDING}, 'expireAfterSeconds': self.ttl},
+            )
+        self.collection.create_index([('used_at', ASCENDING)])
+        self.indexed = True
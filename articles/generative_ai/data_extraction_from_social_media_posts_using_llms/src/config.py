@@ -16,6 +16,10 @@ class Settings(BaseSettings):
     MONGO_DATABASE: str = 'restaurants'
     MONGO_URI: str = f"mongodb://{MONGO_USER}:{MONGO_PASSWORD}@{MONGO_HOST}:{MONGO_PORT}/{MONGO_DATABASE}"
 
+    # LLM CACHE
+    LLM_CACHE_TTL_DAYS: int = 30
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+
     # PROFILES TO CRAWL
     PROFILES_TO_SCRAP: dict = {
         "KFC": {"page_name": "kfc", "city": "Salt Lake"},
@@ -1,38 +1,75 @@
 import instaloader
 
-from itertools import takewhile, dropwhile
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Iterator, List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
 
 class InstagramCrawler:
-    def __init__(self):
+    def __init__(self, page_size: int = 50):
         self.loader = instaloader.Instaloader()
         self._until = datetime.now()
         self._since = self._until - timedelta(days=7)
+        self._page_size = page_size
+        # The newest post crawled per page name, where the next crawl should stop.
+        self.cursors: Dict[str, Dict[str, Any]] = {}
 
-    def crawl(self, page_name) -> List[Dict[str, str | Any]]:
+    def crawl(self, page_name, cursor: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, str | Any]]]:
+        """
+        Yield the posts of the last 7 days that are newer than `cursor`, newest first, in pages.
+        Instagram is paginated lazily, so stopping at the first post already seen also stops the requests.
+        The new cursor of the page is set in `cursors` once every post was yielded.
+        """
         profile = instaloader.Profile.from_username(self.loader.context, page_name)
-        posts = takewhile(lambda p: p.date > self._since,
-                          dropwhile(lambda p: p.date > self._until, profile.get_posts()))
+        posts = self._new_posts(profile.get_posts(), cursor)
 
-        return [
-            {'content': post.caption, 'date': post.date, 'link': f"https://www.instagram.com/{page_name}"}
-            for post in posts
-        ]
+        newest = cursor
+        while page := list(islice(posts, self._page_size)):
+            latest = max(page, key=lambda post: post.date)
+            if newest is None or latest.date > newest['date']:
+                newest = {'date': latest.date, 'shortcode': latest.shortcode}
+            yield [
+                {
+                    'content': post.caption,
+                    'date': post.date,
+                    'link': f"https://www.instagram.com/{page_name}",
+                    'shortcode': post.shortcode,
+                }
+                for post in page
+            ]
 
-    def get_posts(self, profiles_to_scrap: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
-        all_posts = []
+        if newest is not None:
+            self.cursors[page_name] = newest
+
+    def _new_posts(self, posts: Iterator[instaloader.Post], cursor: Optional[Dict[str, Any]]) -> Iterator[instaloader.Post]:
+        for post in posts:
+            seen = cursor is not None and (post.shortcode == cursor['shortcode'] or post.date <= cursor['date'])
+            # Pinned posts come first regardless of their date, they don't end the crawl.
+            if post.is_pinned:
+                if self._since < post.date <= self._until and not seen:
+                    yield post
+                continue
+            if post.date > self._until:
+                continue
+            if post.date <= self._since or seen:
+                return
+            yield post
+
+    def get_posts(
+        self, profiles_to_scrap: Dict[str, Dict[str, str]], cursors: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield pages of the new posts of every profile, `cursors` being the ones of the previous crawl by page name."""
+        cursors = cursors or {}
         for restaurant_name, profile_info in profiles_to_scrap.items():
+            page_name = profile_info['page_name']
+            scraped = 0
             try:
-                posts = self.crawl(profile_info['page_name'])
-                for post in posts:
-                    post['restaurant_name'] = restaurant_name
-                    post['city'] = profile_info['city']
-                    all_posts.append(post)
-                print(f"Scraped {len(posts)} posts for {restaurant_name}")
+                for posts in self.crawl(page_name, cursors.get(page_name)):
+                    for post in posts:
+                        post['restaurant_name'] = restaurant_name
+                        post['city'] = profile_info['city']
+                    scraped += len(posts)
+                    yield posts
+                print(f"Scraped {scraped} new posts for {restaurant_name}")
             except Exception as e:
-                print(f"Error scraping {restaurant_name}: {str(e)}")
-        return all_posts
-
-
+                print(f"Error scraping {restaurant_name} after {scraped} posts: {str(e)}")
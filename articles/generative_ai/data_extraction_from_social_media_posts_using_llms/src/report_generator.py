@@ -4,10 +4,12 @@ import json
 
 import pandas as pd
 
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_openai import ChatOpenAI
+from pymongo import UpdateOne
 
+from src.cache import LLMCache
 from src.config import settings
 from src.crawler import InstagramCrawler
 from src.db import database
@@ -21,17 +23,32 @@ class ReportGenerator:
         self.crawler = InstagramCrawler()
         self.database = database
         self.llm = ChatOpenAI(model_name=settings.OPENAI_MODEl, api_key=settings.OPENAI_API_KEY)
+        self.cache = LLMCache(
+            self.database['llm_cache'],
+            ttl=settings.LLM_CACHE_TTL_DAYS * 24 * 60 * 60,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        )
 
     def crawl_and_store_posts(self):
-        posts = self.crawler.get_posts(settings.PROFILES_TO_SCRAP)
         posts_collection = self.database['instagram_posts']
-        for post in posts:
-            posts_collection.update_one(
-                {'link': post['link']},
-                {'$set': post},
-                upsert=True
+        posts_collection.create_index('shortcode', unique=True, partialFilterExpression={'shortcode': {'$exists': True}})
+        cursors_collection = self.database['crawl_cursors']
+        cursors = {cursor['page_name']: cursor for cursor in cursors_collection.find(projection={'_id': 0})}
+
+        # Each page of posts is stored as soon as it is crawled, in a single round-trip.
+        posts_count = 0
+        for posts in self.crawler.get_posts(settings.PROFILES_TO_SCRAP, cursors):
+            posts_collection.bulk_write(
+                [UpdateOne({'shortcode': post['shortcode']}, {'$set': post}, upsert=True) for post in posts],
+                ordered=False,
             )
-        return len(posts)
+            posts_count += len(posts)
+
+        # Cursors only move forward for the profiles that were crawled entirely.
+        for page_name, cursor in self.crawler.cursors.items():
+            cursors_collection.update_one({'page_name': page_name}, {'$set': cursor}, upsert=True)
+
+        return posts_count
 
     def get_posts_from_db(self) -> List[Dict[str, Any]]:
         posts_collection = self.database['instagram_posts']
@@ -53,7 +70,8 @@ class ReportGenerator:
             if post_text:
                 unique_posts.add(f"{post_text} | {page_text} | {link_text} | {city_text}\n")
 
-        return list(unique_posts)
+        # Sorted, so that the same posts render the same prompt and hit the LLM cache.
+        return sorted(unique_posts)
 
     def create_report(self, posts: List[str]) -> str:
         chain_1 = get_chain(
@@ -63,8 +81,7 @@ class ReportGenerator:
             output_key="report",
         )
 
-        result_1 = chain_1.invoke({"input_var": posts})
-        report = result_1["report"]
+        report = self.invoke_cached(chain_1, {"input_var": posts})
 
         output_parser = PydanticOutputParser(pydantic_object=ReportProfiles)
         format_output = {"format_instructions": output_parser.get_format_instructions()}
@@ -76,9 +93,38 @@ class ReportGenerator:
             output_key="formatted_report",
         )
 
-        result_2 = chain_2.invoke({"raport": report, "format_instructions": format_output})
+        return self.invoke_cached(
+            chain_2, {"raport": report, "format_instructions": format_output}, is_valid=self.is_json
+        )
 
-        return result_2["formatted_report"]
+    def invoke_cached(self, chain, inputs: Dict[str, Any], is_valid: Callable[[str], bool] = bool) -> str:
+        """
+        Invoke the chain, unless the same model already completed the same rendered prompt.
+        Only the responses that `is_valid` accepts are cached, a malformed one is requested again.
+        """
+        key = self.cache.key(settings.OPENAI_MODEl, chain.prompt.template, chain.prompt.format(**inputs))
+        response = self.cache.get(key)
+        if response is not None and is_valid(response):
+            print("Reused a cached LLM response.")
+            return response
+        if response is not None:
+            self.cache.delete(key)
+
+        response = chain.invoke(inputs)[chain.output_key]
+        if is_valid(response):
+            self.cache.put(key, response, settings.OPENAI_MODEl)
+        else:
+            print("Did not cache an LLM response that failed validation.")
+
+        return response
+
+    @staticmethod
+    def is_json(response: str) -> bool:
+        try:
+            json.loads(response)
+        except json.JSONDecodeError:
+            return False
+        return True
 
     @staticmethod
     def create_excel_file(data: Dict[str, Any]):
@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Optional, Union
 
 import numpy as np
+import torch
 from sentence_transformers.cross_encoder import CrossEncoder
 from transformers import AutoModel, AutoTokenizer
 
@@ -23,6 +24,9 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
         device (str): The device to use for running the model (e.g. "cpu", "cuda").
         cache_dir (Optional[Path]): The directory to cache the pre-trained model files.
             If None, the default cache directory is used.
+        pooling (str): How token embeddings are pooled, "cls" (first token) or "mean".
+        normalize (bool): Whether to L2 normalize the embeddings.
+        dtype (str): The numpy dtype of the returned embeddings (e.g. "float32", "float16").
 
     Attributes:
         max_input_length (int): The maximum length of input text to tokenize.
@@ -36,6 +40,9 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
         max_input_length: int = settings.EMBEDDING_MODEL_MAX_INPUT_LENGTH,
         device: str = settings.EMBEDDING_MODEL_DEVICE,
         cache_dir: Optional[Path] = None,
+        pooling: str = settings.EMBEDDING_MODEL_POOLING,
+        normalize: bool = settings.EMBEDDING_MODEL_NORMALIZE,
+        dtype: str = settings.EMBEDDING_MODEL_DTYPE,
     ):
         """
         Initializes the EmbeddingModelSingleton instance.
@@ -46,12 +53,21 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
             device (str): The device to use for running the model (e.g. "cpu", "cuda").
             cache_dir (Optional[Path]): The directory to cache the pre-trained model files.
                 If None, the default cache directory is used.
+            pooling (str): How token embeddings are pooled, "cls" (first token) or "mean".
+            normalize (bool): Whether to L2 normalize the embeddings.
+            dtype (str): The numpy dtype of the returned embeddings (e.g. "float32", "float16").
         """
 
+        if pooling not in ("cls", "mean"):
+            raise ValueError(f"Unknown pooling mode: {pooling}")
+
         self._model_id = model_id
         self._embedding_size = embedding_size
         self._device = device
         self._max_input_length = max_input_length
+        self._pooling = pooling
+        self._normalize = normalize
+        self._dtype = np.dtype(dtype)
 
         self._tokenizer = AutoTokenizer.from_pretrained(model_id)
         self._model = AutoModel.from_pretrained(
@@ -133,7 +149,11 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
             return [] if to_list else np.array([])
 
         try:
-            result = self._model(**tokenized_text)
+            with torch.inference_mode():
+                result = self._model(**tokenized_text)
+                embeddings = self._pool(
+                    result.last_hidden_state, tokenized_text["attention_mask"]
+                )
         except Exception:
             logger.error(traceback.format_exc())
             logger.error(
@@ -142,12 +162,56 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
 
             return [] if to_list else np.array([])
 
-        embeddings = result.last_hidden_state[:, 0, :].cpu().detach().numpy()
+        embeddings = embeddings.cpu().numpy().astype(self._dtype)
         if to_list:
             embeddings = embeddings.flatten().tolist()
 
         return embeddings
 
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Generates the embeddings of several texts in a single padded forward pass.
+
+        Args:
+            texts (list[str]): The input texts to generate embeddings for.
+
+        Returns:
+            list[list[float]]: One embedding per input text, empty if the generation failed.
+        """
+
+        if not texts:
+            return []
+
+        embeddings = self(texts, to_list=False)
+
+        return embeddings.tolist() if len(embeddings) else []
+
+    def _pool(
+        self, token_embeddings: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        """
+        Pools the token embeddings into one embedding per input, then L2 normalizes it if enabled.
+
+        Args:
+            token_embeddings (torch.Tensor): The last hidden state of the model.
+            attention_mask (torch.Tensor): The attention mask of the tokenized input.
+
+        Returns:
+            torch.Tensor: The pooled embeddings.
+        """
+
+        if self._pooling == "cls":
+            embeddings = token_embeddings[:, 0, :]
+        else:
+            mask = attention_mask.unsqueeze(-1).to(token_embeddings.dtype)
+            embeddings = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(
+                min=1e-9
+            )
+        if self._normalize:
+            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+
+        return embeddings
+
 
 class CrossEncoderModelSingleton(metaclass=SingletonMeta):
     def __init__(
@@ -4,7 +4,14 @@ from typing import Optional
 from bytewax.outputs import DynamicSink, StatelessSinkPartition
 from qdrant_client import QdrantClient
 from qdrant_client.http.api_client import UnexpectedResponse
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    VectorParams,
+)
 from qdrant_client.models import Batch
 
 from src import settings
@@ -22,6 +29,8 @@ class QdrantVectorOutput(DynamicSink):
         collection_name (str, optional): The name of the collection.
             Defaults to settings.VECTOR_DB_OUTPUT_COLLECTION_NAME.
         client (Optional[QdrantClient], optional): The Qdrant client. Defaults to None.
+        read_alias (str, optional): The alias the retrievers read from, pointed to the collection
+            if it doesn't exist yet. Defaults to settings.VECTOR_DB_READ_ALIAS.
     """
 
     def __init__(
@@ -29,6 +38,7 @@ class QdrantVectorOutput(DynamicSink):
         vector_size: int,
         collection_name: str = settings.VECTOR_DB_OUTPUT_COLLECTION_NAME,
         client: Optional[QdrantClient] = None,
+        read_alias: str = settings.VECTOR_DB_READ_ALIAS,
     ):
         self._collection_name = collection_name
         self._vector_size = vector_size
@@ -38,15 +48,9 @@ class QdrantVectorOutput(DynamicSink):
         else:
             self.client = build_qdrant_client()
 
-        try:
-            self.client.get_collection(collection_name=self._collection_name)
-        except (UnexpectedResponse, ValueError):
-            self.client.recreate_collection(
-                collection_name=self._collection_name,
-                vectors_config=VectorParams(
-                    size=self._vector_size, distance=Distance.COSINE
-                ),
-            )
+        ensure_collection(self.client, self._collection_name, self._vector_size)
+        if resolve_alias(self.client, read_alias) is None:
+            switch_alias(self.client, read_alias, self._collection_name)
 
     def build(self, worker_index, worker_count) -> "QdrantVectorSink":
         """Builds a QdrantVectorSink object.
@@ -62,6 +66,78 @@ class QdrantVectorOutput(DynamicSink):
         return QdrantVectorSink(self.client, self._collection_name)
 
 
+def ensure_collection(
+    client: QdrantClient, collection_name: str, vector_size: int
+) -> None:
+    """
+    Creates the collection if it doesn't exist yet.
+
+    Args:
+        client (QdrantClient): The Qdrant client.
+        collection_name (str): The name of the collection.
+        vector_size (int): The size of the vectors of the collection.
+    """
+
+    try:
+        client.get_collection(collection_name=collection_name)
+    except (UnexpectedResponse, ValueError):
+        client.recreate_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                # Normalized embeddings rank the same by dot product, which is cheaper.
+                distance=Distance.DOT
+                if settings.EMBEDDING_MODEL_NORMALIZE
+                else Distance.COSINE,
+            ),
+        )
+
+
+def resolve_alias(client: QdrantClient, alias_name: str) -> Optional[str]:
+    """
+    Returns the name of the collection the alias points to.
+
+    Args:
+        client (QdrantClient): The Qdrant client.
+        alias_name (str): The name of the alias.
+
+    Returns:
+        Optional[str]: The name of the collection, or None if the alias doesn't exist.
+    """
+
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+
+    return None
+
+
+def switch_alias(client: QdrantClient, alias_name: str, collection_name: str) -> None:
+    """
+    Points the alias to the collection. Qdrant applies all the operations of one request
+    atomically, so readers of the alias see either the previous or the new collection.
+
+    Args:
+        client (QdrantClient): The Qdrant client.
+        alias_name (str): The name of the alias.
+        collection_name (str): The name of the collection to point the alias to.
+    """
+
+    operations = []
+    if resolve_alias(client, alias_name) is not None:
+        operations.append(
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name))
+        )
+    operations.append(
+        CreateAliasOperation(
+            create_alias=CreateAlias(
+                collection_name=collection_name, alias_name=alias_name
+            )
+        )
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
 def build_qdrant_client(url: Optional[str] = None, api_key: Optional[str] = None):
     """
     Builds a QdrantClient object with the given URL and API key.
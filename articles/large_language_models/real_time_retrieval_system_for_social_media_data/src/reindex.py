@@ -0,0 +1,186 @@
+"""
+Re-embeds the posts of a collection into a new, versioned collection, then switches the read alias
+to it, so that changing the embedding model costs CPU time but no retrieval downtime.
+
+Upgrading the embedding model (all of the steps run with the new EMBEDDING_* settings):
+    1. Ingest with VECTOR_DB_OUTPUT_COLLECTION_NAME=linkedin_posts_v2, new posts go to the new collection.
+    2. VECTOR_DB_OUTPUT_COLLECTION_NAME=linkedin_posts_v2 poetry run python -m src.reindex --switch
+The retrievers keep reading the previous collection through the alias until the backfill is done.
+The alias is created by the ingestion, so collections ingested before it existed need one ingestion
+with their current settings before step 1.
+"""
+
+import argparse
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, Record
+
+from src import settings
+from src.embeddings import EmbeddingModelSingleton
+from src.qdrant import build_qdrant_client, ensure_collection, resolve_alias, switch_alias
+
+
+class QdrantReindexer:
+    """
+    Copies the points of a collection into another one, re-embedding their stored text.
+
+    Batches are scrolled and embedded one after another, while up to `workers` batches are upserted
+    concurrently. The scroll offset is checkpointed once a batch and all the previous ones are
+    upserted, so that an interrupted backfill resumes where it stopped.
+
+    Args:
+        client (QdrantClient): The Qdrant client.
+        embedding_model (EmbeddingModelSingleton): The embedding model of the target collection.
+        batch_size (int): The number of points scrolled, embedded and upserted at once.
+        workers (int): The maximum number of batches being upserted concurrently.
+        progress_dir (Path): The directory where the progress of every target collection is saved.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        embedding_model: EmbeddingModelSingleton,
+        batch_size: int = settings.REINDEX_BATCH_SIZE,
+        workers: int = settings.REINDEX_WORKERS,
+        progress_dir: Path = Path(settings.REINDEX_PROGRESS_DIR),
+    ):
+        self._client = client
+        self._embedding_model = embedding_model
+        self._batch_size = batch_size
+        self._workers = workers
+        self._progress_dir = Path(progress_dir)
+
+    def backfill(self, source: str, target: str) -> int:
+        """
+        Re-embeds every point of the source collection into the target collection, keeping their
+        ids and payloads. Resumes from the last checkpoint of the target collection, if any.
+
+        Args:
+            source (str): The name of the collection to copy.
+            target (str): The name of the collection to write to, created if it doesn't exist.
+
+        Returns:
+            int: The number of points copied to the target collection, including previous runs.
+        """
+
+        if source == target:
+            raise ValueError(f"The source and target collections are the same: {source}")
+
+        ensure_collection(self._client, target, self._embedding_model.embedding_size)
+        progress = self._load_progress(source, target)
+        if progress["done"]:
+            return progress["copied"]
+
+        pending: Deque[Tuple[Future, Optional[str], int]] = deque()
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            offset = progress["offset"]
+            while True:
+                records, offset = self._client.scroll(
+                    collection_name=source,
+                    limit=self._batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                if records:
+                    future = executor.submit(self._upsert, target, self._reembed(records))
+                    pending.append((future, offset, len(records)))
+
+                # Checkpoint the batches in order, so that the saved offset never skips one.
+                while pending and (pending[0][0].done() or len(pending) > self._workers):
+                    self._checkpoint(progress, *pending.popleft())
+                if offset is None:
+                    break
+
+            while pending:
+                self._checkpoint(progress, *pending.popleft())
+
+        progress["done"] = True
+        self._save_progress(progress)
+
+        return progress["copied"]
+
+    def _reembed(self, records: list[Record]) -> Batch:
+        embeddings = self._embedding_model.embed_many(
+            [record.payload["text"] for record in records]
+        )
+        if len(embeddings) != len(records):
+            raise RuntimeError(f"Failed to embed a batch of {len(records)} points")
+
+        return Batch(
+            ids=[record.id for record in records],
+            vectors=embeddings,
+            payloads=[record.payload for record in records],
+        )
+
+    def _upsert(self, collection_name: str, batch: Batch) -> None:
+        self._client.upsert(collection_name=collection_name, points=batch)
+
+    def _checkpoint(
+        self, progress: dict, future: Future, offset: Optional[str], count: int
+    ) -> None:
+        future.result()
+        progress["offset"] = offset
+        progress["copied"] += count
+        self._save_progress(progress)
+
+    def _progress_path(self, target: str) -> Path:
+        return self._progress_dir / f"{target}.json"
+
+    def _load_progress(self, source: str, target: str) -> dict:
+        path = self._progress_path(target)
+        if path.exists():
+            progress = json.loads(path.read_text())
+            if progress["source"] == source:
+                return progress
+
+        return {"source": source, "target": target, "offset": None, "copied": 0, "done": False}
+
+    def _save_progress(self, progress: dict) -> None:
+        self._progress_dir.mkdir(parents=True, exist_ok=True)
+        path = self._progress_path(progress["target"])
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(progress, default=str))
+        temporary.replace(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--source",
+        help="The collection to re-embed. Defaults to the one the read alias points to.",
+    )
+    parser.add_argument(
+        "--target",
+        default=settings.VECTOR_DB_OUTPUT_COLLECTION_NAME,
+        help="The versioned collection to write to.",
+    )
+    parser.add_argument(
+        "--switch",
+        action="store_true",
+        help="Point the read alias to the target collection once it is backfilled.",
+    )
+    args = parser.parse_args()
+
+    client = build_qdrant_client()
+    source = args.source or resolve_alias(client, settings.VECTOR_DB_READ_ALIAS)
+    if source is None:
+        parser.error(f"The alias {settings.VECTOR_DB_READ_ALIAS} doesn't exist, pass --source.")
+
+    copied = QdrantReindexer(client, EmbeddingModelSingleton()).backfill(
+        source=source, target=args.target
+    )
+    print(f"Backfilled {copied} points from {source} into {args.target}.")
+
+    if args.switch:
+        switch_alias(client, settings.VECTOR_DB_READ_ALIAS, args.target)
+        print(f"{settings.VECTOR_DB_READ_ALIAS} now points to {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,7 @@ class QdrantVectorDBRetriever:
         embedding_model: EmbeddingModelSingleton,
         vector_db_client: QdrantClient,
         cross_encoder_model: Optional[CrossEncoderModelSingleton] = None,
-        vector_db_collection: str = settings.VECTOR_DB_OUTPUT_COLLECTION_NAME,
+        vector_db_collection: str = settings.VECTOR_DB_READ_ALIAS,
     ):
         self._embedding_model = embedding_model
         self._vector_db_client = vector_db_client
@@ -11,7 +11,17 @@ class AppSettings(BaseSettings):
     EMBEDDING_MODEL_MAX_INPUT_LENGTH: int = 256
     EMBEDDING_SIZE: int = 384
     EMBEDDING_MODEL_DEVICE: str = "cpu"
+    # "cls" or "mean". all-MiniLM-L6-v2 was trained with mean pooling, but switching the pooling
+    # of an existing collection requires re-embedding it.
+    EMBEDDING_MODEL_POOLING: str = "cls"
+    EMBEDDING_MODEL_NORMALIZE: bool = True
+    EMBEDDING_MODEL_DTYPE: str = "float32"  # or "float16"
     VECTOR_DB_OUTPUT_COLLECTION_NAME: str = "linkedin_posts"
+    # Alias of the collection the retrievers read from, switched by src/reindex.py.
+    VECTOR_DB_READ_ALIAS: str = "linkedin_posts_read"
+    REINDEX_BATCH_SIZE: int = 64
+    REINDEX_WORKERS: int = 4
+    REINDEX_PROGRESS_DIR: str = "reindex_progress"
 
     # Variables loaded from .env file
     QDRANT_URL: str = "localhost:6333"
@@ -55,7 +55,6 @@ const lambdaExecutionRole = new aws.iam.Role("lambda-role", {
                 Action: [
                     "lambda:InvokeAsync",
                     "lambda:InvokeFunction",
-                    "logs:FilterLogEvents",
                 ],
                 Effect: 'Allow',
                 Resource: '*'
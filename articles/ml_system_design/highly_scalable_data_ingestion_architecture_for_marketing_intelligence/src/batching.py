@@ -0,0 +1,78 @@
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from aws_lambda_powertools import Logger
+
+logger = Logger(service="decodingml/scheduler", child=True)
+
+# Used when tiktoken is not installed: English text averages about 4 characters per token,
+# 3 keeps the estimate on the safe side for captions with emojis and hashtags.
+CHARS_PER_TOKEN = 3
+
+
+class TokenCounter:
+    """
+    Counts the tokens of texts for the model, with its tiktoken encoding when tiktoken is
+    installed, or a conservative estimate based on the length of the texts otherwise.
+    """
+
+    def __init__(self, model: str):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        :returns: the beginning of the text that fits in `max_tokens`
+        """
+
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text)[:max_tokens])
+
+        return text[: max_tokens * CHARS_PER_TOKEN]
+
+
+def pack_posts(posts: List[dict], counter: TokenCounter, budget: int, max_post_tokens: int) -> List[List[str]]:
+    """
+    Format the posts for the report prompt and pack them into as few batches as possible, each
+    within `budget` tokens. The content of posts longer than `max_post_tokens` is truncated, the
+    link and the name of the page are always kept. The posts are placed first-fit, the longest first,
+    in a deterministic order so that the same posts make the same batches.
+    :returns: the batches of formatted posts
+    """
+
+    formatted = []
+    for post in posts:
+        content = post.get('content') or ''
+        if counter.count(content) > max_post_tokens:
+            content = counter.truncate(content, max_post_tokens)
+            logger.debug(f"Truncated post {post.get('link')} to {max_post_tokens} tokens")
+
+        text = f"{content} {post.get('link')} {post.get('name')} \n"
+        # The prompt holds the batch as a list, count the quotes, escapes and separator as well.
+        formatted.append((counter.count(f"{text!r}, "), text))
+
+    batches = []
+    for tokens, text in sorted(formatted, key=lambda item: (-item[0], item[1])):
+        for batch in batches:
+            if batch["tokens"] + tokens <= budget:
+                batch["tokens"] += tokens
+                batch["posts"].append(text)
+                break
+        else:
+            batches.append({"tokens": tokens, "posts": [text]})
+
+    return [batch["posts"] for batch in batches]
@@ -0,0 +1,99 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from aws_lambda_powertools import Logger
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = Logger(service="decodingml/scheduler", child=True)
+
+INDEX_OPTIONS_CONFLICT = 85
+
+
+def template_version(template: str) -> str:
+    """
+    :returns: a short hash of the template, so that editing a template invalidates its cached responses
+    """
+
+    return hashlib.sha256(template.encode()).hexdigest()[:12]
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses, content-addressed by a hash of the model, the version of the
+    template and the rendered prompt.
+
+    Entries expire `ttl` seconds after they were written, through a TTL index. Past `max_entries`,
+    the least recently used entries are evicted on write. The cache is best effort: database errors
+    are logged, and the response is requested from the model as if it was not cached.
+    """
+
+    def __init__(self, collection: Collection, ttl: int, max_entries: int):
+        self._collection = collection
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._indexed = False
+
+    @staticmethod
+    def key(model: str, template: str, prompt: str) -> str:
+        content = "\0".join([model, template_version(template), prompt])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            entry = self._collection.find_one_and_update(
+                {"_id": key}, {"$set": {"used_at": datetime.now()}}, projection={"response": 1}
+            )
+        except PyMongoError:
+            logger.warning("Failed to read the LLM cache", exc_info=True)
+            return None
+
+        return entry["response"] if entry else None
+
+    def put(self, key: str, response: str, model: str) -> None:
+        now = datetime.now()
+        try:
+            self._ensure_indexes()
+            self._collection.replace_one(
+                {"_id": key},
+                {"response": response, "model": model, "created_at": now, "used_at": now},
+                upsert=True,
+            )
+            self._evict()
+        except PyMongoError:
+            logger.warning("Failed to write to the LLM cache", exc_info=True)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._collection.delete_one({"_id": key})
+        except PyMongoError:
+            logger.warning("Failed to delete from the LLM cache", exc_info=True)
+
+    def _ensure_indexes(self) -> None:
+        if self._indexed:
+            return
+
+        try:
+            self._collection.create_index([("created_at", ASCENDING)], expireAfterSeconds=self._ttl)
+        except OperationFailure as exc:
+            if exc.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # The TTL changed since the index was created, update the index in place.
+            logger.info(f"Updating the TTL of the LLM cache to {self._ttl}s")
+            self._collection.database.command(
+                "collMod",
+                self._collection.name,
+                index={"keyPattern": {"created_at": ASCENDING}, "expireAfterSeconds": self._ttl},
+            )
+        self._collection.create_index([("used_at", ASCENDING)])
+        self._indexed = True
+
+    def _evict(self) -> None:
+        excess = self._collection.estimated_document_count() - self._max_entries
+        if excess <= 0:
+            return
+
+        oldest = self._collection.find(projection={"_id": 1}).sort("used_at", ASCENDING).limit(excess)
+        self._collection.delete_many({"_id": {"$in": [entry["_id"] for entry in oldest]}})
@@ -1,38 +1,130 @@
-from datetime import datetime, timedelta
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from src.crawlers import dispatcher
 from src.db import database
+from src.utils import get_crawl_cursor, record_completion, save_crawl_cursor
 
 logger = Logger(service="decodingml/crawler")
 
+DUPLICATE_KEY_ERROR = 11000
 
-def lambda_handler(event, context: LambdaContext):
+LINK_CONCURRENCY = int(os.getenv('CRAWLER_LINK_CONCURRENCY', default=4))
+TIME_BUDGET_MARGIN = float(os.getenv('CRAWLER_TIME_BUDGET_MARGIN', default=30))
 
-    link = event.get('link')
+# Created once per Lambda container. Posts stored without a shortcode are left out of the index.
+database.profiles.create_index(
+    [('name', ASCENDING), ('shortcode', ASCENDING)],
+    unique=True,
+    partialFilterExpression={'shortcode': {'$exists': True}},
+)
 
-    logger.info(f"Start extracting posts for {link}")
 
-    crawler = dispatcher.get_crawler(event.get('link'))
+def lambda_handler(event, context: LambdaContext) -> dict:
+    """
+    Crawl the links of the event concurrently, within the time left to the invocation minus a margin
+    to store the last pages and the completion record. Each crawl gets a session of its own from the
+    dispatcher, so the links of one domain are crawled concurrently as well. Links that the budget
+    did not allow to finish are reported as unfinished, the scheduler invokes the crawler again for them.
+    The `link` event of a single link is still accepted.
+    """
 
-    posts = [{**page, 'correlation_id': context.aws_request_id} for page in crawler.extract()]
+    links = event.get('links') or [event.get('link')]
+    started = time.monotonic()
+    deadline = started + context.get_remaining_time_in_millis() / 1000 - TIME_BUDGET_MARGIN
 
-    now = datetime.now()
-    existing_posts = database.profiles.find({
-        "date": {"$gte": (now - timedelta(days=7)), "$lte": now},
-        "name": link
-    }, projection={'date': 1})
+    logger.info(f"Start extracting posts for {len(links)} links")
 
-    existing_posts = [post.get('date') for post in list(existing_posts)]
+    with ThreadPoolExecutor(max_workers=min(LINK_CONCURRENCY, len(links))) as executor:
+        results = list(executor.map(lambda link: crawl_link(link, context.aws_request_id, deadline), links))
 
-    posts = [post for post in posts if post.get('date') not in existing_posts]
+    unfinished = [result['link'] for result in results if result['status'] != "succeeded"]
+    status = "succeeded" if not unfinished else "partial"
+    record_completion(
+        context.aws_request_id,
+        links,
+        status,
+        sum(result['post_count'] for result in results),
+        time.monotonic() - started,
+        results=results,
+        unfinished=unfinished,
+    )
 
-    if not posts:
+    return {"status": status, "results": results, "unfinished": unfinished}
+
+
+def crawl_link(link: str, correlation_id: str, deadline: float) -> dict:
+    """
+    :returns: the outcome of the crawl of the link: its status (succeeded, unfinished or failed),
+        the number of inserted posts and the duration
+    """
+
+    started = time.monotonic()
+    if started >= deadline:
+        return {'link': link, 'status': "unfinished", 'post_count': 0, 'duration': 0.0}
+
+    try:
+        post_count, finished = crawl(link, correlation_id, deadline)
+        status = "succeeded" if finished else "unfinished"
+    except Exception:
+        logger.error(f"Failed to crawl {link}", exc_info=True)
+        post_count, status = 0, "failed"
+
+    return {'link': link, 'status': status, 'post_count': post_count, 'duration': time.monotonic() - started}
+
+
+def crawl(link: str, correlation_id: str, deadline: Optional[float] = None) -> Tuple[int, bool]:
+    """
+    Extract the posts of the page published since the previous crawl, and insert them page by page.
+    The database dedups the posts on their unique (name, shortcode) index, with one unordered
+    bulk upsert per page, which also makes concurrent runs of the same page safe.
+    The crawl cursor is only advanced once every page is stored, so a failed crawl, or one stopped
+    at the `deadline` (a time.monotonic() value), is redone and skips the stored posts.
+    :returns: the number of inserted posts, and whether the crawl got through every page
+    """
+
+    with dispatcher.crawler(link) as crawler:
+        inserted = 0
+        for page in crawler.extract(cursor=get_crawl_cursor(link)):
+            inserted += store_posts([{**post, 'correlation_id': correlation_id} for post in page])
+            logger.info(f"Stored a page of {len(page)} posts")
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"Out of time budget for {link}, stopped after {inserted} new posts")
+                return inserted, False
+
+        if crawler.cursor:
+            save_crawl_cursor(link, crawler.cursor)
+
+    if not inserted:
         logger.info("No new posts on page")
-        return
+    else:
+        logger.info(f"Successfully inserted {inserted} new posts in db")
+
+    return inserted, True
+
+
+def store_posts(posts: list[dict]) -> int:
+    """
+    :returns: the number of posts that were not in the database yet
+    """
+
+    requests = [
+        UpdateOne({'name': post['name'], 'shortcode': post['shortcode']}, {'$setOnInsert': post}, upsert=True)
+        for post in posts
+    ]
+    try:
+        return database.profiles.bulk_write(requests, ordered=False).upserted_count
+    except BulkWriteError as exc:
+        # A concurrent run inserted some of the posts in the meantime, the rest went through.
+        if any(error['code'] != DUPLICATE_KEY_ERROR for error in exc.details['writeErrors']):
+            raise
+        return exc.details['nUpserted']
 
-    logger.info(f"Successfully extracted {len(posts)} posts")
-    database.profiles.insert_many(posts)
-    logger.info(f"Successfully inserted data in db")
@@ -1,24 +1,82 @@
-import re
+import os
+import threading
+from contextlib import contextmanager
+from importlib.metadata import entry_points
+from typing import Any, Iterator
+from urllib.parse import urlparse
+
+from aws_lambda_powertools import Logger
 
 from src.crawlers.base import BaseAbstractCrawler
 from src.crawlers.instagram import InstagramCrawler
+from src.proxy import ProxyConnection
+
+logger = Logger(service="decodingml/crawler", child=True)
+
+# Installed packages can add crawlers for other platforms under this group, e.g. in their pyproject.toml:
+#   [tool.poetry.plugins."decodingml.crawlers"]
+#   tiktok = "tiktok_crawler:TikTokCrawler"
+ENTRY_POINT_GROUP = "decodingml.crawlers"
 
 
 class CrawlerDispatcher:
 
     def __init__(self) -> None:
-        self._crawlers = {}
+        self._crawlers: dict[str, tuple[type[BaseAbstractCrawler], ProxyConnection | None]] = {}
+        # The idle sessions of every domain, kept for the next crawls of the warm Lambda container.
+        self._sessions: dict[str, list[Any]] = {}
+        self._sessions_lock = threading.Lock()
+
+    def register(self, domain: str, crawler: type[BaseAbstractCrawler], proxy: ProxyConnection | None = None) -> None:
+        """
+        Register the crawler for the links of `domain`, e.g. 'instagram' or 'x.com'.
+        Its crawlers reuse the sessions of the domain (see `BaseAbstractCrawler.create_session`),
+        going through `proxy` if any.
+        """
+        hostname = (domain if "." in domain else f"{domain}.com").lower()
+        self._crawlers[hostname] = (crawler, proxy)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Register the crawlers of the installed packages, the entry point names being their domains."""
+        for entry_point in entry_points(group=group):
+            self.register(entry_point.name, entry_point.load())
+            logger.debug(f"Registered crawler {entry_point.value} for {entry_point.name}")
+
+    @contextmanager
+    def crawler(self, url: str) -> Iterator[BaseAbstractCrawler]:
+        """
+        The crawler of the link, with a session of its domain that no other crawler uses until the
+        crawl is done: sessions, instaloader's in particular, are not thread-safe. A session is
+        created when every session of the domain is in use, so concurrent crawls of one domain each
+        get their own, and the session goes back to the domain for the next crawls afterwards.
+        """
+
+        hostname = _hostname(url)
+        try:
+            crawler, proxy = self._crawlers[hostname]
+        except KeyError:
+            raise ValueError("No crawler found for the provided link") from None
+
+        with self._sessions_lock:
+            idle = self._sessions.setdefault(hostname, [])
+            session = idle.pop() if idle else None
+        if session is None:
+            session = crawler.create_session(proxy)
+
+        try:
+            yield crawler(url, session=session)
+        finally:
+            with self._sessions_lock:
+                self._sessions[hostname].append(session)
 
-    def register(self, domain: str, crawler: type[BaseAbstractCrawler]) -> None:
-        self._crawlers[r"https://(www\.)?{}.com/*".format(re.escape(domain))] = crawler
 
-    def get_crawler(self, url: str) -> BaseAbstractCrawler:
-        for pattern, crawler in self._crawlers.items():
-            if re.match(pattern, url):
-                return crawler(url)
-        else:
-            raise ValueError("No crawler found for the provided link")
+def _hostname(url: str) -> str:
+    parsed_url = urlparse(url)
+    if parsed_url.scheme not in ("http", "https"):
+        return ""
+    return (parsed_url.hostname or "").removeprefix("www.")
 
 
 dispatcher = CrawlerDispatcher()
-dispatcher.register('instagram', InstagramCrawler)
+dispatcher.register('instagram', InstagramCrawler, proxy=ProxyConnection() if os.getenv('PROXY_HOST') else None)
+dispatcher.load_entry_points()
@@ -1,7 +1,27 @@
 import abc
+from typing import Any, Iterator, Optional
+
+import requests
+
+from src.proxy import ProxyConnection
 
 
 class BaseAbstractCrawler(abc.ABC):
+    """Crawlers are built with the link to crawl and the session of their domain: `crawler(link, session=...)`."""
+
+    # Where the next crawl should stop, set once `extract` was consumed entirely.
+    cursor: Optional[dict] = None
+
+    @classmethod
+    def create_session(cls, proxy: Optional[ProxyConnection] = None) -> Any:
+        """A session of the crawlers of a domain, an HTTP session by default. Used by one crawl at a time."""
+        session = requests.Session()
+        if proxy:
+            session.proxies.update(proxy.proxies())
+            if proxy.verify_ssl is False:
+                session.verify = False
+        return session
 
     @abc.abstractmethod
-    def extract(self, link: str, **kwargs) -> None: ...
\ No newline at end of file
+    def extract(self, cursor: Optional[dict] = None, **kwargs) -> Iterator[list[dict]]:
+        """Yield pages of the posts newer than `cursor`, the cursor of the previous crawl."""
@@ -1,32 +1,66 @@
-import os
 from datetime import datetime, timedelta
-from itertools import takewhile, dropwhile
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional
 from urllib.parse import urlparse
 
 import instaloader
 
 from src.crawlers.base import BaseAbstractCrawler
+from src.proxy import ProxyConnection
 
 
 class InstagramCrawler(BaseAbstractCrawler):
 
-    def __init__(self, link: str, proxy=None):
+    def __init__(self, link: str, session: Optional[instaloader.Instaloader] = None, page_size: int = 50):
         self.link = link
-        self.loader = instaloader.Instaloader()
+        self.loader = session or self.create_session()
         self._until = datetime.now()
         self._since = self._until - timedelta(days=7)
-        self._proxy = proxy
+        self._page_size = page_size
 
-    def extract(self, **kwargs) -> List[Dict[str, str | Any]]:
+    @classmethod
+    def create_session(cls, proxy: Optional[ProxyConnection] = None) -> instaloader.Instaloader:
+        """Instaloaders are reused by the next crawls, keeping their HTTP connections (and the rate limiting)."""
+        loader = instaloader.Instaloader()
+        if proxy:
+            # Instaloader has no proxy option, its requests go through the session of its context.
+            loader.context._session.proxies.update(proxy.proxies())
+        return loader
+
+    def extract(self, cursor: Optional[dict] = None, **kwargs) -> Iterator[List[Dict[str, str | Any]]]:
+        """
+        Yield the posts of the last 7 days, newest first, in pages of `page_size`.
+        Instagram is paginated lazily, so stopping at the first post already seen by the previous
+        crawl (`cursor`) also stops the requests.
+        """
         parsed_url = urlparse(self.link)
 
-        if self._proxy:
-            os.environ['https_proxy'] = self._proxy.__dict__().get('http')
-        profile = instaloader.Profile.from_username(self.loader.context, parsed_url.path.strip('/').split('/')[0])
-        posts = takewhile(lambda p: p.date > self._since, dropwhile(lambda p: p.date > self._until, profile.get_posts()))
+        username = parsed_url.path.strip('/').split('/')[0]
+        profile = instaloader.Profile.from_username(self.loader.context, username)
+
+        posts = self._new_posts(profile.get_posts(), cursor)
+        newest = cursor
+        while page := list(islice(posts, self._page_size)):
+            latest = max(page, key=lambda post: post.date)
+            if newest is None or latest.date > newest['date']:
+                newest = {'date': latest.date, 'shortcode': latest.shortcode}
+            yield [
+                {'content': post.caption, 'date': post.date, 'link': self.link, 'name': username, 'shortcode': post.shortcode}
+                for post in page
+            ]
+
+        self.cursor = newest
 
-        return [
-            {'content': post.caption, 'date': post.date, 'link': self.link}
-            for post in posts
-        ]
+    def _new_posts(self, posts: Iterator[instaloader.Post], cursor: Optional[dict]) -> Iterator[instaloader.Post]:
+        for post in posts:
+            seen = cursor is not None and (post.shortcode == cursor['shortcode'] or post.date <= cursor['date'])
+            # Pinned posts come first regardless of their date, they don't end the crawl.
+            if post.is_pinned:
+                if self._since < post.date <= self._until and not seen:
+                    yield post
+                continue
+            if post.date > self._until:
+                continue
+            if post.date <= self._since or seen:
+                return
+            yield post
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import backoff
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+logger = Logger(service="decodingml/scheduler", child=True)
+
+THROTTLING_ERROR_CODES = {"TooManyRequestsException", "ThrottlingException", "Throttling"}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `capacity` at once.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self._rate
+
+            time.sleep(wait)
+
+
+def _is_throttled(exc: Exception) -> bool:
+    return isinstance(exc, ClientError) and exc.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+class CrawlerInvoker:
+    """
+    Invokes the crawler function asynchronously for many links, packed `links_per_invocation` at a
+    time, so that a cold start of the crawler is paid once per pack instead of once per link.
+    At most `max_in_flight` invocation requests run at once, and at most `rate_per_domain`
+    invocations per second (bursts of `burst`) carry links of the same domain: the limit is on
+    invocations, whatever the number of links they carry, as the crawler walks the links of an
+    invocation one domain at a time. Throttled invocations are retried with backoff.
+
+    `client` only needs the `invoke` method of a boto3 Lambda client, so a local fake can be used.
+    """
+
+    def __init__(
+        self,
+        client,
+        function_name: str,
+        max_in_flight: int = 10,
+        rate_per_domain: float = 1.0,
+        burst: int = 1,
+        max_retries: int = 5,
+        links_per_invocation: int = 1,
+    ):
+        self._function_name = function_name
+        self._max_in_flight = max_in_flight
+        self._links_per_invocation = links_per_invocation
+        self._invoke = backoff.on_exception(
+            backoff.expo,
+            ClientError,
+            giveup=lambda exc: not _is_throttled(exc),
+            max_tries=max_retries,
+        )(client.invoke)
+        self._buckets = defaultdict(lambda: TokenBucket(rate=rate_per_domain, capacity=burst))
+        self._buckets_lock = threading.Lock()
+
+    def invoke_all(self, links: List[str]) -> Dict[str, List[str]]:
+        """
+        Invoke the crawler for every link. Packs whose invocation failed are logged and left out.
+        :returns: the links of every invoked crawler, by correlation id
+        """
+
+        invocations = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_in_flight) as executor:
+            futures = [(pack, executor.submit(self.invoke, pack)) for pack in self._pack(links)]
+
+            for pack, future in futures:
+                try:
+                    invocations[future.result()] = pack
+                except Exception:
+                    logger.error(f"Failed to trigger crawler for: {pack}", exc_info=True)
+
+        return invocations
+
+    def invoke(self, links: List[str]) -> str:
+        """
+        Invoke the crawler for the links, once the rate limit of their domains allows it: the
+        invocation takes one token of the bucket of every domain of the links.
+        :returns: the correlation id of the invocation
+        """
+
+        for domain in dict.fromkeys(map(_domain, links)):
+            self._bucket(domain).acquire()
+
+        response = self._invoke(
+            FunctionName=self._function_name,
+            InvocationType="Event",
+            Payload=json.dumps({"links": links}),
+        )
+        logger.info(f"Triggered crawler for: {links}")
+
+        return response["ResponseMetadata"]["RequestId"]
+
+    def _pack(self, links: List[str]) -> List[List[str]]:
+        """
+        Split the links into packs of `links_per_invocation`. The links are interleaved over their
+        domains first, so that the links crawled concurrently by one invocation are on different
+        domains as much as possible.
+        """
+
+        interleaved = _interleave_domains(links)
+        size = self._links_per_invocation
+
+        return [interleaved[i: i + size] for i in range(0, len(interleaved), size)]
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        with self._buckets_lock:
+            return self._buckets[domain]
+
+
+def _domain(link: str) -> str:
+    hostname = urlparse(link).hostname or ""
+    return hostname.removeprefix("www.")
+
+
+def _interleave_domains(links: List[str]) -> List[str]:
+    """
+    Order the links round-robin over their domains, so that workers waiting on the rate limit
+    of one domain don't hold back the links of the others.
+    """
+
+    by_domain = defaultdict(list)
+    for link in dict.fromkeys(links):
+        by_domain[_domain(link)].append(link)
+
+    interleaved = []
+    queues = list(by_domain.values())
+    for i in range(max(map(len, queues), default=0)):
+        interleaved.extend(queue[i] for queue in queues if i < len(queue))
+
+    return interleaved
@@ -0,0 +1,159 @@
+import re
+import threading
+import time
+from typing import Mapping, Optional
+
+from aws_lambda_powertools import Logger
+
+logger = Logger(service="decodingml/scheduler", child=True)
+
+# Wait applied to a rate limited request without a retry-after or reset header.
+DEFAULT_RETRY_AFTER = 1.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse the durations of the OpenAI rate limit headers, e.g. "20ms", "1s" or "6m0s".
+    :returns: the duration in seconds, or None if the value is missing or malformed
+    """
+
+    if not value:
+        return None
+
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limiter shared by the threads calling a rate limited API.
+
+    The number of requests in flight adapts AIMD-style between `min_concurrency` and
+    `max_concurrency`: it grows by one every `limit` successful requests, and is multiplied by
+    `decrease_factor` when a request is rate limited. Requests started before the last decrease
+    don't decrease it again, so that a burst of rate limited requests counts once.
+
+    The remaining requests and tokens of the rate limit windows are tracked from the
+    x-ratelimit-* response headers, and a request waits for the reset of a window it doesn't fit in.
+    A rate limited request pauses all of the requests until its retry-after, instead of every
+    thread retrying on its own schedule.
+    """
+
+    def __init__(self, max_concurrency: int, min_concurrency: int = 1, decrease_factor: float = 0.5):
+        self.max_concurrency = max_concurrency
+        self._min_concurrency = min_concurrency
+        self._decrease_factor = decrease_factor
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._decreased_at = float("-inf")
+        self._paused_until = 0.0
+        self._remaining_requests: Optional[int] = None
+        self._requests_reset_at = 0.0
+        self._remaining_tokens: Optional[int] = None
+        self._tokens_reset_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until a request of `tokens` tokens fits in the concurrency limit and the rate limits.
+        :returns: the start time of the request, to pass to `release`
+        """
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(now, tokens)
+                if wait <= 0 and self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    if self._remaining_requests is not None:
+                        self._remaining_requests -= 1
+                    if self._remaining_tokens is not None:
+                        self._remaining_tokens -= tokens
+                    return now
+
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, started: float, headers: Optional[Mapping[str, str]] = None, throttled: bool = False) -> None:
+        """
+        Release the request started at `started`, with the headers of its response, if any.
+        """
+
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if headers is not None:
+                self._update_windows(headers, now)
+
+            if not throttled:
+                self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+            else:
+                if started >= self._decreased_at:
+                    self._limit = max(self._min_concurrency, self._limit * self._decrease_factor)
+                    self._decreased_at = now
+                    logger.warning(f"Rate limited, lowered the concurrency to {self.limit}")
+
+                retry_after = _retry_after(headers) if headers is not None else None
+                self._paused_until = max(self._paused_until, now + (DEFAULT_RETRY_AFTER if retry_after is None else retry_after))
+
+            self._condition.notify_all()
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        if now >= self._requests_reset_at:
+            self._remaining_requests = None
+        if now >= self._tokens_reset_at:
+            self._remaining_tokens = None
+
+        waits = [self._paused_until - now]
+        if self._remaining_requests is not None and self._remaining_requests < 1:
+            waits.append(self._requests_reset_at - now)
+        if self._remaining_tokens is not None and self._remaining_tokens < tokens:
+            waits.append(self._tokens_reset_at - now)
+
+        return max(waits)
+
+    def _update_windows(self, headers: Mapping[str, str], now: float) -> None:
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        requests_reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining_requests is not None and requests_reset is not None:
+            self._remaining_requests = int(remaining_requests)
+            self._requests_reset_at = now + requests_reset
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        tokens_reset = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        if remaining_tokens is not None and tokens_reset is not None:
+            self._remaining_tokens = int(remaining_tokens)
+            self._tokens_reset_at = now + tokens_reset
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+
+    resets = [
+        parse_duration(headers.get("x-ratelimit-reset-requests")),
+        parse_duration(headers.get("x-ratelimit-reset-tokens")),
+    ]
+    resets = [reset for reset in resets if reset is not None]
+
+    return min(resets) if resets else None
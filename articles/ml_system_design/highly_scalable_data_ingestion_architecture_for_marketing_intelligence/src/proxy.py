@@ -9,12 +9,15 @@ class ProxyConnection:
         port: str = None,
         username: str = None,
         password: str = None,
-        verify_ssl: bool = False
+        verify_ssl: bool = None
     ):
         self.host = host or os.getenv('PROXY_HOST')
         self.port = port or os.getenv('PROXY_PORT')
         self.username = username or os.getenv('PROXY_USERNAME')
         self.password = password or os.getenv('PROXY_PASSWORD')
+        # TLS is verified unless the configuration explicitly turns it off.
+        if verify_ssl is None:
+            verify_ssl = os.getenv('PROXY_VERIFY_SSL', 'true').strip().lower() not in ('false', '0', 'no')
         self.verify_ssl = verify_ssl
         self._url = f"{self.username}:{self.password}@{self.host}:{self.port}"
 
@@ -25,3 +28,8 @@ class ProxyConnection:
             'no_proxy': 'localhost, 127.0.0.1',
             'verify_ssl': self.verify_ssl
         }
+
+    def proxies(self) -> dict:
+        """The proxies of a `requests` session."""
+        proxies = self.__dict__()
+        return {'http': proxies['http'], 'https': proxies['https']}
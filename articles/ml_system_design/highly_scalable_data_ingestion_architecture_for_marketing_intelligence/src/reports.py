@@ -0,0 +1,98 @@
+from typing import Callable, Dict, List, Optional
+
+from aws_lambda_powertools import Logger
+from pydantic import ValidationError
+
+from src.schemas import FieldProfiles, InformationProfiles, ReportProfiles
+
+logger = Logger(service="decodingml/scheduler", child=True)
+
+REPORT_NAME = "RESTAURANT EVENTS REPORT"
+
+
+def parse_report(response: str) -> Optional[ReportProfiles]:
+    """
+    :returns: the report of a batch, or None if the response of the model doesn't follow the schema
+    """
+
+    try:
+        return ReportProfiles.model_validate_json(_unfenced(response))
+    except ValidationError:
+        logger.warning("Dropped a batch report that doesn't follow the report schema", exc_info=True)
+        return None
+
+
+def is_report(response: str) -> bool:
+    """
+    :returns: whether the response of the model follows the report schema
+    """
+
+    try:
+        ReportProfiles.model_validate_json(_unfenced(response))
+    except ValidationError:
+        return False
+    return True
+
+
+def reduce_reports(
+    responses: List[str],
+    resolve_conflict: Callable[[str, List[InformationProfiles]], InformationProfiles],
+) -> Optional[ReportProfiles]:
+    """
+    Parse the responses of the batches and merge them into one report, see `merge_reports`.
+    :returns: the report, or None if none of the responses follows the report schema
+    """
+
+    reports = [report for report in map(parse_report, responses) if report is not None]
+    if not reports:
+        logger.error(f"None of the {len(responses)} batch reports follows the report schema")
+        return None
+
+    return merge_reports(reports, resolve_conflict)
+
+
+def merge_reports(
+    reports: List[ReportProfiles],
+    resolve_conflict: Callable[[str, List[InformationProfiles]], InformationProfiles],
+) -> ReportProfiles:
+    """
+    Merge the reports of the batches into one: the fields of the same name are merged, and their
+    entries deduplicated by post link. Entries of the same link that differ are conflicts, which
+    `resolve_conflict` reconciles into one entry, given the name of the field and the entries.
+    """
+
+    fields: Dict[str, FieldProfiles] = {}
+    entries: Dict[str, Dict[str, List[InformationProfiles]]] = {}
+
+    for report in reports:
+        for field in report.fields:
+            key = field.name.strip().lower()
+            fields.setdefault(key, FieldProfiles(name=field.name.strip(), keys=[]))
+            by_link = entries.setdefault(key, {})
+
+            for entry in field.keys:
+                versions = by_link.setdefault(entry.link.strip(), [])
+                if not any(_same_entry(entry, version) for version in versions):
+                    versions.append(entry)
+
+    conflicts = sum(len(versions) > 1 for by_link in entries.values() for versions in by_link.values())
+    logger.info(f"Merged {len(reports)} reports into {len(fields)} fields, with {conflicts} conflicts")
+
+    for key, field in fields.items():
+        field.keys = [
+            versions[0] if len(versions) == 1 else resolve_conflict(field.name, versions)
+            for versions in entries[key].values()
+        ]
+
+    return ReportProfiles(name=REPORT_NAME, fields=list(fields.values()))
+
+
+def _same_entry(entry: InformationProfiles, other: InformationProfiles) -> bool:
+    return all(
+        " ".join(getattr(entry, name).split()).lower() == " ".join(getattr(other, name).split()).lower()
+        for name in ("name", "information", "city")
+    )
+
+
+def _unfenced(response: str) -> str:
+    return response.strip().removeprefix("```json").removesuffix("```")
@@ -1,11 +1,10 @@
-import json
 import os
 import time
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Callable, Optional
 
-import backoff
 import boto3
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -13,18 +12,40 @@ import openai
 from langchain.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
 from openai import OpenAI
 
+from src.batching import TokenCounter, pack_posts
+from src.cache import LLMCache
 from src.constants import PAGE_LINK
 from src.db import database
-from src.schemas import ReportProfiles
-from src.utils import monitor
-from src.templates import PROFILES_REPORT_TEMPLATE, PROFILES_TEMPLATE_REFINE
+from src.invoker import CrawlerInvoker
+from src.limiter import AdaptiveLimiter
+from src.reports import is_report, reduce_reports
+from src.schemas import InformationProfiles, ReportProfiles
+from src.utils import wait_for_completions
+from src.templates import PROFILES_REPORT_TEMPLATE, PROFILES_TEMPLATE_MERGE, PROFILES_TEMPLATE_REFINE
 
 logger = Logger(service="decodingml/scheduler")
 
 _client = boto3.client("lambda")
 
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', default=6))
+COMPLETION_TOKENS = int(os.getenv('OPENAI_COMPLETION_TOKENS_ESTIMATE', default=1000))
+
+CRAWLER_COMPLETION_TIMEOUT = float(os.getenv('CRAWLER_COMPLETION_TIMEOUT', default=330))
+# Time of the invocation kept to generate the report once the crawlers are done.
+REPORT_TIME_BUDGET = float(os.getenv('REPORT_TIME_BUDGET', default=240))
+
+# Shared by the report threads of warm invocations as well, so that they start at the learned rate.
+_limiter = AdaptiveLimiter(max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', default=12)))
+
+_cache = LLMCache(
+    database.llm_cache,
+    ttl=int(os.getenv('LLM_CACHE_TTL_DAYS', default=30)) * 24 * 60 * 60,
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', default=10000)),
+)
+
 
 def get_chain(llm, template: str, input_variables=None, verbose=True, output_key=""):
     return LLMChain(
@@ -37,34 +58,88 @@ def get_chain(llm, template: str, input_variables=None, verbose=True, output_key
     )
 
 
-@backoff.on_exception(backoff.expo, openai.RateLimitError)
-def completion_with_backoff(llm, **kwargs):
-    return llm.chat.completions.create(**kwargs)
+def completion_with_limiter(llm, **kwargs):
+    """
+    Request a chat completion through the limiter shared by the report threads. Rate limited
+    requests are retried once the limiter allows it, up to OPENAI_MAX_RETRIES times.
+    """
+
+    counter = TokenCounter(model=kwargs["model"])
+    # The rate limits count the prompt and the expected completion.
+    tokens = sum(counter.count(message["content"]) for message in kwargs["messages"]) + COMPLETION_TOKENS
+
+    for attempt in range(1, OPENAI_MAX_RETRIES + 1):
+        started = _limiter.acquire(tokens)
+        try:
+            response = llm.chat.completions.with_raw_response.create(**kwargs)
+        except openai.RateLimitError as e:
+            _limiter.release(started, e.response.headers, throttled=True)
+            if e.code == "insufficient_quota" or attempt == OPENAI_MAX_RETRIES:
+                raise
+            continue
+        except Exception:
+            _limiter.release(started)
+            raise
+
+        _limiter.release(started, response.headers)
+        return response.parse()
+
+
+def cached_completion(
+    llm, model: str, template: str, prompt: str, is_valid: Callable[[str], bool] = bool
+) -> str:
+    """
+    Only the completions that `is_valid` accepts are cached, so that a malformed answer is
+    requested again on the next run rather than replayed until it expires.
+    :returns: the completion of the prompt rendered from the template, from the cache if the same
+        model already completed it
+    """
+
+    key = _cache.key(model, template, prompt)
+    content = _cache.get(key)
+    if content is not None:
+        if is_valid(content):
+            logger.info("Reused a cached completion.")
+            return content
+        _cache.delete(key)
+
+    response = completion_with_limiter(llm=llm, model=model, messages=[{"role": "user", "content": prompt}])
+    content = response.choices[0].message.content
+    if is_valid(content):
+        _cache.put(key, content, model)
+    else:
+        logger.warning("Did not cache a completion that failed validation.")
+
+    return content
+
+
+def _parses(output_parser: PydanticOutputParser, content: str) -> bool:
+    try:
+        output_parser.parse(content)
+    except OutputParserException:
+        return False
+    return True
 
 
 def create_report_for_batch(batch):
     logger.info("Starting report creation for batch.")
 
-    llm = OpenAI()
+    # The limiter retries the rate limited requests, the retries of the client would bypass it.
+    llm = OpenAI(max_retries=0)
     model = os.getenv('OPENAI_MODEL', default='gpt-4-1106-preview')
     logger.debug(f"Requesting initial completion with batch data: {batch}")
 
     try:
-        chain_profiles = completion_with_backoff(
+        report = cached_completion(
             llm=llm,
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": PROFILES_REPORT_TEMPLATE.format(input_var=batch),
-                },
-            ],
+            template=PROFILES_REPORT_TEMPLATE,
+            prompt=PROFILES_REPORT_TEMPLATE.format(input_var=batch),
         )
     except Exception as e:
         logger.error("Failed during initial completion request", exc_info=True)
         raise e
 
-    report = chain_profiles.choices[0].message.content
     logger.debug("Received initial completion results.")
 
     output_parser = PydanticOutputParser(pydantic_object=ReportProfiles)
@@ -79,45 +154,50 @@ def create_report_for_batch(batch):
     logger.info("Requesting refinement of the initial report.")
 
     try:
-        chain_refine = completion_with_backoff(
+        refined_report = cached_completion(
             llm=llm,
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": PROFILES_TEMPLATE_REFINE.format(
-                        raport=report, format_instructions=format_output
-                    ),
-                },
-            ],
+            template=PROFILES_TEMPLATE_REFINE,
+            prompt=PROFILES_TEMPLATE_REFINE.format(raport=report, format_instructions=format_output),
+            is_valid=is_report,
         )
-        print("CHAIN REFINE", chain_refine)
     except Exception as e:
         logger.error("Failed during report refinement request", exc_info=True)
         raise e
 
     logger.info("Report refinement completed.")
 
-    return chain_refine.choices[0].message.content
+    return refined_report
 
 
 def generate_profiles_report(posts: list[dict]) -> list[str]:
     """
     Method that creates a chain to output a profile report based on the scraped data.
+    The posts are packed into as few batches as fit the prompt token budget, one report per batch.
     :returns: list of reports
     """
 
     responses = []
-    input_var = [f"{p.get('content')} {p.get('link')} {p.get('name')} \n" for p in posts]
-
-    batch_size = 50
+    counter = TokenCounter(model=os.getenv('OPENAI_MODEL', default='gpt-4-1106-preview'))
+
+    prompt_budget = int(os.getenv('REPORT_PROMPT_TOKEN_BUDGET', default=16000))
+    template_tokens = counter.count(PROFILES_REPORT_TEMPLATE)
+    budget = prompt_budget - template_tokens
+    if budget <= 0:
+        raise ValueError(
+            f"REPORT_PROMPT_TOKEN_BUDGET={prompt_budget} leaves no room for the posts, "
+            f"the report template alone takes {template_tokens} tokens"
+        )
+    batches = pack_posts(
+        posts,
+        counter,
+        budget=budget,
+        max_post_tokens=min(int(os.getenv('REPORT_POST_MAX_TOKENS', default=1000)), budget),
+    )
 
-    # create batches
-    batches = [
-        input_var[i: i + batch_size] for i in range(0, len(input_var), batch_size)
-    ]
+    logger.info(f"Packed {len(posts)} posts into {len(batches)} batches of at most {budget} tokens")
 
-    with ThreadPoolExecutor(max_workers=12) as executor:
+    with ThreadPoolExecutor(max_workers=_limiter.max_concurrency) as executor:
         future_to_batch = {
             executor.submit(create_report_for_batch, batch): batch
             for batch in batches
@@ -129,37 +209,119 @@ def generate_profiles_report(posts: list[dict]) -> list[str]:
     return responses
 
 
-def lambda_handler(event, context: LambdaContext):
-    correlation_ids = []
+def resolve_conflict(field: str, entries: list[InformationProfiles]) -> InformationProfiles:
+    """
+    Ask the model to reconcile the versions of the information extracted from one post.
+    Falls back to the first version if the answer doesn't follow the schema.
+    """
 
-    for link in PAGE_LINK:
-        response = _client.invoke(
-            FunctionName="pi-prod-profiles-crawler",
-            InvocationType="Event",
-            Payload=json.dumps({"link": link}),
-        )
-        logger.info(f"Triggered crawler for: {link}")
+    output_parser = PydanticOutputParser(pydantic_object=InformationProfiles)
 
-        correlation_ids.append(response["ResponseMetadata"]["RequestId"])
+    response = cached_completion(
+        llm=OpenAI(max_retries=0),
+        model=os.getenv('OPENAI_MODEL', default='gpt-4-1106-preview'),
+        template=PROFILES_TEMPLATE_MERGE,
+        prompt=PROFILES_TEMPLATE_MERGE.format(
+            field=field,
+            entries=[entry.model_dump_json() for entry in entries],
+            format_instructions=output_parser.get_format_instructions(),
+        ),
+        is_valid=lambda content: _parses(output_parser, content),
+    )
 
-    logger.info(f"Monitoring: {len(correlation_ids)} crawler processes")
+    try:
+        return output_parser.parse(response)
+    except OutputParserException:
+        logger.warning(f"Kept the first version of a conflict on {entries[0].link}", exc_info=True)
+        return entries[0]
 
-    while True:
-        time.sleep(15)
-        completed = monitor(correlation_ids)
 
-        correlation_ids = [c for c in correlation_ids if c not in completed]
+def synthesize_report(responses: list[str]) -> Optional[ReportProfiles]:
+    """
+    Reduce the reports of the batches into one report, calling the model only for conflicts.
+    :returns: the report, or None if none of the batch reports could be parsed
+    """
+
+    return reduce_reports(responses, resolve_conflict)
+
+
+def save_report(report: ReportProfiles, posts: list[dict], since: datetime, until: datetime):
+    database.reports.insert_one(
+        {
+            **report.model_dump(),
+            "since": since,
+            "until": until,
+            "post_count": len(posts),
+            "created_at": datetime.now(),
+        }
+    )
+
 
-        if not correlation_ids:
+def crawl_links(invoker: CrawlerInvoker, links: list[str], timeout: float) -> list[str]:
+    """
+    Invoke the crawlers for the links and wait up to `timeout` seconds for them to complete.
+    :returns: the links that the crawlers reported as unfinished or failed, to be crawled again.
+        Links of crawlers that did not complete in time are not returned, they may still be running.
+    """
+
+    invocations = invoker.invoke_all(links)
+
+    logger.info(f"Monitoring: {len(invocations)} crawler processes")
+
+    completions = wait_for_completions(
+        list(invocations),
+        timeout=timeout,
+        poll_interval=float(os.getenv('CRAWLER_COMPLETION_POLL_INTERVAL', default=5)),
+    )
+
+    unfinished = []
+    for correlation_id, invoked_links in invocations.items():
+        completion = completions.get(correlation_id)
+        if completion is None:
+            logger.warning(f"Crawler {correlation_id} for {invoked_links} did not complete in time")
+            continue
+
+        for result in completion["results"]:
+            if result["status"] != "succeeded":
+                logger.warning(f"Crawler for {result['link']} {result['status']} after {result['duration']:.1f}s")
+            else:
+                logger.info(f"Crawler for {result['link']} inserted {result['post_count']} posts in {result['duration']:.1f}s")
+        unfinished.extend(completion["unfinished"])
+
+    return unfinished
+
+
+def lambda_handler(event, context: LambdaContext):
+    invoker = CrawlerInvoker(
+        client=_client,
+        function_name=os.getenv('CRAWLER_FUNCTION_NAME', default='pi-prod-profiles-crawler'),
+        max_in_flight=int(os.getenv('CRAWLER_MAX_IN_FLIGHT', default=10)),
+        rate_per_domain=float(os.getenv('CRAWLER_RATE_PER_DOMAIN', default=1)),
+        burst=int(os.getenv('CRAWLER_BURST_PER_DOMAIN', default=1)),
+        links_per_invocation=int(os.getenv('CRAWLER_LINKS_PER_INVOCATION', default=5)),
+    )
+
+    # The rounds of crawls only get the time left to the invocation once the report is budgeted.
+    deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - REPORT_TIME_BUDGET
+
+    links = PAGE_LINK
+    for _ in range(int(os.getenv('CRAWLER_MAX_ROUNDS', default=2))):
+        timeout = min(CRAWLER_COMPLETION_TIMEOUT, deadline - time.monotonic())
+        if timeout <= 0:
+            break
+        links = crawl_links(invoker, links, timeout)
+        if not links:
             break
 
-        logger.info(f"Still waiting for {len(correlation_ids)} crawlers to complete")
+    if links:
+        logger.warning(f"Gave up crawling {len(links)} unfinished links: {links}")
 
     now = datetime.now()
+    since = now - timedelta(days=7)
     posts = list(
         database.profiles.find(
             {
-                "date": {"$gte": (now - timedelta(days=7)), "$lte": now},
+                "date": {"$gte": since, "$lte": now},
             }
         )
     )
@@ -170,6 +332,11 @@ def lambda_handler(event, context: LambdaContext):
         logger.info("Cannot generate report, no new posts available")
         return
 
-    reports = generate_profiles_report(posts)
+    report = synthesize_report(generate_profiles_report(posts))
+    if report is None:
+        logger.error("Cannot save the report, no batch report could be parsed")
+        return
+
+    save_report(report, posts, since=since, until=now)
 
     logger.info("Generated new report!")
@@ -29,4 +29,12 @@ PROFILES_TEMPLATE_REFINE = (
     'The required structure is: {format_instructions} \n'
     'If there is no relevant information for one of the keys, you will leave it as an empty list. \n'
     'Your response should not contain ```json```; only the specified structure is allowed. \n'
-)
\ No newline at end of file
+)
+PROFILES_TEMPLATE_MERGE = (
+    'You are a specialist in the HORECA field and have extracted, from the same post, several versions of one piece of information for the "{field}" category of a report. \n'
+    'Versions: {entries} \n'
+    'Step 1: Compare the versions and keep only the information that they agree on or that is stated more precisely in one of them. \n'
+    'Step 2: Merge them into a single, concise piece of information about the post. \n'
+    'The required structure is: {format_instructions} \n'
+    'Your response should not contain ```json```; only the specified structure is allowed. \n'
+)
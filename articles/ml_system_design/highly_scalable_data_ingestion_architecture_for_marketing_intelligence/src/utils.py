@@ -1,27 +1,90 @@
-import datetime
-import re
-from typing import List
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
 
-import boto3
+from aws_lambda_powertools import Logger
+from pymongo import ASCENDING
 
-_client = boto3.client('logs')
+from src.db import database
 
+logger = Logger(service="decodingml/scheduler", child=True)
 
-def monitor(correlation_ids: List[str]):
-    finished = []
+COMPLETION_RECORDS_TTL = 30 * 24 * 60 * 60
 
-    now = int((datetime.datetime.now() - datetime.timedelta(days=1)).timestamp() * 1000)
 
-    response = _client.filter_log_events(
-        logGroupName='/aws/lambda/pi-prod-profiles-crawler',
-        startTime=now,
-        filterPattern="REPORT RequestId"
+def record_completion(
+    correlation_id: str,
+    links: List[str],
+    status: str,
+    post_count: int,
+    duration: float,
+    results: Optional[List[dict]] = None,
+    unfinished: Optional[List[str]] = None,
+):
+    """
+    Write the completion record of a crawler invocation, with the outcome of each of its links in
+    `results` and the links left to crawl in `unfinished`. Retries of an invocation share its
+    correlation id, so the record of the last attempt wins.
+    """
+
+    database.crawler_runs.update_one(
+        {"correlation_id": correlation_id},
+        {
+            "$set": {
+                "links": links,
+                "status": status,
+                "post_count": post_count,
+                "duration": duration,
+                "results": results or [],
+                "unfinished": unfinished or [],
+                "finished_at": datetime.now(),
+            }
+        },
+        upsert=True,
+    )
+
+
+def get_crawl_cursor(link: str) -> Optional[dict]:
+    """
+    :returns: the newest post (date and shortcode) stored by the previous crawl of the page, if any
+    """
+
+    return database.crawl_cursors.find_one({"link": link}, projection={"_id": 0, "date": 1, "shortcode": 1})
+
+
+def save_crawl_cursor(link: str, cursor: dict):
+    database.crawl_cursors.update_one(
+        {"link": link},
+        {"$set": {**cursor, "updated_at": datetime.now()}},
+        upsert=True,
     )
 
-    for event in response['events']:
-        if match := re.search(r'REPORT RequestId: ([^\s]+)', event.get('message')):
-            correlation_id = match.group(1)
-            if correlation_id in correlation_ids:
-                finished.append(correlation_id)
 
-    return finished
+def wait_for_completions(correlation_ids: List[str], timeout: float, poll_interval: float) -> Dict[str, dict]:
+    """
+    Wait until every crawler invocation wrote its completion record, or `timeout` seconds.
+    Each poll is a single indexed query on the pending correlation ids.
+    :returns: the completion records, by correlation id, of the crawlers that completed in time
+    """
+
+    database.crawler_runs.create_index([("correlation_id", ASCENDING)], unique=True)
+    database.crawler_runs.create_index([("finished_at", ASCENDING)], expireAfterSeconds=COMPLETION_RECORDS_TTL)
+
+    deadline = time.monotonic() + timeout
+    completions = {}
+    pending = set(correlation_ids)
+
+    while pending:
+        records = database.crawler_runs.find({"correlation_id": {"$in": list(pending)}}, projection={"_id": 0})
+        for record in records:
+            completions[record["correlation_id"]] = record
+        pending.difference_update(completions)
+
+        remaining = deadline - time.monotonic()
+        if not pending or remaining <= 0:
+            break
+
+        logger.info(f"Still waiting for {len(pending)} crawlers to complete")
+        time.sleep(min(poll_interval, remaining))
+
+    return completions
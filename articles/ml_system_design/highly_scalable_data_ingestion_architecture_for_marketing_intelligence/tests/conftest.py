@@ -0,0 +1,16 @@
+"""
+    The Lambda handlers configure their clients when they are imported: give them a database name
+    and a region, so that they can be imported without any connection being made, and run them
+    against an in-memory database.
+"""
+
+import os
+
+import mongomock
+
+os.environ.setdefault("DATABASE_NAME", "tests")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from src import db  # noqa: E402
+
+db.database = mongomock.MongoClient().get_database(os.environ["DATABASE_NAME"])
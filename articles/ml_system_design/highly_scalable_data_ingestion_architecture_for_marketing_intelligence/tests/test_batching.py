@@ -0,0 +1,79 @@
+"""
+    This module contains tests for the packing of the posts into report batches, defined in src.batching.
+"""
+
+import pytest
+
+from src import batching, scheduler
+from src.batching import TokenCounter, pack_posts
+
+
+class WordCounter:
+    """Counts a token per word, so that the sizes of the posts are easy to tell."""
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return " ".join(text.split()[:max_tokens])
+
+
+def _post(name: str, words: int) -> dict:
+    # A formatted post counts 3 more tokens than its content: the link, the name and the separator.
+    return {"content": " ".join(["word"] * words), "link": f"https://www.instagram.com/{name}/", "name": name}
+
+
+def _names(batches):
+    return [[text.split()[-1] for text in batch] for batch in batches]
+
+
+def test_no_posts_make_no_batches():
+    assert pack_posts([], WordCounter(), budget=100, max_post_tokens=10) == []
+
+
+def test_posts_are_placed_first_fit_longest_first():
+    posts = [_post("c", 2), _post("a", 6), _post("d", 1), _post("b", 4)]
+
+    batches = pack_posts(posts, WordCounter(), budget=13, max_post_tokens=100)
+
+    # a (9 tokens) opens the first batch, b (7) doesn't fit with it and opens the second one,
+    # c (5) only fits in the second, and d (4) fills the first.
+    assert _names(batches) == [["a", "d"], ["b", "c"]]
+
+
+def test_batches_do_not_depend_on_the_order_of_the_posts():
+    posts = [_post("a", 6), _post("b", 4), _post("c", 2), _post("d", 1), _post("e", 4)]
+
+    batches = pack_posts(posts, WordCounter(), budget=12, max_post_tokens=100)
+
+    assert pack_posts(list(reversed(posts)), WordCounter(), budget=12, max_post_tokens=100) == batches
+
+
+def test_a_post_over_the_budget_gets_a_batch_of_its_own():
+    posts = [_post("long", 20), _post("short", 1)]
+
+    batches = pack_posts(posts, WordCounter(), budget=12, max_post_tokens=100)
+
+    assert _names(batches) == [["long"], ["short"]]
+
+
+def test_long_posts_are_truncated_but_keep_their_link_and_name():
+    (batch,) = pack_posts([_post("long", 20)], WordCounter(), budget=100, max_post_tokens=5)
+
+    assert batch == ["word word word word word https://www.instagram.com/long/ long \n"]
+
+
+def test_tokens_are_estimated_from_the_length_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(batching, "tiktoken", None)
+    counter = TokenCounter("gpt-4")
+
+    assert counter.count("abcdefg") == 3
+    assert counter.truncate("abcdefg", 2) == "abcdef"
+
+
+def test_a_prompt_budget_smaller_than_the_template_is_rejected(monkeypatch):
+    monkeypatch.setattr(batching, "tiktoken", None)
+    monkeypatch.setenv("REPORT_PROMPT_TOKEN_BUDGET", "100")
+
+    with pytest.raises(ValueError, match="REPORT_PROMPT_TOKEN_BUDGET"):
+        scheduler.generate_profiles_report([_post("a", 6)])
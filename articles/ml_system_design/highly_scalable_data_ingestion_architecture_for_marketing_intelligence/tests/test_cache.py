@@ -0,0 +1,181 @@
+"""
+    This module contains tests for the cache of the LLM responses, defined in src.cache, and for its
+    use by the scheduler.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError
+
+from src import cache, scheduler
+from src.cache import LLMCache, template_version
+from src.reports import REPORT_NAME
+from src.schemas import ReportProfiles
+
+TTL = 3600
+
+
+class FakeDatetime:
+    """Each call to now() is a second later, so that the entries are ordered by their use."""
+
+    current = datetime.now()
+
+    @classmethod
+    def now(cls):
+        cls.current += timedelta(seconds=1)
+        return cls.current
+
+
+class ConflictingTTLCollection:
+    """A collection whose TTL index was created with another TTL, as after a change of LLM_CACHE_TTL_DAYS."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+        self.database = self
+        self.commands = []
+
+    def create_index(self, keys, **kwargs):
+        if "expireAfterSeconds" in kwargs:
+            raise OperationFailure("Index already exists with different options", code=cache.INDEX_OPTIONS_CONFLICT)
+        return self._collection.create_index(keys, **kwargs)
+
+    def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class UnreachableCollection:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ServerSelectionTimeoutError("No servers found")
+
+        return fail
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(FakeDatetime, "current", datetime.now())
+    monkeypatch.setattr(cache, "datetime", FakeDatetime)
+    return mongomock.MongoClient().db.llm_cache
+
+
+def test_keys_depend_on_the_model_the_template_and_the_prompt():
+    key = LLMCache.key("gpt-4", "Summarize {posts}", "Summarize a post")
+
+    assert key == LLMCache.key("gpt-4", "Summarize {posts}", "Summarize a post")
+    assert key != LLMCache.key("gpt-4o", "Summarize {posts}", "Summarize a post")
+    assert key != LLMCache.key("gpt-4", "Summarize briefly {posts}", "Summarize a post")
+    assert key != LLMCache.key("gpt-4", "Summarize {posts}", "Summarize another post")
+    assert template_version("Summarize {posts}") != template_version("Summarize briefly {posts}")
+
+
+def test_responses_are_cached_by_key(collection):
+    llm_cache = LLMCache(collection, ttl=TTL, max_entries=10)
+
+    llm_cache.put("key", "response", "gpt-4")
+
+    assert llm_cache.get("key") == "response"
+    assert llm_cache.get("other key") is None
+
+    llm_cache.delete("key")
+    assert llm_cache.get("key") is None
+
+
+def test_entries_expire_through_a_ttl_index(collection):
+    llm_cache = LLMCache(collection, ttl=TTL, max_entries=10)
+    FakeDatetime.current = datetime.now() - timedelta(seconds=2 * TTL)
+    llm_cache.put("expired", "response", "gpt-4")
+    FakeDatetime.current = datetime.now()
+    llm_cache.put("key", "response", "gpt-4")
+
+    assert collection.index_information()["created_at_1"]["expireAfterSeconds"] == TTL
+    assert llm_cache.get("expired") is None
+    assert llm_cache.get("key") == "response"
+
+
+def test_the_ttl_index_is_updated_when_the_ttl_changed(collection):
+    conflicting = ConflictingTTLCollection(collection)
+    llm_cache = LLMCache(conflicting, ttl=TTL, max_entries=10)
+
+    llm_cache.put("key", "response", "gpt-4")
+
+    assert conflicting.commands == [
+        (("collMod", "llm_cache"), {"index": {"keyPattern": {"created_at": 1}, "expireAfterSeconds": TTL}})
+    ]
+    assert llm_cache.get("key") == "response"
+
+
+def test_the_least_recently_used_entries_are_evicted(collection):
+    llm_cache = LLMCache(collection, ttl=TTL, max_entries=2)
+    llm_cache.put("first", "response", "gpt-4")
+    llm_cache.put("second", "response", "gpt-4")
+
+    assert llm_cache.get("first") == "response"
+    llm_cache.put("third", "response", "gpt-4")
+
+    assert sorted(entry["_id"] for entry in collection.find()) == ["first", "third"]
+
+
+def test_database_errors_are_cache_misses():
+    llm_cache = LLMCache(UnreachableCollection(), ttl=TTL, max_entries=10)
+
+    llm_cache.put("key", "response", "gpt-4")
+    llm_cache.delete("key")
+
+    assert llm_cache.get("key") is None
+
+
+class FakeCompletions:
+    def __init__(self, monkeypatch, contents):
+        self.contents = list(contents)
+        self.prompts = []
+        monkeypatch.setattr(scheduler, "completion_with_limiter", self.complete)
+
+    def complete(self, llm, model, messages):
+        self.prompts.append(messages[0]["content"])
+        message = SimpleNamespace(content=self.contents.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _complete(**kwargs) -> str:
+    return scheduler.cached_completion(llm=None, model="gpt-4", template="{report}", prompt="A report", **kwargs)
+
+
+@pytest.fixture
+def scheduler_cache(monkeypatch, collection):
+    llm_cache = LLMCache(collection, ttl=TTL, max_entries=10)
+    monkeypatch.setattr(scheduler, "_cache", llm_cache)
+    return llm_cache
+
+
+def test_valid_completions_are_reused(monkeypatch, scheduler_cache):
+    report = ReportProfiles(name=REPORT_NAME, fields=[]).model_dump_json()
+    completions = FakeCompletions(monkeypatch, [report])
+
+    assert _complete(is_valid=scheduler.is_report) == report
+    assert _complete(is_valid=scheduler.is_report) == report
+    assert completions.prompts == ["A report"]
+
+
+def test_completions_that_fail_validation_are_not_cached(monkeypatch, scheduler_cache):
+    report = ReportProfiles(name=REPORT_NAME, fields=[]).model_dump_json()
+    completions = FakeCompletions(monkeypatch, ["Sorry, I can't help with that.", report])
+
+    assert _complete(is_valid=scheduler.is_report) == "Sorry, I can't help with that."
+    assert _complete(is_valid=scheduler.is_report) == report
+    assert completions.prompts == ["A report", "A report"]
+
+
+def test_cached_completions_that_fail_validation_are_replaced(monkeypatch, scheduler_cache):
+    report = ReportProfiles(name=REPORT_NAME, fields=[]).model_dump_json()
+    scheduler_cache.put(scheduler_cache.key("gpt-4", "{report}", "A report"), '{"name": "report"}', "gpt-4")
+    FakeCompletions(monkeypatch, [report])
+
+    assert _complete(is_valid=scheduler.is_report) == report
+    assert scheduler_cache.get(scheduler_cache.key("gpt-4", "{report}", "A report")) == report
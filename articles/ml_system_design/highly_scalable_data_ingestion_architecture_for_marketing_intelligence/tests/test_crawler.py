@@ -0,0 +1,147 @@
+"""
+    This module contains tests for the crawler handler, defined in src.crawler, and for the sessions
+    the dispatcher gives to its crawls.
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src import crawler
+from src.crawlers import CrawlerDispatcher
+from src.crawlers.base import BaseAbstractCrawler
+
+
+class FakeClock:
+    """Replaces the time module of the handler, only the crawls advance it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakeCrawler(BaseAbstractCrawler):
+    """
+    Yields `pages` pages of two posts for the links ending in /<pages>/. Its sessions are counted,
+    the crawls of /slow/ take an hour to get their first page and those of /broken/ fail.
+    """
+
+    clock: FakeClock = None
+    barrier: threading.Barrier = None
+    sessions_created = 0
+    sessions_used: list = []
+
+    def __init__(self, link: str, session=None) -> None:
+        self.link = link
+        self.session = session
+
+    @classmethod
+    def create_session(cls, proxy=None):
+        cls.sessions_created += 1
+        return object()
+
+    def extract(self, cursor=None, **kwargs):
+        FakeCrawler.sessions_used.append(self.session)
+        if self.barrier:
+            self.barrier.wait()
+
+        name = self.link.rstrip("/").rsplit("/", 1)[-1]
+        if name == "broken":
+            raise RuntimeError("The page is gone")
+        if name == "slow":
+            self.clock.now += 3600
+            yield [{"name": name, "shortcode": "slow-0"}]
+            yield [{"name": name, "shortcode": "slow-1"}]
+            return
+
+        for page in range(int(name)):
+            yield [{"name": self.link, "shortcode": f"{page}-{post}"} for post in range(2)]
+        self.cursor = {"shortcode": "0-0"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(crawler, "time", clock)
+    monkeypatch.setattr(FakeCrawler, "clock", clock)
+    return clock
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    dispatcher = CrawlerDispatcher()
+    dispatcher.register("example.com", FakeCrawler)
+    monkeypatch.setattr(crawler, "dispatcher", dispatcher)
+    monkeypatch.setattr(FakeCrawler, "sessions_created", 0)
+    monkeypatch.setattr(FakeCrawler, "sessions_used", [])
+    for collection in ("profiles", "crawl_cursors", "crawler_runs"):
+        crawler.database.drop_collection(collection)
+    return dispatcher
+
+
+def _context(request_id: str) -> SimpleNamespace:
+    return SimpleNamespace(aws_request_id=request_id, get_remaining_time_in_millis=lambda: 600_000)
+
+
+def _run(links: list[str], request_id: str) -> tuple[dict, dict]:
+    response = crawler.lambda_handler({"links": links}, _context(request_id))
+    record = crawler.database.crawler_runs.find_one({"correlation_id": request_id}, projection={"_id": 0})
+    return response, record
+
+
+def test_the_outcome_of_every_link_is_recorded(clock, dispatcher, monkeypatch):
+    # One at a time, so that the hour taken by the slow link, crawled last, leaves the others alone.
+    monkeypatch.setattr(crawler, "LINK_CONCURRENCY", 1)
+    links = ["https://example.com/broken/", "https://example.com/2/", "https://example.com/slow/"]
+
+    response, record = _run(links, "request-outcomes")
+
+    outcomes = {result["link"]: (result["status"], result["post_count"]) for result in record["results"]}
+    assert outcomes == {
+        "https://example.com/broken/": ("failed", 0),
+        "https://example.com/2/": ("succeeded", 4),
+        "https://example.com/slow/": ("unfinished", 1),
+    }
+    assert record["unfinished"] == ["https://example.com/broken/", "https://example.com/slow/"]
+    assert (record["status"], record["post_count"], record["links"]) == ("partial", 5, links)
+    assert response == {"status": "partial", "results": record["results"], "unfinished": record["unfinished"]}
+
+
+def test_links_past_the_time_budget_are_left_unfinished(clock, dispatcher):
+    links = ["https://example.com/1/"]
+    context = SimpleNamespace(
+        aws_request_id="request-no-time", get_remaining_time_in_millis=lambda: crawler.TIME_BUDGET_MARGIN * 1000
+    )
+
+    response = crawler.lambda_handler({"links": links}, context)
+
+    assert response["status"] == "partial"
+    assert response["unfinished"] == links
+    assert FakeCrawler.sessions_used == []
+
+
+def test_the_links_of_one_domain_are_crawled_concurrently_with_their_own_sessions(clock, dispatcher, monkeypatch):
+    links = [f"https://example.com/{pages}/" for pages in (1, 2, 3)]
+    monkeypatch.setattr(crawler, "LINK_CONCURRENCY", len(links))
+    # Every crawl waits for the others to start: they only get through if they run at the same time.
+    monkeypatch.setattr(FakeCrawler, "barrier", threading.Barrier(len(links), timeout=5))
+
+    response, record = _run(links, "request-concurrent")
+
+    assert record["status"] == "succeeded"
+    assert [result["post_count"] for result in response["results"]] == [2, 4, 6]
+    assert FakeCrawler.sessions_created == 3
+    assert len(set(map(id, FakeCrawler.sessions_used))) == 3
+
+
+def test_sessions_are_reused_by_the_next_crawls(clock, dispatcher):
+    first, second = ["https://example.com/1/"], ["https://example.com/2/"]
+
+    _run(first, "request-first")
+    _run(second, "request-second")
+
+    assert FakeCrawler.sessions_created == 1
+    assert FakeCrawler.sessions_used[0] is FakeCrawler.sessions_used[1]
@@ -0,0 +1,159 @@
+"""
+    This module contains tests for the fan-out of the crawler invocations, defined in src.invoker.
+"""
+
+import json
+import threading
+
+import backoff._sync
+import pytest
+from botocore.exceptions import ClientError
+
+from src import invoker
+from src.invoker import CrawlerInvoker, TokenBucket
+
+
+class FakeClock:
+    """Replaces the time module of the invoker and of backoff, sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeLambdaClient:
+    """
+    Records the invocations and the time they were made at. The invocations of a pack starting
+    with a link of `errors` raise the error codes listed for the link, one per attempt.
+    """
+
+    def __init__(self, clock: FakeClock, errors: dict = None):
+        self.clock = clock
+        self.errors = errors or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def invoke(self, FunctionName: str, InvocationType: str, Payload: str) -> dict:
+        links = json.loads(Payload)["links"]
+        with self._lock:
+            self.calls.append({"function": FunctionName, "type": InvocationType, "links": links, "at": self.clock.now})
+            request_id = f"request-{len(self.calls)}"
+
+            codes = self.errors.get(links[0])
+            if codes:
+                raise ClientError({"Error": {"Code": codes.pop(0)}}, "Invoke")
+
+        return {"ResponseMetadata": {"RequestId": request_id}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(invoker, "time", clock)
+    monkeypatch.setattr(backoff._sync, "time", clock)
+    return clock
+
+
+def _invoker(client, **kwargs) -> CrawlerInvoker:
+    options = {"max_in_flight": 1, "rate_per_domain": 1000, "burst": 10, **kwargs}
+    return CrawlerInvoker(client, "crawler", **options)
+
+
+def test_links_are_packed_round_robin_over_their_domains(clock):
+    client = FakeLambdaClient(clock)
+    links = [
+        "https://www.instagram.com/a/",
+        "https://www.instagram.com/b/",
+        "https://www.instagram.com/c/",
+        "https://www.tiktok.com/d/",
+        "https://www.tiktok.com/e/",
+        "https://www.facebook.com/f/",
+        "https://www.instagram.com/a/",
+    ]
+
+    invocations = _invoker(client, links_per_invocation=2).invoke_all(links)
+
+    packs = [
+        ["https://www.instagram.com/a/", "https://www.tiktok.com/d/"],
+        ["https://www.facebook.com/f/", "https://www.instagram.com/b/"],
+        ["https://www.tiktok.com/e/", "https://www.instagram.com/c/"],
+    ]
+    assert list(invocations.values()) == packs
+    assert [call["links"] for call in client.calls] == packs
+    assert {(call["function"], call["type"]) for call in client.calls} == {("crawler", "Event")}
+
+
+def test_links_of_a_domain_are_paced_by_its_bucket(clock):
+    client = FakeLambdaClient(clock)
+    links = [
+        "https://www.instagram.com/a/",
+        "https://www.instagram.com/b/",
+        "https://www.instagram.com/c/",
+        "https://www.tiktok.com/d/",
+    ]
+
+    _invoker(client, rate_per_domain=0.5, burst=1).invoke_all(links)
+
+    assert [(call["links"][0], call["at"]) for call in client.calls] == [
+        ("https://www.instagram.com/a/", 0.0),
+        ("https://www.tiktok.com/d/", 0.0),
+        ("https://www.instagram.com/b/", 2.0),
+        ("https://www.instagram.com/c/", 4.0),
+    ]
+
+
+def test_the_rate_limits_invocations_not_links(clock):
+    client = FakeLambdaClient(clock)
+    links = [f"https://www.instagram.com/{name}/" for name in "abcdef"] + ["https://www.tiktok.com/g/"]
+
+    _invoker(client, rate_per_domain=0.5, burst=1, links_per_invocation=3).invoke_all(links)
+
+    # Each invocation takes one token of every domain it carries links of.
+    assert [(len(call["links"]), call["at"]) for call in client.calls] == [(3, 0.0), (3, 2.0), (1, 4.0)]
+
+
+def test_bucket_allows_bursts_then_the_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 0
+
+    bucket.acquire()
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_failed_invocations_are_left_out_without_retries(clock):
+    client = FakeLambdaClient(clock, errors={"https://www.tiktok.com/d/": ["ResourceNotFoundException"]})
+    links = ["https://www.instagram.com/a/", "https://www.tiktok.com/d/"]
+
+    invocations = _invoker(client).invoke_all(links)
+
+    assert list(invocations.values()) == [["https://www.instagram.com/a/"]]
+    assert len(client.calls) == 2
+
+
+def test_throttled_invocations_are_retried(clock):
+    client = FakeLambdaClient(
+        clock, errors={"https://www.instagram.com/a/": ["TooManyRequestsException", "TooManyRequestsException"]}
+    )
+
+    invocations = _invoker(client).invoke_all(["https://www.instagram.com/a/"])
+
+    assert list(invocations.values()) == [["https://www.instagram.com/a/"]]
+    assert len(client.calls) == 3
+    assert clock.now > 0
+
+
+def test_invocations_throttled_past_the_retries_are_left_out(clock):
+    client = FakeLambdaClient(clock, errors={"https://www.instagram.com/a/": ["TooManyRequestsException"] * 5})
+
+    invocations = _invoker(client, max_retries=3).invoke_all(["https://www.instagram.com/a/"])
+
+    assert invocations == {}
+    assert len(client.calls) == 3
@@ -0,0 +1,114 @@
+"""
+    This module contains tests for the adaptive limiter of the OpenAI requests, defined in src.limiter.
+"""
+
+import time
+
+import pytest
+
+from src.limiter import AdaptiveLimiter, parse_duration
+
+# The waits of the limiter are real, short enough to keep the tests fast.
+WAIT = 0.1
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("20ms", 0.02), ("1s", 1), ("6m0s", 360), ("1h2m3.5s", 3723.5), ("0s", 0)],
+)
+def test_durations_of_the_rate_limit_headers_are_parsed(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "1x", "1s later"])
+def test_malformed_durations_are_ignored(value):
+    assert parse_duration(value) is None
+
+
+def _elapsed(acquire) -> float:
+    started = time.monotonic()
+    acquire()
+    return time.monotonic() - started
+
+
+def test_concurrency_is_halved_once_per_burst_of_rate_limited_requests():
+    limiter = AdaptiveLimiter(max_concurrency=8)
+    first, second = limiter.acquire(), limiter.acquire()
+
+    limiter.release(first, {"retry-after-ms": "0"}, throttled=True)
+    assert limiter.limit == 4
+
+    # Started before the decrease, it was rate limited by the same burst.
+    limiter.release(second, {"retry-after-ms": "0"}, throttled=True)
+    assert limiter.limit == 4
+
+    limiter.release(limiter.acquire(), {"retry-after-ms": "0"}, throttled=True)
+    assert limiter.limit == 2
+
+
+def test_concurrency_never_drops_below_the_minimum():
+    limiter = AdaptiveLimiter(max_concurrency=4, min_concurrency=2)
+
+    for _ in range(3):
+        limiter.release(limiter.acquire(), {"retry-after-ms": "0"}, throttled=True)
+
+    assert limiter.limit == 2
+
+
+def test_concurrency_grows_back_with_successful_requests():
+    limiter = AdaptiveLimiter(max_concurrency=10)
+    limiter.release(limiter.acquire(), {"retry-after-ms": "0"}, throttled=True)
+    assert limiter.limit == 5
+
+    # About one more request in flight every `limit` successful requests.
+    for _ in range(6):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 6
+
+    for _ in range(100):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 10
+
+
+def test_requests_wait_for_the_reset_of_an_exhausted_requests_window():
+    limiter = AdaptiveLimiter(max_concurrency=10)
+    limiter.release(
+        limiter.acquire(),
+        {"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": f"{WAIT}s"},
+    )
+
+    assert _elapsed(limiter.acquire) < WAIT
+    assert _elapsed(limiter.acquire) >= WAIT * 0.9
+
+
+def test_requests_that_dont_fit_the_remaining_tokens_wait_for_the_reset():
+    limiter = AdaptiveLimiter(max_concurrency=10)
+    limiter.release(
+        limiter.acquire(),
+        {"x-ratelimit-remaining-tokens": "500", "x-ratelimit-reset-tokens": f"{int(WAIT * 1000)}ms"},
+    )
+
+    assert _elapsed(lambda: limiter.acquire(tokens=400)) < WAIT
+    assert _elapsed(lambda: limiter.acquire(tokens=400)) >= WAIT * 0.9
+
+
+def test_windows_without_a_reset_are_not_tracked():
+    limiter = AdaptiveLimiter(max_concurrency=10)
+    limiter.release(limiter.acquire(), {"x-ratelimit-remaining-requests": "0"})
+
+    assert _elapsed(limiter.acquire) < WAIT
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"retry-after-ms": str(int(WAIT * 1000))},
+        {"retry-after": str(WAIT)},
+        {"x-ratelimit-reset-requests": f"{int(WAIT * 1000)}ms", "x-ratelimit-reset-tokens": "6m0s"},
+    ],
+)
+def test_a_rate_limited_request_pauses_every_request(headers):
+    limiter = AdaptiveLimiter(max_concurrency=10)
+    limiter.release(limiter.acquire(), headers, throttled=True)
+
+    assert _elapsed(limiter.acquire) >= WAIT * 0.9
@@ -0,0 +1,86 @@
+"""
+    This module contains tests for the reduce stage of the batch reports, defined in src.reports.
+"""
+
+from src.reports import REPORT_NAME, merge_reports, parse_report, reduce_reports
+from src.schemas import FieldProfiles, InformationProfiles, ReportProfiles
+
+
+def _entry(link: str, information: str = "Free fries on Friday", name: str = "mcdonalds") -> InformationProfiles:
+    return InformationProfiles(name=name, information=information, link=link, city="Bucharest")
+
+
+def _report(**fields) -> ReportProfiles:
+    return ReportProfiles(
+        name=REPORT_NAME,
+        fields=[FieldProfiles(name=name, keys=entries) for name, entries in fields.items()],
+    )
+
+
+def _no_conflicts(field, entries):
+    raise AssertionError(f"Unexpected conflict on {field}: {entries}")
+
+
+def _by_field(report: ReportProfiles) -> dict:
+    return {field.name: [entry.link for entry in field.keys] for field in report.fields}
+
+
+def test_disjoint_fields_are_merged():
+    deals = _entry("https://www.instagram.com/p/1/")
+    events = _entry("https://www.instagram.com/p/2/", information="Live music on Saturday")
+
+    report = merge_reports([_report(Deals=[deals]), _report(Events=[events])], _no_conflicts)
+
+    assert report.name == REPORT_NAME
+    assert report.fields == [
+        FieldProfiles(name="Deals", keys=[deals]),
+        FieldProfiles(name="Events", keys=[events]),
+    ]
+
+
+def test_fields_of_the_same_name_are_merged_and_their_entries_deduplicated():
+    first = _entry("https://www.instagram.com/p/1/")
+    second = _entry("https://www.instagram.com/p/2/")
+    # The same entry, up to the case and the whitespace.
+    repeated = _entry(" https://www.instagram.com/p/1/", information="free  fries on friday")
+
+    report = merge_reports([_report(Deals=[first]), _report(**{"deals ": [repeated, second]})], _no_conflicts)
+
+    assert _by_field(report) == {"Deals": ["https://www.instagram.com/p/1/", "https://www.instagram.com/p/2/"]}
+
+
+def test_conflicting_entries_are_resolved():
+    link = "https://www.instagram.com/p/1/"
+    first, second = _entry(link), _entry(link, information="Free fries all weekend")
+    resolved = _entry(link, information="Free fries on Friday and all weekend")
+    conflicts = []
+
+    def resolve_conflict(field, entries):
+        conflicts.append((field, entries))
+        return resolved
+
+    report = merge_reports([_report(Deals=[first]), _report(Deals=[second])], resolve_conflict)
+
+    assert conflicts == [("Deals", [first, second])]
+    assert report.fields == [FieldProfiles(name="Deals", keys=[resolved])]
+
+
+def test_responses_are_parsed_with_or_without_a_code_fence():
+    report = _report(Deals=[_entry("https://www.instagram.com/p/1/")])
+
+    assert parse_report(report.model_dump_json()) == report
+    assert parse_report(f"```json\n{report.model_dump_json()}\n```") == report
+
+
+def test_responses_that_dont_follow_the_schema_are_dropped():
+    deals = _entry("https://www.instagram.com/p/1/")
+    responses = ['{"name": "report"}', "Sorry, I can't help with that.", _report(Deals=[deals]).model_dump_json()]
+
+    report = reduce_reports(responses, _no_conflicts)
+
+    assert report.fields == [FieldProfiles(name="Deals", keys=[deals])]
+
+
+def test_no_report_when_every_response_fails_to_parse():
+    assert reduce_reports(['{"name": "report"}', "not json"], _no_conflicts) is None
+    assert reduce_reports([], _no_conflicts) is None
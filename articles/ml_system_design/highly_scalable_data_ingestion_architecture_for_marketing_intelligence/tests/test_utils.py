@@ -0,0 +1,84 @@
+"""
+    This module contains tests for the completion records of the crawlers, and the wait of the
+    scheduler for them, defined in src.utils.
+"""
+
+import pytest
+
+from src import utils
+from src.utils import record_completion, wait_for_completions
+
+
+class FakeClock:
+    """
+    Replaces the time module of src.utils, sleeping only advances the clock. The crawlers of
+    `completions` record their completion once the clock reaches the given time.
+    """
+
+    def __init__(self, completions: dict = None):
+        self.now = 0.0
+        self.sleeps = []
+        self.completions = dict(completions or {})
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+        for correlation_id, at in list(self.completions.items()):
+            if at <= self.now:
+                _complete(correlation_id)
+                del self.completions[correlation_id]
+
+
+def _complete(correlation_id: str, status: str = "succeeded", unfinished: list = None) -> None:
+    link = f"https://www.instagram.com/{correlation_id}/"
+    record_completion(correlation_id, [link], status, 1, 2.0, results=[{"link": link}], unfinished=unfinished)
+
+
+@pytest.fixture(autouse=True)
+def crawler_runs():
+    utils.database.drop_collection("crawler_runs")
+    return utils.database.crawler_runs
+
+
+def _clock(monkeypatch, completions: dict = None) -> FakeClock:
+    clock = FakeClock(completions)
+    monkeypatch.setattr(utils, "time", clock)
+    return clock
+
+
+def test_the_wait_ends_once_every_crawler_completed(monkeypatch):
+    _complete("first")
+    clock = _clock(monkeypatch, {"second": 5, "third": 12})
+
+    completions = wait_for_completions(["first", "second", "third"], timeout=60, poll_interval=5)
+
+    assert sorted(completions) == ["first", "second", "third"]
+    assert completions["second"]["links"] == ["https://www.instagram.com/second/"]
+    assert "_id" not in completions["first"]
+    assert clock.sleeps == [5, 5, 5]
+
+
+def test_the_wait_times_out_with_the_crawlers_that_completed(monkeypatch):
+    clock = _clock(monkeypatch, {"first": 5, "late": 100})
+
+    completions = wait_for_completions(["first", "late", "lost"], timeout=12, poll_interval=5)
+
+    assert list(completions) == ["first"]
+    # The last sleep is cut to the time left before the timeout.
+    assert clock.sleeps == [5, 5, 2]
+    assert clock.now == 12
+
+
+def test_the_record_of_the_last_attempt_wins(monkeypatch, crawler_runs):
+    _clock(monkeypatch)
+    _complete("retried", status="partial", unfinished=["https://www.instagram.com/retried/"])
+    _complete("retried")
+
+    completions = wait_for_completions(["retried"], timeout=60, poll_interval=5)
+
+    assert crawler_runs.count_documents({"correlation_id": "retried"}) == 1
+    assert completions["retried"]["status"] == "succeeded"
+    assert completions["retried"]["unfinished"] == []
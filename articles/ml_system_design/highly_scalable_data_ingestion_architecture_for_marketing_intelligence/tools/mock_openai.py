@@ -0,0 +1,129 @@
+"""
+Local stand-in for the OpenAI chat completions API, to exercise the report generation and its
+rate limiting without spending quota. It enforces requests and tokens per minute like the API,
+answers with the same x-ratelimit-* headers, and with 429 errors once a limit is exceeded.
+
+    python tools/mock_openai.py --port 8010 --rpm 60 --tpm 40000 --latency 2
+    OPENAI_BASE_URL=http://host.docker.internal:8010/v1 OPENAI_API_KEY=mock ...
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WINDOW = 60.0
+
+COMPLETION = json.dumps({"name": "RESTAURANT EVENTS REPORT", "fields": []})
+
+
+class RateLimits:
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = []
+        self._lock = threading.Lock()
+
+    def consume(self, tokens: int) -> tuple[bool, dict]:
+        """
+        :returns: whether the request fits in the limits of the last minute, and the rate limit headers
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._requests = [(at, used) for at, used in self._requests if now - at < WINDOW]
+
+            used_tokens = sum(used for _, used in self._requests)
+            allowed = len(self._requests) < self.rpm and used_tokens + tokens <= self.tpm
+            if allowed:
+                self._requests.append((now, tokens))
+                used_tokens += tokens
+
+            oldest = self._requests[0][0] if self._requests else now
+            reset = f"{max(0.0, WINDOW - (now - oldest)):.3f}s"
+            headers = {
+                "x-ratelimit-limit-requests": str(self.rpm),
+                "x-ratelimit-limit-tokens": str(self.tpm),
+                "x-ratelimit-remaining-requests": str(max(0, self.rpm - len(self._requests))),
+                "x-ratelimit-remaining-tokens": str(max(0, self.tpm - used_tokens)),
+                "x-ratelimit-reset-requests": reset,
+                "x-ratelimit-reset-tokens": reset,
+            }
+            if not allowed:
+                headers["retry-after-ms"] = str(int(max(0.0, WINDOW - (now - oldest)) * 1000))
+
+            return allowed, headers
+
+
+class Handler(BaseHTTPRequestHandler):
+    limits: RateLimits
+    latency: float
+    completion_tokens: int
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            return self._reply(404, {"error": {"message": f"Unknown path {self.path}"}}, {})
+
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt_tokens = sum(len(message["content"]) // 4 for message in request["messages"])
+
+        allowed, headers = self.limits.consume(prompt_tokens + self.completion_tokens)
+        if not allowed:
+            error = {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+            return self._reply(429, {"error": error}, headers)
+
+        time.sleep(self.latency)
+        self._reply(
+            200,
+            {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": COMPLETION},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": self.completion_tokens,
+                    "total_tokens": prompt_tokens + self.completion_tokens,
+                },
+            },
+            headers,
+        )
+
+    def _reply(self, status: int, body: dict, headers: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--rpm", type=int, default=60, help="Requests per minute.")
+    parser.add_argument("--tpm", type=int, default=40000, help="Tokens per minute.")
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds per completion.")
+    parser.add_argument("--completion-tokens", type=int, default=500)
+    args = parser.parse_args()
+
+    Handler.limits = RateLimits(args.rpm, args.tpm)
+    Handler.latency = args.latency
+    Handler.completion_tokens = args.completion_tokens
+
+    print(f"Mock OpenAI API on http://localhost:{args.port}/v1 ({args.rpm} RPM, {args.tpm} TPM)")
+    ThreadingHTTPServer(("", args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
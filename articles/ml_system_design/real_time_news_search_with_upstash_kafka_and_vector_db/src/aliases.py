@@ -0,0 +1,83 @@
+"""
+    Versioned namespaces of the Upstash Vector index and the read alias pointing to one of them.
+        - IndexVersion: A namespace together with the embedding model its vectors were made with.
+        - IndexAlias: Resolves/switches the version served under an alias name, e.g. "news".
+
+    The alias is a single record of the ALIAS_NAMESPACE namespace, whose metadata is the IndexVersion,
+    so that switching it is one (atomic) upsert and readers never see a half-switched state.
+"""
+
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from upstash_vector import Index, Vector
+
+from embeddings import TextEmbedder
+from settings import settings
+
+ALIAS_NAMESPACE = "__aliases__"
+
+
+class IndexVersion(BaseModel):
+    namespace: str
+    model_id: str = settings.EMBEDDING_MODEL_ID
+    max_input_length: int = settings.EMBEDDING_MODEL_MAX_INPUT_LENGTH
+    pooling: str = settings.EMBEDDING_MODEL_POOLING
+    normalize: bool = settings.EMBEDDING_MODEL_NORMALIZE
+
+    def build_embedder(self) -> TextEmbedder:
+        """The embedder producing vectors compatible with this version (e.g. for the queries)."""
+        return TextEmbedder(
+            model_id=self.model_id,
+            max_input_length=self.max_input_length,
+            pooling=self.pooling,
+            normalize=self.normalize,
+        )
+
+
+class IndexAlias:
+    """
+    Args:
+        index (Index): The Upstash Vector index.
+        name (str): The alias name.
+    """
+
+    def __init__(self, index: Index, name: str = settings.UPSTASH_VECTOR_READ_ALIAS):
+        self._index = index
+        self._name = name
+
+    def resolve(self) -> Optional[IndexVersion]:
+        """The version served under the alias, None if the alias was never switched."""
+        records = self._index.fetch(
+            ids=[self._name], include_metadata=True, namespace=ALIAS_NAMESPACE
+        )
+        if not records or records[0] is None:
+            return None
+        return IndexVersion(**records[0].metadata)
+
+    def resolve_or_default(self) -> IndexVersion:
+        """
+        The version served under the alias or, before the first switch, the namespace the
+        pipeline writes to with the current embedding settings.
+        """
+        return self.resolve() or IndexVersion(
+            namespace=settings.UPSTASH_VECTOR_NAMESPACE
+        )
+
+    def switch(self, version: IndexVersion) -> None:
+        """Atomically serve `version` under the alias."""
+        # Every record needs a vector of the index dimension, the alias' one is never queried.
+        dimension = self._index.info().dimension
+        metadata = version.model_dump()
+        metadata["switched_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._index.upsert(
+            vectors=[
+                Vector(
+                    id=self._name,
+                    vector=[1.0] + [0.0] * (dimension - 1),
+                    metadata=metadata,
+                )
+            ],
+            namespace=ALIAS_NAMESPACE,
+        )
@@ -0,0 +1,287 @@
+"""
+    Local throughput harness for the `news-to-upstash` dataflow.
+        - LoadGenerator: Synthesizes CommonDocument batches and produces them at a target rate.
+        - ThroughputSink: Bytewax sink that counts the documents reaching the end of the flow.
+        - Benchmark: Fire CLI wiring a LocalBroker, the load generator and the dataflow together.
+
+    Usage:
+        poetry run python -m src.benchmark run --messages=200 --rate=20 --partitions=3
+        poetry run python -m src.benchmark generate --messages=500 --path=data/bench
+        poetry run python -m src.benchmark replay --path=data/bench
+        poetry run python -m src.benchmark cleaning --documents=5000
+"""
+
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import fire
+from dateutil import parser
+from bytewax.outputs import DynamicSink, StatelessSinkPartition
+from bytewax.testing import run_main
+from faker import Faker
+from unstructured.cleaners.core import (
+    clean,
+    clean_non_ascii_chars,
+    remove_punctuation,
+    replace_unicode_quotes,
+)
+
+from cleaners import clean_full, parse_date
+from flow import build as build_flow
+from local_kafka import (
+    LocalBroker,
+    LocalKafkaProducer,
+    LocalKafkaSink,
+    LocalKafkaSource,
+)
+from logger import get_logger
+from models import CommonDocument, EmbeddedDocument
+from settings import settings
+from wire import build_value_serializer
+
+logger = get_logger(__name__)
+
+
+class LoadGenerator:
+    """
+    Produces synthetic news batches to a Kafka topic at a fixed rate.
+
+    Every message mirrors what a KafkaProducerThread sends: a list of CommonDocument payloads.
+
+    Attributes:
+        producer: A `KafkaProducer` or `LocalKafkaProducer` instance.
+        topic (str): The topic to produce to.
+        rate (float): Target number of messages per second.
+        batch_size (int): Number of documents per message.
+    """
+
+    def __init__(
+        self,
+        producer,
+        topic: str,
+        rate: float = 10.0,
+        batch_size: int = settings.ARTICLES_BATCH_SIZE,
+        seed: Optional[int] = None,
+    ):
+        self.producer = producer
+        self.topic = topic
+        self.rate = rate
+        self.batch_size = batch_size
+        self._fake = Faker()
+        if seed is not None:
+            self._fake.seed_instance(seed)
+
+    def make_payload(self) -> dict:
+        """A raw (not yet cleaned) article, as returned by the news APIs."""
+        return dict(
+            title=self._fake.sentence(nb_words=10),
+            url=self._fake.url() + self._fake.uri_path(),
+            published_at=self._fake.date_time_this_month().isoformat(),
+            source_name=self._fake.company(),
+            image_url=self._fake.image_url(),
+            author=self._fake.name(),
+            description=self._fake.paragraph(nb_sentences=5),
+            content=self._fake.text(max_nb_chars=1000),
+        )
+
+    def make_document(self) -> CommonDocument:
+        return CommonDocument(**self.make_payload())
+
+    def make_batch(self) -> List[CommonDocument]:
+        return [self.make_document() for _ in range(self.batch_size)]
+
+    def run(self, messages: int) -> int:
+        """Produces `messages` messages, pacing them to the target rate. Returns the count sent."""
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        started = time.perf_counter()
+        for i in range(messages):
+            batch = [doc.to_kafka_payload() for doc in self.make_batch()]
+            self.producer.send(self.topic, value=batch)
+
+            delay = started + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.producer.flush()
+        return messages
+
+
+class _ThroughputSinkPartition(StatelessSinkPartition[EmbeddedDocument]):
+    def __init__(self, sink: "ThroughputSink"):
+        self._sink = sink
+
+    def write_batch(self, items: List[EmbeddedDocument]) -> None:
+        self._sink.record(len(items))
+
+
+class ThroughputSink(DynamicSink[EmbeddedDocument]):
+    """Counts the documents written by the dataflow."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, count: int) -> None:
+        with self._lock:
+            self.count += count
+
+    def build(
+        self, step_id: str, worker_index: int, worker_count: int
+    ) -> _ThroughputSinkPartition:
+        return _ThroughputSinkPartition(self)
+
+
+class Benchmark:
+    def run(
+        self,
+        messages: int = 100,
+        rate: float = 10.0,
+        batch_size: int = settings.ARTICLES_BATCH_SIZE,
+        partitions: int = 1,
+        path: Optional[str] = None,
+        lag_interval: float = 0.5,
+    ) -> dict:
+        """
+        Produces `messages` messages at `rate` msgs/sec while the dataflow consumes them,
+        then reports the end-to-end throughput and the consumer lag.
+        """
+        broker = LocalBroker(num_partitions=partitions, path=Path(path) if path else None)
+        topic = broker.topic(settings.UPSTASH_KAFKA_TOPIC)
+        generator = LoadGenerator(
+            producer=_local_producer(broker), topic=topic.name, rate=rate, batch_size=batch_size
+        )
+
+        def produce():
+            generator.run(messages)
+            topic.seal()
+
+        producer_thread = threading.Thread(target=produce, daemon=True)
+        return self._measure(broker, producer_thread, lag_interval)
+
+    def generate(
+        self,
+        path: str,
+        messages: int = 100,
+        batch_size: int = settings.ARTICLES_BATCH_SIZE,
+        partitions: int = 1,
+    ) -> None:
+        """Writes `messages` synthetic messages to a file-backed topic for later replays."""
+        broker = LocalBroker(num_partitions=partitions, path=Path(path))
+        generator = LoadGenerator(
+            producer=_local_producer(broker),
+            topic=settings.UPSTASH_KAFKA_TOPIC,
+            rate=0,
+            batch_size=batch_size,
+        )
+        generator.run(messages)
+        logger.info(f"Generated {messages} messages into {path}.")
+
+    def replay(self, path: str, partitions: int = 1, lag_interval: float = 0.5) -> dict:
+        """Pushes a file-backed topic through the dataflow as fast as it can consume it."""
+        broker = LocalBroker(num_partitions=partitions, path=Path(path))
+        broker.topic(settings.UPSTASH_KAFKA_TOPIC).seal()
+        return self._measure(broker, None, lag_interval)
+
+    def cleaning(self, documents: int = 2000) -> dict:
+        """
+        Reports the documents/sec of CommonDocument.from_json, and the throughput of clean_full
+        and parse_date against the `unstructured` cleaners and `dateutil` parser they replace.
+        """
+        generator = LoadGenerator(producer=None, topic="", seed=0)
+        payloads = [generator.make_payload() for _ in range(documents)]
+        texts = [
+            payload[field]
+            for payload in payloads
+            for field in ("title", "description", "content")
+        ]
+        dates = [payload["published_at"] for payload in payloads]
+
+        def per_sec(function, items) -> float:
+            started = time.perf_counter()
+            for item in items:
+                function(item)
+            return round(len(items) / (time.perf_counter() - started), 2)
+
+        report = {
+            "documents": documents,
+            "from_json_docs_per_sec": per_sec(CommonDocument.from_json, payloads),
+            "clean_full_texts_per_sec": per_sec(clean_full, texts),
+            "unstructured_texts_per_sec": per_sec(_unstructured_clean_full, texts),
+            "parse_date_dates_per_sec": per_sec(parse_date, dates),
+            "dateutil_dates_per_sec": per_sec(parser.parse, dates),
+        }
+        logger.info(f"Cleaning benchmark report: {report}")
+        return report
+
+    @staticmethod
+    def _measure(
+        broker: LocalBroker,
+        producer_thread: Optional[threading.Thread],
+        lag_interval: float,
+    ) -> dict:
+        topic = broker.topic(settings.UPSTASH_KAFKA_TOPIC)
+        sink = ThroughputSink()
+        dead_letters = broker.topic(f"{topic.name}-dead-letters")
+        flow = build_flow(
+            source=LocalKafkaSource(broker, [topic.name]),
+            sink=sink,
+            dead_letter_sink=LocalKafkaSink(broker, dead_letters.name),
+        )
+
+        lag_samples = []
+        done = threading.Event()
+
+        def sample_lag():
+            while not done.wait(lag_interval):
+                lag_samples.append(topic.lag())
+
+        lag_thread = threading.Thread(target=sample_lag, daemon=True)
+
+        started = time.perf_counter()
+        lag_thread.start()
+        if producer_thread:
+            producer_thread.start()
+        run_main(flow)
+        elapsed = time.perf_counter() - started
+        done.set()
+
+        consumed = sum(
+            topic.end_offset(partition) for partition in range(topic.num_partitions)
+        )
+        report = {
+            "messages": consumed,
+            "documents": sink.count,
+            "dead_letters": sum(
+                dead_letters.end_offset(partition)
+                for partition in range(dead_letters.num_partitions)
+            ),
+            "elapsed_sec": round(elapsed, 3),
+            "messages_per_sec": round(consumed / elapsed, 2),
+            "documents_per_sec": round(sink.count / elapsed, 2),
+            "max_lag": max(lag_samples, default=0),
+            "mean_lag": round(statistics.mean(lag_samples), 2) if lag_samples else 0,
+        }
+        logger.info(f"Benchmark report: {report}")
+        return report
+
+
+def _unstructured_clean_full(text: str) -> str:
+    """clean_full as it was implemented with the `unstructured` cleaners."""
+    text = clean(text=text, lowercase=True, extra_whitespace=True, dashes=True, bullets=True)
+    text = replace_unicode_quotes(text)
+    text = clean_non_ascii_chars(text)
+    return remove_punctuation(text)
+
+
+def _local_producer(broker: LocalBroker) -> LocalKafkaProducer:
+    return LocalKafkaProducer(broker, value_serializer=build_value_serializer())
+
+
+def main():
+    fire.Fire(Benchmark)
+
+
+if __name__ == "__main__":
+    main()
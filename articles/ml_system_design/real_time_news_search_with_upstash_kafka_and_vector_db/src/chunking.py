@@ -0,0 +1,44 @@
+"""
+    Token-aware chunking of refined documents.
+    The text is tokenized once; chunks are windows over its token ids (with overlap), and each
+    chunk keeps its token ids so the embedding model doesn't have to tokenize it again.
+"""
+
+from typing import List, NamedTuple
+
+from transformers import PreTrainedTokenizerBase
+
+
+class TokenChunk(NamedTuple):
+    text: str
+    token_ids: List[int]
+
+
+def chunk_by_tokens(
+    text: str,
+    tokenizer: PreTrainedTokenizerBase,
+    max_tokens: int,
+    overlap: int = 0,
+) -> List[TokenChunk]:
+    """
+    Split `text` into chunks of at most `max_tokens` tokens (special tokens excluded),
+    consecutive chunks sharing `overlap` tokens. Requires a fast tokenizer for the offsets.
+    """
+    if overlap >= max_tokens:
+        raise ValueError(f"overlap ({overlap}) must be smaller than max_tokens ({max_tokens})")
+
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    token_ids, offsets = encoding["input_ids"], encoding["offset_mapping"]
+
+    chunks = []
+    for start in range(0, len(token_ids), max_tokens - overlap):
+        end = min(start + max_tokens, len(token_ids))
+        chunks.append(
+            TokenChunk(
+                text=text[offsets[start][0] : offsets[end - 1][1]],
+                token_ids=token_ids[start:end],
+            )
+        )
+        if end == len(token_ids):
+            break
+    return chunks
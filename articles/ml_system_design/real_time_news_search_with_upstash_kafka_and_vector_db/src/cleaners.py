@@ -1,11 +1,21 @@
-from unstructured.cleaners.core import (
-    clean,
-    clean_non_ascii_chars,
-    replace_unicode_quotes,
-    remove_punctuation,
-    clean_ordered_bullets,
-)
+import datetime
 import re
+from typing import Optional
+
+from dateutil import parser
+
+# Precompiled equivalents of the `unstructured` cleaners used by clean_full.
+# Dashes become spaces, and newlines/non-breaking spaces become spaces as well.
+SPACES_TABLE = str.maketrans({"-": " ", "\u2013": " ", "\xa0": " ", "\n": " "})
+MULTIPLE_SPACES_PATTERN = re.compile(r"[ ]{2,}")
+BULLETS = "\x95•‣⁃ㅤ⁌⁍∙○●◘◦☙❥❧⦾⦿\uf0b7*·"
+LEADING_BULLET_PATTERN = re.compile(f"[{re.escape(BULLETS)}](?![{re.escape(BULLETS)}])")
+# Once non-ASCII characters are dropped, only the ASCII part of the punctuation table matters.
+PUNCTUATION_TABLE = str.maketrans("", "", "!\"#%&'()*,-./:;?@[\\]_{}")
+ISO_DATE_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
 def standardize_dates(text, placeholder="[DATE]"):
@@ -38,16 +48,37 @@ def clean_full(text: str) -> str:
     - clean_non_ascii_chars (eg. non-ascii characters)
     - remove_punctuation (eg. punctuation)
 
+    The output is identical to chaining the `unstructured` cleaners of the same names, but uses
+    translate tables and precompiled patterns instead.
+
     Args:
         text (str): The text to be cleaned.
 
     Returns:
         str: The cleaned text.
     """
-    text = clean(
-        text=text, lowercase=True, extra_whitespace=True, dashes=True, bullets=True
-    )
-    text = replace_unicode_quotes(text)
-    text = clean_non_ascii_chars(text)
-    text = remove_punctuation(text)
-    return text
+    text = text.lower().translate(SPACES_TABLE).strip()
+    text = MULTIPLE_SPACES_PATTERN.sub(" ", text).strip()
+    if LEADING_BULLET_PATTERN.match(text):
+        text = text[1:].strip()
+    # Every other unicode quote replacement yields non-ASCII characters that are dropped next.
+    text = text.replace("&apos;", "'")
+    text = text.encode("ascii", "ignore").decode()
+    return text.translate(PUNCTUATION_TABLE)
+
+
+def parse_date(value: str) -> Optional[str]:
+    """
+    Format a date as "%Y-%m-%d %H:%M:%S", with the same result as `dateutil.parser.parse`
+    followed by `strftime` (the UTC offset is dropped, not applied). ISO-8601 dates take a
+    fast path; the rest go through dateutil. Returns None if the date can't be parsed.
+    """
+    match = ISO_DATE_PATTERN.fullmatch(value) if isinstance(value, str) else None
+    try:
+        if match:
+            parsed = datetime.datetime(*map(int, match.groups()))
+        else:
+            parsed = parser.parse(value)
+        return parsed.strftime(DATE_FORMAT)
+    except (ValueError, TypeError, OverflowError):
+        return None
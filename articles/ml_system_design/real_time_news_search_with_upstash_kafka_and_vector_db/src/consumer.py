@@ -1,54 +1,124 @@
 import json
-from typing import List
+from typing import List, Optional, Union
 
+import orjson
 from bytewax.connectors.kafka import KafkaSinkMessage, KafkaSource
+from confluent_kafka.admin import AdminClient
+from pydantic import ValidationError
 
 from logger import get_logger
-from models import CommonDocument
+from metrics import DEAD_LETTERS, DOCUMENTS_DECODED, MESSAGES_CONSUMED
+from models import CommonDocument, DeadLetter
 from settings import settings
+from wire import WireFormatError, decode_batch, is_wire_format, row_to_payload
 
 logger = get_logger(__name__)
 
 
-def build_kafka_stream_client():
+def build_kafka_config() -> dict:
     """
-    Build a Kafka stream client to read messages from the Upstash Kafka topic using the ByteWax KafkaSource connector.
+    Build the connection config shared by the Upstash Kafka consumers, producers and admin clients.
     """
-    kafka_config = {
+    return {
         "bootstrap.servers": settings.UPSTASH_KAFKA_ENDPOINT,
         "security.protocol": "SASL_SSL",
         "sasl.mechanisms": "SCRAM-SHA-256",
         "sasl.username": settings.UPSTASH_KAFKA_UNAME,
         "sasl.password": settings.UPSTASH_KAFKA_PASS,
-        "auto.offset.reset": "earliest",  # Start reading at the earliest message
     }
+
+
+def build_kafka_stream_client():
+    """
+    Build a Kafka stream client to read messages from the Upstash Kafka topic using the ByteWax KafkaSource connector.
+    Every topic partition becomes a Bytewax partition, so workers are assigned whole topic partitions.
+    """
     kafka_input = KafkaSource(
         topics=[settings.UPSTASH_KAFKA_TOPIC],
         brokers=[settings.UPSTASH_KAFKA_ENDPOINT],
-        add_config=kafka_config,
+        add_config={
+            **build_kafka_config(),
+            "auto.offset.reset": "earliest",  # Start reading at the earliest message
+        },
     )
     logger.info("KafkaSource client created successfully.")
     return kafka_input
 
 
-def process_message(message: KafkaSinkMessage):
+def get_topic_partition_count(timeout: float = 10.0) -> Optional[int]:
+    """
+    Fetch the number of partitions of the Upstash Kafka topic, or None if the metadata is unavailable.
+    """
+    try:
+        metadata = AdminClient(build_kafka_config()).list_topics(
+            topic=settings.UPSTASH_KAFKA_TOPIC, timeout=timeout
+        )
+        return len(metadata.topics[settings.UPSTASH_KAFKA_TOPIC].partitions)
+    except Exception as e:
+        logger.warning(f"Could not fetch partitions for the Kafka topic: {e}")
+        return None
+
+
+def process_message(
+    message: KafkaSinkMessage,
+) -> List[Union[CommonDocument, DeadLetter]]:
     """
     On a Kafka message, process the message and return a list of CommonDocuments.
     - message: KafkaSinkMessage(key, value) where value is the message payload.
+    Payloads in the binary wire format were cleaned by the producer, so with KAFKA_TRUSTED_DECODE
+    they are loaded without re-running the CommonDocument validators. Legacy JSON payloads are
+    always validated.
+    Malformed messages and documents failing validation are returned as DeadLetters instead of
+    raising, so the valid documents of the same batch keep flowing.
     """
-    documents: List[CommonDocument] = []
+    MESSAGES_CONSUMED.inc()
+    wire_format = is_wire_format(message.value)
+    trusted = wire_format and settings.KAFKA_TRUSTED_DECODE
     try:
-        json_str = message.value.decode("utf-8")
-        data = json.loads(json_str)
-        documents = [CommonDocument.from_json(obj) for obj in data]
-        logger.info(f"Decoded into {len(documents)} CommonDocuments")
-        return documents
-    except StopIteration:
-        logger.info("No more documents to fetch from the client.")
-    except KeyError as e:
-        logger.error(f"Key error in processing document batch: {e}")
+        if wire_format:
+            data = decode_batch(message.value)
+        else:
+            data = orjson.loads(message.value)
     except json.JSONDecodeError as e:
-        logger.error(f"Error decoding JSON from message: {e}")
-        raise
-    except Exception as e:
-        logger.exception(f"Unexpected error in next_batch: {e}")
+        logger.error(f"Error decoding JSON from message at offset {_message_offset(message)}: {e}")
+        return [_dead_letter(message, "malformed_json", e)]
+    except (WireFormatError, TypeError) as e:
+        logger.error(f"Error decoding message at offset {_message_offset(message)}: {e}")
+        return [_dead_letter(message, "malformed_payload", e)]
+
+    if not isinstance(data, list):
+        error = TypeError(f"Expected a list of documents, got {type(data).__name__}")
+        logger.error(f"Invalid batch at offset {_message_offset(message)}: {error}")
+        return [_dead_letter(message, "invalid_batch", error)]
+
+    results: List[Union[CommonDocument, DeadLetter]] = []
+    for index, obj in enumerate(data):
+        try:
+            payload = row_to_payload(obj) if wire_format else obj
+            if trusted:
+                results.append(CommonDocument.from_trusted(payload))
+            else:
+                results.append(CommonDocument.from_json(payload))
+        except (ValidationError, TypeError, WireFormatError) as e:
+            logger.error(
+                f"Invalid document #{index} at offset {_message_offset(message)}: {e}"
+            )
+            results.append(
+                _dead_letter(message, "invalid_document", e, payload=obj, index=index)
+            )
+
+    decoded = sum(isinstance(item, CommonDocument) for item in results)
+    DOCUMENTS_DECODED.inc(decoded)
+    logger.info(f"Decoded into {decoded} CommonDocuments")
+    return results
+
+
+def _message_offset(message: KafkaSinkMessage) -> str:
+    return f"{getattr(message, 'partition', None)}:{getattr(message, 'offset', None)}"
+
+
+def _dead_letter(
+    message: KafkaSinkMessage, reason: str, error: Exception, **kwargs
+) -> DeadLetter:
+    DEAD_LETTERS.labels(reason=reason).inc()
+    return DeadLetter.from_message(message, reason=reason, error=error, **kwargs)
@@ -0,0 +1,72 @@
+"""
+    Dead-letter outputs for messages the pipeline cannot decode.
+        - A Kafka topic, when settings.DEAD_LETTER_TOPIC is set.
+        - Otherwise, JSON lines files under settings.DEAD_LETTER_PATH (one per worker).
+"""
+
+from pathlib import Path
+from typing import List
+
+import orjson
+from bytewax.connectors.kafka import KafkaSink, KafkaSinkMessage
+from bytewax.outputs import DynamicSink, Sink, StatelessSinkPartition
+
+from consumer import build_kafka_config
+from logger import get_logger
+from models import DeadLetter
+from settings import settings
+
+logger = get_logger(__name__)
+
+
+def to_kafka_message(dead_letter: DeadLetter) -> KafkaSinkMessage[bytes, bytes]:
+    """Serialize a DeadLetter, keyed by its original topic, partition and offset."""
+    key = f"{dead_letter.topic}:{dead_letter.partition}:{dead_letter.offset}"
+    return KafkaSinkMessage(
+        key=key.encode("utf-8"),
+        value=orjson.dumps(dead_letter.to_kafka_payload()),
+    )
+
+
+class DeadLetterFileSink(DynamicSink[KafkaSinkMessage]):
+    """
+    Appends the dead-letter messages to `<directory>/dead_letters-<worker_index>.jsonl`.
+
+    Args:
+        directory (Path): The directory where the dead-letter files are written.
+    """
+
+    def __init__(self, directory: Path = Path(settings.DEAD_LETTER_PATH)):
+        self._directory = Path(directory)
+
+    def build(
+        self, step_id: str, worker_index: int, worker_count: int
+    ) -> "DeadLetterFilePartition":
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return DeadLetterFilePartition(
+            self._directory / f"dead_letters-{worker_index}.jsonl"
+        )
+
+
+class DeadLetterFilePartition(StatelessSinkPartition[KafkaSinkMessage]):
+    def __init__(self, path: Path):
+        self._file = path.open("ab")
+
+    def write_batch(self, items: List[KafkaSinkMessage]) -> None:
+        for message in items:
+            self._file.write(message.value + b"\n")
+        self._file.flush()
+        logger.warning(f"Wrote {len(items)} dead letters to {self._file.name}")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def build_dead_letter_sink() -> Sink:
+    if settings.DEAD_LETTER_TOPIC:
+        return KafkaSink(
+            brokers=[settings.UPSTASH_KAFKA_ENDPOINT],
+            topic=settings.DEAD_LETTER_TOPIC,
+            add_config=build_kafka_config(),
+        )
+    return DeadLetterFileSink()
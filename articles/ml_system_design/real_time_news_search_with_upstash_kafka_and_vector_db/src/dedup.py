@@ -0,0 +1,179 @@
+"""
+    Cross-source deduplication of news articles, applied before the chunk/embed/upsert stages.
+    An article is a duplicate of one seen within the last `ttl` seconds if either:
+        - its normalized URL is the same (tracking params, scheme, www. and fragments ignored), or
+        - the SimHash of its title and description is within `max_distance` bits.
+"""
+
+import hashlib
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from models import CommonDocument
+
+SIMHASH_BITS = 64
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "cmpid", "ref")
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """Normalize an article URL so the same story linked by different sources compares equal."""
+    if not url or url == "N/A":
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www.") :]
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/")
+    return urlunsplit(("", host, path, urlencode(query), ""))
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over the words and word bigrams of the text."""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        digest = int.from_bytes(
+            hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def fingerprint_of(document: CommonDocument) -> int:
+    """SimHash of the title and description of the article."""
+    return simhash(f"{document.title} {document.description or ''}")
+
+
+def band_value(fingerprint: int, band: int, bands: int) -> int:
+    """The bits of the `band`-th of `bands` equal bands of the fingerprint."""
+    band_bits = SIMHASH_BITS // bands
+    return fingerprint >> (band * band_bits) & ((1 << band_bits) - 1)
+
+
+def url_bucket(document: CommonDocument, buckets: int) -> int:
+    """A stable bucket of the normalized URL (or the article id if there is none)."""
+    key = normalize_url(document.url) or document.article_id
+    return zlib.crc32(key.encode("utf-8")) % buckets
+
+
+class DedupIndex:
+    """
+    A bounded, time-to-live index of recently seen articles.
+
+    Near-duplicate lookups use SimHash banding: the fingerprint is split into
+    `max_distance + 1` bands, and two fingerprints within `max_distance` bits necessarily share
+    one band, so only the articles of matching bands are compared.
+    The index is plain Python data, so it can be snapshotted as Bytewax state.
+
+    An index can be restricted to some of the bands and to the URLs, so that the articles can
+    be sharded over several indexes: one by URL, and one per band by band value. Two
+    near-duplicates share a band, so they meet in the index of that band.
+
+    Args:
+        ttl (float): Seconds after which an article is forgotten.
+        max_entries (int): Maximum number of articles kept, the oldest are evicted first.
+        max_distance (int): Maximum Hamming distance between near-duplicate SimHashes.
+        bands (Iterable[int]): The bands looked up and registered, all of them by default.
+        urls (bool): Whether to look up and register the normalized URLs.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        max_distance: int = 3,
+        bands: Optional[Iterable[int]] = None,
+        urls: bool = True,
+    ):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_distance = max_distance
+        self._bands = max_distance + 1
+        self._band_bits = SIMHASH_BITS // self._bands
+        self._indexed_bands = tuple(range(self._bands) if bands is None else bands)
+        self._urls = urls
+
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._by_url: Dict[str, str] = {}
+        self._by_band: Dict[Tuple[int, int], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def check(
+        self,
+        document: CommonDocument,
+        now: Optional[float] = None,
+        simhash_value: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Returns why the document is a duplicate ("article_id", "url" or "near_duplicate"),
+        or registers it and returns None if it's new. `simhash_value` is the precomputed
+        fingerprint of the document, if any.
+        """
+        now = time.time() if now is None else now
+        self._evict(now)
+
+        if document.article_id in self._entries:
+            return "article_id"
+
+        url = normalize_url(document.url) if self._urls else ""
+        if url and url in self._by_url:
+            return "url"
+
+        fingerprint = fingerprint_of(document) if simhash_value is None else simhash_value
+        bands = self._split(fingerprint)
+        for band in bands:
+            for entry_id in self._by_band.get(band, ()):
+                if hamming_distance(fingerprint, self._entries[entry_id][2]) <= self._max_distance:
+                    return "near_duplicate"
+
+        entry_id = document.article_id
+        self._entries[entry_id] = (now, url, fingerprint)
+        if url:
+            self._by_url[url] = entry_id
+        for band in bands:
+            self._by_band.setdefault(band, set()).add(entry_id)
+        return None
+
+    def _split(self, fingerprint: int) -> Tuple[Tuple[int, int], ...]:
+        return tuple(
+            (band, band_value(fingerprint, band, self._bands))
+            for band in self._indexed_bands
+        )
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            entry_id, (seen_at, url, fingerprint) = next(iter(self._entries.items()))
+            if now - seen_at <= self._ttl and len(self._entries) < self._max_entries:
+                break
+
+            del self._entries[entry_id]
+            if url and self._by_url.get(url) == entry_id:
+                del self._by_url[url]
+            for band in self._split(fingerprint):
+                entry_ids = self._by_band.get(band)
+                if entry_ids is not None:
+                    entry_ids.discard(entry_id)
+                    if not entry_ids:
+                        del self._by_band[band]
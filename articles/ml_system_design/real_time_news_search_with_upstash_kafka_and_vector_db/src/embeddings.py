@@ -2,14 +2,17 @@
     This module contains the `TextEmbedder` class, which is a Singleton class.
     The `TextEmbedder` class is responsible for tokenizing and generating embeddings
     based on a given input text using a pre-trained transformer model that is defined in settings.py.
+    The token embeddings are pooled (CLS token or attention-masked mean), optionally L2 normalized
+    so that the dot product equals the cosine similarity, and cast to the configured dtype.
 """
 
 import traceback
 from pathlib import Path
 from threading import Lock
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 import numpy as np
+import torch
 from transformers import AutoModel, AutoTokenizer
 
 from settings import settings
@@ -22,7 +25,8 @@ class SingletonMeta(type):
     """
     A thread-safe implementation of the Singleton pattern.
     Utilizes a class-level lock to ensure that only one instance
-    of the Singleton class can be created across threads.
+    of the Singleton class is created per set of constructor arguments, across threads.
+    E.g. the UI can hold the embedders of two index versions while switching between them.
     """
 
     _instances = {}
@@ -33,16 +37,17 @@ class SingletonMeta(type):
     def __call__(cls, *args, **kwargs):
         """
         Overrides the default __call__ method. Ensures that only one instance
-        of the Singleton class can be created (per subclass), regardless of
+        of the Singleton class can be created (per subclass and arguments), regardless of
         how many times it is called, and ensures thread safety.
         """
-        if cls not in cls._instances:
+        key = (cls, args, tuple(sorted(kwargs.items())))
+        if key not in cls._instances:
             with cls._lock:
                 # Double-check if the instance was created while this thread was waiting
                 # on the lock to ensure it doesn't create another Singleton instance.
-                if cls not in cls._instances:
-                    cls._instances[cls] = super().__call__(*args, **kwargs)
-        return cls._instances[cls]
+                if key not in cls._instances:
+                    cls._instances[key] = super().__call__(*args, **kwargs)
+        return cls._instances[key]
 
 
 class TextEmbedder(metaclass=SingletonMeta):
@@ -53,11 +58,20 @@ class TextEmbedder(metaclass=SingletonMeta):
         device: str = settings.EMBEDDING_MODEL_DEVICE,
         cache_dir: Optional[Path] = None,
         token_limit: int = 256,
+        pooling: str = settings.EMBEDDING_MODEL_POOLING,
+        normalize: bool = settings.EMBEDDING_MODEL_NORMALIZE,
+        dtype: str = settings.EMBEDDING_MODEL_DTYPE,
     ):
+        if pooling not in ("cls", "mean"):
+            raise ValueError(f"Unknown pooling mode: {pooling}")
+
         self._model_id = model_id
         self._device = device
         self._max_input_length = int(max_input_length)
         self._token_limit = token_limit
+        self._pooling = pooling
+        self._normalize = normalize
+        self._dtype = np.dtype(dtype)
 
         self._tokenizer = AutoTokenizer.from_pretrained(model_id)
         self._model = AutoModel.from_pretrained(
@@ -82,6 +96,10 @@ class TextEmbedder(metaclass=SingletonMeta):
     def tokenizer(self) -> AutoTokenizer:
         return self._tokenizer
 
+    @property
+    def embedding_size(self) -> int:
+        return self._model.config.hidden_size
+
     def __call__(
         self, input_text: str, to_list: bool = True
     ) -> Union[np.ndarray, list]:
@@ -99,18 +117,63 @@ class TextEmbedder(metaclass=SingletonMeta):
 
             return [] if to_list else np.array([])
 
+        return self._embed(tokenized_text, to_list=to_list)
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed `texts` in a single padded forward pass, one embedding per text."""
+        if not texts:
+            return []
+        embeddings = self(texts, to_list=False)
+        return embeddings.tolist() if len(embeddings) else []
+
+    def embed_token_ids(
+        self, token_ids: List[int], to_list: bool = True
+    ) -> Union[np.ndarray, list]:
+        """
+        Embed a text that was already tokenized (without special tokens) by `tokenizer`,
+        e.g. a chunk produced by `chunking.chunk_by_tokens`.
+        """
+        input_ids = self._tokenizer.build_inputs_with_special_tokens(
+            token_ids[: self._max_input_length - 2]
+        )
+        input_ids = torch.tensor([input_ids], device=self._device)
+        model_inputs = {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+        }
+        return self._embed(model_inputs, to_list=to_list)
+
+    def _embed(self, model_inputs, to_list: bool) -> Union[np.ndarray, list]:
         try:
-            result = self._model(**tokenized_text)
+            with torch.inference_mode():
+                result = self._model(**model_inputs)
+                embeddings = self._pool(
+                    result.last_hidden_state, model_inputs["attention_mask"]
+                )
         except Exception:
             logger.error(traceback.format_exc())
             logger.error(
-                f"Error generating embeddings for the following model_id: {self._model_id} and input text: {input_text}"
+                f"Error generating embeddings for the following model_id: {self._model_id}"
             )
 
             return [] if to_list else np.array([])
 
-        embeddings = result.last_hidden_state[:, 0, :].cpu().detach().numpy()
+        embeddings = embeddings.cpu().numpy().astype(self._dtype)
         if to_list:
             embeddings = embeddings.flatten().tolist()
 
         return embeddings
+
+    def _pool(
+        self, token_embeddings: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        if self._pooling == "cls":
+            embeddings = token_embeddings[:, 0, :]
+        else:
+            mask = attention_mask.unsqueeze(-1).to(token_embeddings.dtype)
+            embeddings = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(
+                min=1e-9
+            )
+        if self._normalize:
+            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+        return embeddings
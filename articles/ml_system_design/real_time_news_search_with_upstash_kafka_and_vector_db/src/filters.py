@@ -0,0 +1,61 @@
+"""
+    Metadata used to filter the news vector index on the server side, and the filters themselves.
+        - normalize_source_name: Canonical form of a source name, e.g. "The Verge" -> "the-verge".
+        - to_timestamp: `published_at` as a UTC unix timestamp, comparable in Upstash filters.
+        - build_filter: Builds an Upstash Vector metadata filter for a date window and sources.
+"""
+
+import datetime
+import re
+from typing import Iterable, Optional
+
+from dateutil import parser
+
+SOURCE_NAME_PATTERN = re.compile(r"[^a-z0-9]+")
+PUBLISHED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def normalize_source_name(name: Optional[str]) -> str:
+    if not name:
+        return "unknown"
+    return SOURCE_NAME_PATTERN.sub("-", name.lower()).strip("-") or "unknown"
+
+
+def to_timestamp(published_at: str) -> int:
+    """Convert a CommonDocument.published_at (UTC) into a unix timestamp."""
+    try:
+        parsed = datetime.datetime.strptime(published_at, PUBLISHED_AT_FORMAT)
+    except ValueError:
+        parsed = parser.parse(published_at)
+    return _utc_timestamp(parsed)
+
+
+def build_filter(
+    published_after: Optional[datetime.datetime] = None,
+    published_before: Optional[datetime.datetime] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> str:
+    """
+    Build an Upstash Vector metadata filter, e.g.:
+        published_at_ts >= 1710460800 AND source_name IN ('livemint', 'news18')
+    Naive datetimes are considered UTC. An empty string means no filter.
+    """
+    conditions = []
+    if published_after is not None:
+        conditions.append(f"published_at_ts >= {_utc_timestamp(published_after)}")
+    if published_before is not None:
+        conditions.append(f"published_at_ts < {_utc_timestamp(published_before)}")
+
+    names = sorted({normalize_source_name(source) for source in sources or []})
+    if names:
+        # Normalized names only contain [a-z0-9-], so they need no escaping.
+        conditions.append(
+            "source_name IN (" + ", ".join(f"'{name}'" for name in names) + ")"
+        )
+    return " AND ".join(conditions)
+
+
+def _utc_timestamp(value: datetime.datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
@@ -8,24 +8,33 @@
         5. Output: Write the output data to the Upstash vector database.
 """
 
+import functools
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Tuple
 
 import bytewax.operators as op
 from vector import UpstashVectorOutput
 from consumer import process_message, build_kafka_stream_client
+from dead_letter import build_dead_letter_sink, to_kafka_message
+from dedup import DedupIndex, band_value, fingerprint_of, url_bucket
 from bytewax.connectors.kafka import KafkaSource
-from bytewax.dataflow import Dataflow
-from bytewax.outputs import DynamicSink
+from bytewax.dataflow import Dataflow, Stream
+from bytewax.inputs import Source
+from bytewax.outputs import DynamicSink, Sink
 from embeddings import TextEmbedder
-from models import ChunkedDocument, EmbeddedDocument, RefinedDocument
+from models import ChunkedDocument, CommonDocument, EmbeddedDocument, RefinedDocument
 from logger import get_logger
+from metrics import DUPLICATES_DROPPED
+from settings import settings
 
 logger = get_logger(__name__)
 
 
 def build(
     model_cache_dir: Optional[Path] = None,
+    source: Optional[Source] = None,
+    sink: Optional[Sink] = None,
+    dead_letter_sink: Optional[Sink] = None,
 ) -> Dataflow:
     """
     Build the ByteWax dataflow for the Upstash use case.
@@ -33,15 +42,20 @@ def build(
         * 1. Tag: ['kafka_input']   = The input data is read from a KafkaSource
         * 2. Tag: ['map_kinp']      = Process message from KafkaSource to CommonDocument
             * 2.1 [Optional] Tag ['dbg_map_kinp'] = Debugging after ['map_kinp']
-        * 3. Tag: ['refine']        = Convert the message to a refined document format
-            * 3.1 [Optional] Tag ['dbg_refine'] = Debugging after ['refine']
-        * 4. Tag: ['chunkenize']    = Split the refined document into smaller chunks
-            * 4.1 [Optional] Tag ['dbg_chunkenize'] = Debugging after ['chunkenize']
-        * 5. Tag: ['embed']         = Generate embeddings for the chunks
-            * 5.1 [Optional] Tag ['dbg_embed'] = Debugging after ['embed']
-        * 6. Tag: ['output']        = Write the embeddings to the Upstash vector database
+            * 2.2 Tag ['split_dead_letters'] = Route undecodable messages/documents to ['dead_letters']
+        * 3. Tag: ['dedup']         = Drop articles already seen (same URL or near-duplicate text)
+        * 4. Tag: ['refine']        = Convert the message to a refined document format
+            * 4.1 [Optional] Tag ['dbg_refine'] = Debugging after ['refine']
+        * 5. Tag: ['chunkenize']    = Split the refined document into smaller chunks
+            * 5.1 [Optional] Tag ['dbg_chunkenize'] = Debugging after ['chunkenize']
+        * 6. Tag: ['embed']         = Generate embeddings for the chunks
+            * 6.1 [Optional] Tag ['dbg_embed'] = Debugging after ['embed']
+        * 7. Tag: ['output']        = Write the embeddings to the Upstash vector database
     Note:
         Each Optional Tag is a debugging step that can be enabled for troubleshooting.
+        `source` and `sink` default to the Upstash Kafka topic and the Upstash vector index,
+        they can be swapped (e.g with `local_kafka.LocalKafkaSource`) for local runs.
+        `dead_letter_sink` defaults to `dead_letter.build_dead_letter_sink()`.
     """
     model = TextEmbedder(cache_dir=model_cache_dir)
 
@@ -49,10 +63,18 @@ def build(
     stream = op.input(
         step_id="kafka_input",
         flow=dataflow,
-        source=_build_input(),
+        source=source or _build_input(),
     )
     stream = op.flat_map("map_kinp", stream, process_message)
     # _ = op.inspect("dbg_map_kinp", stream)
+    split = op.branch(
+        "split_dead_letters", stream, lambda item: isinstance(item, CommonDocument)
+    )
+    dead_letters = op.map("serialize_dead_letters", split.falses, to_kafka_message)
+    op.output(
+        "dead_letters", dead_letters, dead_letter_sink or build_dead_letter_sink()
+    )
+    stream = _deduplicate(split.trues)
     stream = op.map("refine", stream, RefinedDocument.from_common)
     # _ = op.inspect("dbg_refine", stream)
     stream = op.flat_map(
@@ -67,14 +89,83 @@ def build(
         lambda chunked_doc: EmbeddedDocument.from_chunked(chunked_doc, model),
     )
     # _ = op.inspect("dbg_embed", stream)
-    stream = op.output("output", stream, _build_output())
+    stream = op.output("output", stream, sink or _build_output())
     logger.info("Successfully created bytewax dataflow.")
     logger.info(
-        "\tStages: Kafka Input -> Map -> Refine -> Chunkenize -> Embed -> Upsert"
+        "\tStages: Kafka Input -> Map -> Dedup -> Refine -> Chunkenize -> Embed -> Upsert"
     )
     return dataflow
 
 
+def _deduplicate(stream: Stream) -> Stream:
+    """
+    The documents go through one dedup stage keyed by the bucket of their URL, then one stage per
+    SimHash band keyed by the bucket of their band value, so that the dedup state is sharded over
+    the workers. Two near-duplicates share at least one band, so they meet in the same index at
+    that stage, where the later one is dropped. The indexes are snapshotted with the rest of the
+    dataflow state. The stream is redistributed afterwards so that the expensive stages still run
+    on every worker.
+    """
+    bands = settings.DEDUP_MAX_DISTANCE + 1
+    shards = settings.DEDUP_SHARDS
+
+    stream = op.map("fingerprint", stream, lambda doc: (fingerprint_of(doc), doc))
+    stream = _dedup_stage(
+        "dedup_url",
+        stream,
+        lambda item: f"url:{url_bucket(item[1], shards)}",
+        bands=(),
+        urls=True,
+    )
+    for band in range(bands):
+        stream = _dedup_stage(
+            f"dedup_band_{band}",
+            stream,
+            lambda item, band=band: f"band_{band}:{band_value(item[0], band, bands) % shards}",
+            bands=(band,),
+            urls=False,
+        )
+    stream = op.map("drop_fingerprint", stream, lambda item: item[1])
+    return op.redistribute("redistribute", stream)
+
+
+def _dedup_stage(
+    step_id: str,
+    stream: Stream,
+    key: Callable[[Tuple[int, CommonDocument]], str],
+    bands: Tuple[int, ...],
+    urls: bool,
+) -> Stream:
+    keyed = op.key_on(f"{step_id}_key", stream, key)
+    deduped = op.stateful_map(
+        step_id, keyed, functools.partial(_dedup_mapper, bands=bands, urls=urls)
+    )
+    return op.filter_map(f"{step_id}_drop", deduped, lambda key_item: key_item[1])
+
+
+def _dedup_mapper(
+    index: Optional[DedupIndex],
+    item: Tuple[int, CommonDocument],
+    bands: Tuple[int, ...],
+    urls: bool,
+) -> Tuple[DedupIndex, Optional[Tuple[int, CommonDocument]]]:
+    if index is None:
+        index = DedupIndex(
+            ttl=settings.DEDUP_TTL,
+            max_entries=-(-settings.DEDUP_MAX_ENTRIES // settings.DEDUP_SHARDS),
+            max_distance=settings.DEDUP_MAX_DISTANCE,
+            bands=bands,
+            urls=urls,
+        )
+    simhash_value, document = item
+    reason = index.check(document, simhash_value=simhash_value)
+    if reason:
+        DUPLICATES_DROPPED.labels(reason=reason).inc()
+        logger.info(f"Dropped duplicate article {document.article_id} ({reason}).")
+        return index, None
+    return index, item
+
+
 def _build_input() -> KafkaSource:
     return build_kafka_stream_client()
 
@@ -0,0 +1,420 @@
+"""
+    In-memory / file-backed stand-in for the Upstash Kafka cluster.
+        - LocalBroker: Holds named topics, optionally persisted to a directory for replays.
+        - LocalTopic: A partitioned, append-only log of records with per-partition offsets.
+        - LocalKafkaProducer: Mimics `kafka.KafkaProducer` (send/flush/close, keyed partitioning).
+        - LocalKafkaSource: Mimics `bytewax.connectors.kafka.KafkaSource` (partitions, offsets, batches).
+        - LocalKafkaSink: Mimics `bytewax.connectors.kafka.KafkaSink` on top of a LocalBroker.
+
+    Usage:
+        - Create a LocalBroker (pass `path` to keep the topics on disk between runs).
+        - Produce with LocalKafkaProducer exactly like with the kafka-python producer.
+        - Plug LocalKafkaSource into the dataflow instead of `build_kafka_stream_client()`.
+"""
+
+import base64
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from bytewax.connectors.kafka import KafkaSinkMessage, KafkaSourceMessage
+from bytewax.inputs import FixedPartitionedSource, StatefulSourcePartition
+from bytewax.outputs import DynamicSink, StatelessSinkPartition
+from kafka.future import Future
+from kafka.partitioner.default import DefaultPartitioner
+from kafka.producer.future import RecordMetadata
+from kafka.structs import TopicPartition
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+OFFSET_BEGINNING = -2
+OFFSET_END = -1
+TIMESTAMP_CREATE_TIME = 1
+
+
+@dataclass(frozen=True)
+class LocalRecord:
+    key: Optional[bytes]
+    value: Optional[bytes]
+    timestamp: int  # milliseconds since epoch, like Kafka's CreateTime
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "key": _b64encode(self.key),
+                "value": _b64encode(self.value),
+                "timestamp": self.timestamp,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "LocalRecord":
+        data = json.loads(line)
+        return cls(
+            key=_b64decode(data["key"]),
+            value=_b64decode(data["value"]),
+            timestamp=data["timestamp"],
+        )
+
+
+class LocalTopic:
+    """
+    A partitioned, append-only topic.
+
+    Records are addressed by (partition, offset) exactly like on a Kafka broker. When a
+    directory is given, every partition is mirrored to a `<topic>-<partition>.log` file so
+    the same traffic can be replayed through the dataflow later on.
+
+    Attributes:
+        name (str): The topic name.
+        num_partitions (int): The number of partitions of the topic.
+        sealed (bool): Once sealed, tailing sources stop at the end of each partition.
+    """
+
+    def __init__(self, name: str, num_partitions: int = 1, path: Optional[Path] = None):
+        self.name = name
+        self.num_partitions = num_partitions
+        self._path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._partitions: List[List[LocalRecord]] = [[] for _ in range(num_partitions)]
+        self._positions: Dict[int, int] = {}
+        self._sealed = threading.Event()
+
+        if self._path:
+            self._path.mkdir(parents=True, exist_ok=True)
+            for partition in range(num_partitions):
+                log_file = self._log_file(partition)
+                if log_file.exists():
+                    with log_file.open() as f:
+                        self._partitions[partition] = [
+                            LocalRecord.from_json(line) for line in f if line.strip()
+                        ]
+
+    @property
+    def sealed(self) -> bool:
+        return self._sealed.is_set()
+
+    def seal(self) -> None:
+        """Marks the topic as complete, so tailing sources can terminate."""
+        self._sealed.set()
+
+    def append(self, partition: int, record: LocalRecord) -> int:
+        """Appends a record to the given partition and returns its offset."""
+        with self._lock:
+            offsets = self._partitions[partition]
+            offsets.append(record)
+            if self._path:
+                with self._log_file(partition).open("a") as f:
+                    f.write(record.to_json() + "\n")
+            return len(offsets) - 1
+
+    def read(self, partition: int, offset: int, max_records: int) -> List[LocalRecord]:
+        """Reads up to `max_records` records from the given partition starting at `offset`."""
+        with self._lock:
+            return self._partitions[partition][offset : offset + max_records]
+
+    def end_offset(self, partition: int) -> int:
+        """Returns the offset the next record appended to the partition will get."""
+        with self._lock:
+            return len(self._partitions[partition])
+
+    def commit(self, partition: int, offset: int) -> None:
+        """Records the next offset a consumer will read from the given partition."""
+        with self._lock:
+            self._positions[partition] = offset
+
+    def lag(self) -> int:
+        """Total number of records appended but not yet consumed, across all partitions."""
+        with self._lock:
+            return sum(
+                len(records) - self._positions.get(partition, 0)
+                for partition, records in enumerate(self._partitions)
+            )
+
+    def _log_file(self, partition: int) -> Path:
+        return self._path / f"{self.name}-{partition}.log"
+
+
+class LocalBroker:
+    """
+    A collection of LocalTopic instances, the local equivalent of a Kafka cluster.
+
+    Args:
+        num_partitions (int): Number of partitions for auto-created topics.
+        path (Optional[Path]): Directory used to persist the topics. In-memory if None.
+    """
+
+    def __init__(self, num_partitions: int = 1, path: Optional[Path] = None):
+        self._num_partitions = num_partitions
+        self._path = Path(path) if path else None
+        self._topics: Dict[str, LocalTopic] = {}
+        self._lock = threading.Lock()
+
+    def topic(self, name: str) -> LocalTopic:
+        """Returns the topic with the given name, creating it on first use."""
+        with self._lock:
+            if name not in self._topics:
+                self._topics[name] = LocalTopic(
+                    name, num_partitions=self._num_partitions, path=self._path
+                )
+            return self._topics[name]
+
+
+class LocalRecordFuture(Future):
+    """A resolved kafka-python style future, supporting `get()` and callbacks."""
+
+    def get(self, timeout: Optional[float] = None) -> RecordMetadata:
+        if self.failed():
+            raise self.exception
+        return self.value
+
+
+class LocalKafkaProducer:
+    """
+    Drop-in replacement for `kafka.KafkaProducer` writing to a LocalBroker.
+
+    Keyed records are partitioned with the same murmur2 partitioner as kafka-python,
+    un-keyed records are spread randomly across partitions.
+
+    Args:
+        broker (LocalBroker): The broker to produce to.
+        value_serializer (Optional[Callable]): Converts a value into bytes.
+        key_serializer (Optional[Callable]): Converts a key into bytes.
+    """
+
+    def __init__(
+        self,
+        broker: LocalBroker,
+        value_serializer: Optional[Callable] = None,
+        key_serializer: Optional[Callable] = None,
+        **_configs,
+    ):
+        self._broker = broker
+        self._value_serializer = value_serializer
+        self._key_serializer = key_serializer
+        self._partitioner = DefaultPartitioner()
+        self._closed = False
+
+    def send(
+        self,
+        topic: str,
+        value=None,
+        key=None,
+        partition: Optional[int] = None,
+        timestamp_ms: Optional[int] = None,
+        **_kwargs,
+    ) -> LocalRecordFuture:
+        """Appends a record to the topic and returns an already resolved future."""
+        if self._closed:
+            raise RuntimeError("Cannot send on a closed LocalKafkaProducer.")
+
+        key_bytes = self._key_serializer(key) if self._key_serializer else key
+        value_bytes = self._value_serializer(value) if self._value_serializer else value
+        timestamp_ms = timestamp_ms or int(time.time() * 1000)
+
+        local_topic = self._broker.topic(topic)
+        if partition is None:
+            all_partitions = list(range(local_topic.num_partitions))
+            partition = self._partitioner(key_bytes, all_partitions, all_partitions)
+
+        offset = local_topic.append(
+            partition, LocalRecord(key=key_bytes, value=value_bytes, timestamp=timestamp_ms)
+        )
+        metadata = RecordMetadata(
+            topic,
+            partition,
+            TopicPartition(topic, partition),
+            offset,
+            timestamp_ms,
+            0,
+            None,
+            len(key_bytes) if key_bytes is not None else -1,
+            len(value_bytes) if value_bytes is not None else -1,
+            -1,
+        )
+        return LocalRecordFuture().success(metadata)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Records are appended synchronously, there is nothing to flush."""
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        self._closed = True
+
+
+class LocalKafkaSourcePartition(
+    StatefulSourcePartition[KafkaSourceMessage[bytes, bytes], int]
+):
+    def __init__(
+        self,
+        topic: LocalTopic,
+        partition: int,
+        starting_offset: int,
+        resume_offset: Optional[int],
+        batch_size: int,
+        tail: bool,
+        poll_interval: timedelta,
+    ):
+        self._topic = topic
+        self._partition = partition
+        self._batch_size = batch_size
+        self._tail = tail
+        self._poll_interval = poll_interval
+        self._next_awake: Optional[datetime] = None
+
+        if resume_offset is not None:
+            self._offset = resume_offset
+        elif starting_offset == OFFSET_BEGINNING:
+            self._offset = 0
+        elif starting_offset == OFFSET_END:
+            self._offset = topic.end_offset(partition)
+        else:
+            self._offset = starting_offset
+        self._eof = False
+
+    def next_batch(self) -> Iterable[KafkaSourceMessage[bytes, bytes]]:
+        if self._eof:
+            raise StopIteration()
+
+        records = self._topic.read(self._partition, self._offset, self._batch_size)
+        if not records:
+            if not self._tail or self._topic.sealed:
+                self._eof = True
+            self._next_awake = datetime.now(timezone.utc) + self._poll_interval
+            return []
+
+        now_ms = time.time() * 1000
+        batch = [
+            KafkaSourceMessage(
+                key=record.key,
+                value=record.value,
+                topic=self._topic.name,
+                offset=self._offset + i,
+                partition=self._partition,
+                timestamp=(TIMESTAMP_CREATE_TIME, record.timestamp),
+                latency=(now_ms - record.timestamp) / 1000,
+            )
+            for i, record in enumerate(records)
+        ]
+        self._offset += len(records)
+        self._topic.commit(self._partition, self._offset)
+        self._next_awake = None
+        return batch
+
+    def next_awake(self) -> Optional[datetime]:
+        return self._next_awake
+
+    def snapshot(self) -> int:
+        return self._offset
+
+
+class LocalKafkaSource(FixedPartitionedSource[KafkaSourceMessage[bytes, bytes], int]):
+    """
+    Drop-in replacement for the bytewax `KafkaSource`, reading from a LocalBroker.
+
+    Each `<partition>-<topic>` pair is a bytewax partition whose snapshot is the next offset
+    to read, so resuming from a recovery snapshot behaves like committed Kafka offsets.
+
+    Args:
+        broker (LocalBroker): The broker to consume from.
+        topics (Iterable[str]): The topics to consume.
+        tail (bool): Keep waiting for new records at the end of the partitions.
+            A sealed topic always terminates at its end.
+        starting_offset (int): OFFSET_BEGINNING, OFFSET_END or an explicit offset.
+        batch_size (int): Maximum number of messages returned per `next_batch` call.
+        poll_interval (timedelta): How long an idle partition waits before polling again.
+    """
+
+    def __init__(
+        self,
+        broker: LocalBroker,
+        topics: Iterable[str],
+        tail: bool = True,
+        starting_offset: int = OFFSET_BEGINNING,
+        batch_size: int = 1000,
+        poll_interval: timedelta = timedelta(milliseconds=50),
+    ):
+        self._broker = broker
+        self._topics = list(topics)
+        self._tail = tail
+        self._starting_offset = starting_offset
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+
+    def list_parts(self) -> List[str]:
+        return [
+            f"{partition}-{topic}"
+            for topic in self._topics
+            for partition in range(self._broker.topic(topic).num_partitions)
+        ]
+
+    def build_part(
+        self, step_id: str, for_part: str, resume_state: Optional[int]
+    ) -> LocalKafkaSourcePartition:
+        partition, topic = for_part.split("-", 1)
+        return LocalKafkaSourcePartition(
+            topic=self._broker.topic(topic),
+            partition=int(partition),
+            starting_offset=self._starting_offset,
+            resume_offset=resume_state,
+            batch_size=self._batch_size,
+            tail=self._tail,
+            poll_interval=self._poll_interval,
+        )
+
+
+class _LocalKafkaSinkPartition(StatelessSinkPartition[KafkaSinkMessage]):
+    def __init__(self, producer: LocalKafkaProducer, topic: Optional[str]):
+        self._producer = producer
+        self._topic = topic
+
+    def write_batch(self, items: List[KafkaSinkMessage]) -> None:
+        for message in items:
+            topic = message.topic or self._topic
+            if topic is None:
+                raise RuntimeError(f"No topic to produce to for {message}")
+            self._producer.send(
+                topic,
+                value=message.value,
+                key=message.key,
+                partition=message.partition,
+                timestamp_ms=message.timestamp or None,
+            )
+
+
+class LocalKafkaSink(DynamicSink[KafkaSinkMessage]):
+    """
+    Drop-in replacement for the bytewax `KafkaSink`, writing to a LocalBroker.
+
+    Args:
+        broker (LocalBroker): The broker to produce to.
+        topic (Optional[str]): Default topic, used when a message does not name one.
+    """
+
+    def __init__(self, broker: LocalBroker, topic: Optional[str] = None):
+        self._broker = broker
+        self._topic = topic
+
+    def build(
+        self, step_id: str, worker_index: int, worker_count: int
+    ) -> _LocalKafkaSinkPartition:
+        return _LocalKafkaSinkPartition(LocalKafkaProducer(self._broker), self._topic)
+
+
+def _b64encode(data: Optional[Union[bytes, str]]) -> Optional[str]:
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return base64.b64encode(data).decode("ascii")
+
+
+def _b64decode(data: Optional[str]) -> Optional[bytes]:
+    if data is None:
+        return None
+    return base64.b64decode(data)
@@ -0,0 +1,51 @@
+"""
+    Prometheus metrics shared by the producers and the Bytewax pipeline.
+    Exposed over HTTP with `start_metrics_server` when settings.METRICS_PORT is set.
+"""
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+from logger import get_logger
+from settings import settings
+
+logger = get_logger(__name__)
+
+MESSAGES_CONSUMED = Counter(
+    "news_messages_consumed_total",
+    "Kafka messages decoded by the pipeline.",
+)
+DOCUMENTS_DECODED = Counter(
+    "news_documents_decoded_total",
+    "CommonDocuments successfully decoded from Kafka messages.",
+)
+DEAD_LETTERS = Counter(
+    "news_dead_letters_total",
+    "Messages or documents routed to the dead-letter output.",
+    ["reason"],
+)
+DUPLICATES_DROPPED = Counter(
+    "news_duplicates_dropped_total",
+    "Documents dropped before embedding because they duplicate a recent article.",
+    ["reason"],
+)
+
+RECORDS_DELIVERED = Counter(
+    "news_records_delivered_total",
+    "Article records acknowledged by the Kafka brokers.",
+)
+DELIVERY_ERRORS = Counter(
+    "news_delivery_errors_total",
+    "Article records the Kafka producer failed to deliver.",
+)
+DELIVERY_LATENCY = Histogram(
+    "news_delivery_latency_seconds",
+    "Time between sending an article record and its acknowledgement.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def start_metrics_server(port: int = settings.METRICS_PORT) -> None:
+    """Serves the metrics on http://0.0.0.0:<port>/metrics. A port of 0 disables the server."""
+    if port:
+        start_http_server(port)
+        logger.info(f"Serving Prometheus metrics on port {port}.")
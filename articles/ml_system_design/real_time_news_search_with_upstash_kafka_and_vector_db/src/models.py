@@ -9,27 +9,27 @@
     - RefinedDocument: Refined version of a CommonDocument.
     - ChunkedDocument: Chunked version of a RefinedDocument.
     - EmbeddedDocument: Embedded version of a ChunkedDocument.
+    - DeadLetter: A message or document that could not be decoded, with the reason why.
      
 """
 
 import datetime
 import hashlib
+import json
 import logging
 from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
-from dateutil import parser
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pydantic import BaseModel, Field, field_validator
-from unstructured.staging.huggingface import chunk_by_attention_window
 
-from cleaners import clean_full, normalize_whitespace, remove_html_tags
+from chunking import TokenChunk, chunk_by_tokens
+from cleaners import clean_full, normalize_whitespace, parse_date, remove_html_tags
 from embeddings import TextEmbedder
+from filters import normalize_source_name, to_timestamp
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
-RECURSIVE_SPLITTER = RecursiveCharacterTextSplitter()
-
 
 class DocumentSource(BaseModel):
     id: Optional[str]
@@ -49,7 +49,8 @@ class RefinedDocument(BaseModel):
             "title": common.title,
             "url": common.url,
             "published_at": common.published_at,
-            "source_name": common.source_name,
+            "published_at_ts": to_timestamp(common.published_at),
+            "source_name": normalize_source_name(common.source_name),
             "author": common.author,
             "image_url": common.image_url,
         }
@@ -62,6 +63,7 @@ class ChunkedDocument(BaseModel):
     chunk_id: str
     full_raw_text: str
     text: str
+    token_ids: Optional[List[int]] = None
     metadata: Dict[str, Union[str, Any]]
 
     @classmethod
@@ -73,24 +75,28 @@ class ChunkedDocument(BaseModel):
         return [
             cls(
                 doc_id=refined_doc.doc_id,
-                chunk_id=hashlib.md5(chunk.encode()).hexdigest(),
+                # Scoped to the article, the chunk id is the id of its vector.
+                chunk_id=hashlib.md5(f"{refined_doc.doc_id}:{chunk.text}".encode()).hexdigest(),
                 full_raw_text=refined_doc.full_text,
-                text=chunk,
+                text=chunk.text,
+                token_ids=chunk.token_ids,
                 metadata=refined_doc.metadata,
             )
             for chunk in chunks
         ]
 
     @staticmethod
-    def chunkenize(text: str, embedding_model: TextEmbedder) -> list[str]:
-        text_sections = RECURSIVE_SPLITTER.split_text(text=text)
-        chunks = []
-        for text_section in text_sections:
-            chunks.extend(
-                chunk_by_attention_window(text_section, embedding_model.tokenizer)
-            )
-
-        return chunks
+    def chunkenize(text: str, embedding_model: TextEmbedder) -> list[TokenChunk]:
+        # Leave room for the special tokens the embedding model adds around every chunk.
+        max_tokens = min(
+            embedding_model.token_limit, embedding_model.max_input_length - 2
+        )
+        return chunk_by_tokens(
+            text,
+            embedding_model.tokenizer,
+            max_tokens=max_tokens,
+            overlap=min(settings.CHUNK_OVERLAP_TOKENS, max_tokens - 1),
+        )
 
 
 class EmbeddedDocument(BaseModel):
@@ -110,7 +116,11 @@ class EmbeddedDocument(BaseModel):
             chunk_id=chunked_doc.chunk_id,
             full_raw_text=chunked_doc.full_raw_text,
             text=chunked_doc.text,
-            embeddings=embedding_model(chunked_doc.text, to_list=True),
+            embeddings=(
+                embedding_model.embed_token_ids(chunked_doc.token_ids, to_list=True)
+                if chunked_doc.token_ids is not None
+                else embedding_model(chunked_doc.text, to_list=True)
+            ),
             metadata=chunked_doc.metadata,
         )
 
@@ -126,7 +136,7 @@ class CommonDocument(BaseModel):
     title: str = Field(default_factory=lambda: "N/A")
     url: str = Field(default_factory=lambda: "N/A")
     published_at: str = Field(
-        default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        default_factory=lambda: datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     )
     source_name: str = Field(default_factory=lambda: "Unknown")
     image_url: Optional[str] = Field(default_factory=lambda: None)
@@ -150,22 +160,71 @@ class CommonDocument(BaseModel):
 
     @field_validator("published_at")
     def clean_date_field(cls, v):
-        try:
-            parsed_date = parser.parse(v)
-            return parsed_date.strftime("%Y-%m-%d %H:%M:%S")
-        except (ValueError, TypeError):
+        parsed_date = parse_date(v)
+        if parsed_date is None:
             logger.error(f"Error parsing date: {v}, using current date instead.")
+            return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return parsed_date
 
     @classmethod
     def from_json(cls, data: dict) -> "CommonDocument":
         """Create a CommonDocument from a JSON object."""
         return cls(**data)
 
+    @classmethod
+    def from_trusted(cls, data: dict) -> "CommonDocument":
+        """
+        Create a CommonDocument from a payload that was already cleaned by the producer,
+        skipping the field validators (and thus the cleaning) entirely.
+        """
+        return cls.model_construct(**data)
+
     def to_kafka_payload(self) -> dict:
         """Prepare the common representation for Kafka payload."""
         return self.model_dump(exclude_none=False)
 
 
+class DeadLetter(BaseModel):
+    reason: str
+    error: str
+    payload: str
+    topic: Optional[str] = None
+    partition: Optional[int] = None
+    offset: Optional[int] = None
+    index: Optional[int] = None
+
+    @classmethod
+    def from_message(
+        cls,
+        message: Any,
+        reason: str,
+        error: Exception,
+        payload: Any = None,
+        index: Optional[int] = None,
+    ) -> "DeadLetter":
+        """Create a DeadLetter for a Kafka message, or for the document at `index` within it."""
+        if payload is None:
+            payload = message.value
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", errors="replace")
+        elif not isinstance(payload, str):
+            payload = json.dumps(payload, default=str)
+
+        return cls(
+            reason=reason,
+            error=str(error),
+            payload=payload,
+            topic=getattr(message, "topic", None),
+            partition=getattr(message, "partition", None),
+            offset=getattr(message, "offset", None),
+            index=index,
+        )
+
+    def to_kafka_payload(self) -> dict:
+        """Prepare the dead letter for the dead-letter topic or file."""
+        return self.model_dump()
+
+
 class NewsDataIOModel(BaseModel):
     article_id: str
     title: str
@@ -205,8 +264,12 @@ class NewsAPIModel(BaseModel):
     content: Optional[str]
 
     def to_common(self) -> CommonDocument:
-        """Convert to common news article format."""
+        """
+        Convert to common news article format. NewsAPI articles have no id, theirs is derived
+        from the source and the URL, so that an article fetched again keeps the same id.
+        """
         return CommonDocument(
+            article_id=hashlib.md5(f"{self.source.name}:{self.url.strip()}".encode()).hexdigest(),
             title=self.title,
             description=self.description,
             url=self.url,
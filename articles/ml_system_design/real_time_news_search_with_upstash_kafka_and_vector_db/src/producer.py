@@ -5,20 +5,28 @@
     
     Usage:
         - Create a KafkaProducerSwarm instance with the desired settings.
-        - KafkaProducerSwarm will create a KafkaProducerThread for each fetch function.
+        - KafkaProducerSwarm will create a KafkaProducerThread for each fetch function,
+          each one polling its source on its own PollSchedule (see scheduling.py).
         - Stop the swarm to halt message production and close the producer instances.
 """
 
-import json
 import threading
 import time
 import fire
 from kafka import KafkaProducer
-from typing import Callable, List, NoReturn
+from typing import Callable, List, NoReturn, Optional
 from settings import settings
 from logger import get_logger
+from metrics import (
+    DELIVERY_ERRORS,
+    DELIVERY_LATENCY,
+    RECORDS_DELIVERED,
+    start_metrics_server,
+)
 from models import CommonDocument
-from tools import NewsFetcher
+from scheduling import AdaptivePollInterval, DailyQuota, ExponentialBackoff, PollSchedule
+from tools import build_news_fetcher
+from wire import build_value_serializer
 
 logger = get_logger(__name__)
 
@@ -32,7 +40,7 @@ class KafkaProducerThread(threading.Thread):
         topic (str): The Kafka topic to which messages will be produced.
         fetch_function (Callable): Function to fetch data to be sent to Kafka.
         producer (KafkaProducer): Kafka producer instance.
-        wait_window_sec (int): Time to wait between message production in seconds.
+        schedule (PollSchedule): When to poll the source next.
         running (bool): Control flag for the running state of the thread.
     """
 
@@ -42,37 +50,75 @@ class KafkaProducerThread(threading.Thread):
         producer: KafkaProducer,
         topic: str,
         fetch_function: Callable,
+        schedule: Optional[PollSchedule] = None,
     ) -> None:
         super().__init__(daemon=True)
         self.producer_id = f"KafkaProducerThread #{producer_id}"
         self.producer = producer  # Use the shared producer
         self.topic = topic
         self.fetch_function = fetch_function
-        self.wait_window_sec = settings.FETCH_WAIT_WINDOW  # Adjust as needed
+        self.schedule = schedule or build_poll_schedule(fetch_function)
         self.running = threading.Event()
         self.running.set()
+        self._stopped = threading.Event()
 
     def run(self) -> NoReturn:
         """Continuously fetch and send messages to a Kafka topic."""
         while self.running.is_set():
+            wait_sec = self.schedule.wait_before_poll()
+            if wait_sec:
+                logger.warning(
+                    f"Producer : {self.producer_id} exhausted its daily quota, pausing {wait_sec:.0f}s."
+                )
+                self._stopped.wait(wait_sec)
+                continue
+
             try:
                 messages: List[CommonDocument] = self.fetch_function()
                 if messages:
-                    messages = [msg.to_kafka_payload() for msg in messages]
-                    self.producer.send(self.topic, value=messages)
-                    self.producer.flush()
+                    self.send(messages)
+                wait_sec = self.schedule.polled(len(messages))
                 logger.info(
-                    f"Producer : {self.producer_id} sent: {len(messages)} msgs."
+                    f"Producer : {self.producer_id} sent: {len(messages)} msgs, next poll in {wait_sec:.0f}s."
                 )
-                time.sleep(self.wait_window_sec)
             except Exception as e:
-                logger.error(f"Error in producer worker {self.producer_id}: {e}")
-                self.running.clear()  # Stop the thread on error
+                wait_sec = self.schedule.failed()
+                logger.error(
+                    f"Error in producer worker {self.producer_id}: {e}, retrying in {wait_sec:.0f}s."
+                )
+            self._stopped.wait(wait_sec)
+
+    def send(self, documents: List[CommonDocument]) -> None:
+        """
+        Send the documents according to settings.KAFKA_PRODUCER_MODE:
+            - "per_article": one record per article, keyed by article id, left to the producer
+              to batch (linger) and compress. The key spreads the articles over the partitions,
+              and sends the redeliveries of an article to the same partition: the id is stable
+              across fetches (the id of NewsData, a hash of the source and the URL for NewsAPI).
+              Articles of one source are not kept on one partition. Delivery is tracked by callbacks.
+            - "batch": the whole fetch as a single record, flushed synchronously.
+        """
+        if settings.KAFKA_PRODUCER_MODE == "batch":
+            self.producer.send(
+                self.topic, value=[doc.to_kafka_payload() for doc in documents]
+            )
+            self.producer.flush()
+            return
+
+        for doc in documents:
+            sent_at = time.monotonic()
+            future = self.producer.send(
+                self.topic,
+                key=doc.article_id,
+                value=[doc.to_kafka_payload()],
+            )
+            future.add_callback(_on_delivery, sent_at)
+            future.add_errback(_on_delivery_error, doc.article_id)
 
     def stop(self) -> None:
-        """Signals the thread to stop running and closes the Kafka producer."""
+        """Signals the thread to stop running and waits for it to finish."""
         self.running.clear()
-        self.producer.close()
+        self._stopped.set()
         self.join()
 
 
@@ -108,6 +154,35 @@ class KafkaProducerSwarm:
             thread.join()
 
 
+def _on_delivery(sent_at: float, metadata) -> None:
+    RECORDS_DELIVERED.inc()
+    DELIVERY_LATENCY.observe(time.monotonic() - sent_at)
+
+
+def _on_delivery_error(article_id: str, exception: Exception) -> None:
+    DELIVERY_ERRORS.inc()
+    logger.error(f"Failed to deliver article {article_id}: {exception}")
+
+
+def build_poll_schedule(fetch_function: Callable) -> PollSchedule:
+    """Build the PollSchedule of a source, its quota is looked up by the fetch function name."""
+    return PollSchedule(
+        poll_interval=AdaptivePollInterval(
+            min_interval=settings.FETCH_MIN_INTERVAL,
+            max_interval=settings.FETCH_WAIT_WINDOW,
+            target_articles=settings.ARTICLES_BATCH_SIZE,
+            alpha=settings.FETCH_RATE_SMOOTHING,
+        ),
+        quota=DailyQuota(settings.FETCH_DAILY_QUOTAS.get(fetch_function.__name__, 0)),
+        backoff=ExponentialBackoff(
+            base_delay=settings.FETCH_MIN_INTERVAL, max_delay=settings.FETCH_WAIT_WINDOW
+        ),
+        requests_per_poll=getattr(
+            getattr(fetch_function, "__self__", None), "requests_per_fetch", 1
+        ),
+    )
+
+
 def create_producer() -> KafkaProducer:
     """Initializes and returns a KafkaProducer instance."""
     return KafkaProducer(
@@ -117,13 +192,18 @@ def create_producer() -> KafkaProducer:
         sasl_plain_username=settings.UPSTASH_KAFKA_UNAME,
         sasl_plain_password=settings.UPSTASH_KAFKA_PASS,
         api_version_auto_timeout_ms=100000,
-        value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        value_serializer=build_value_serializer(),
+        key_serializer=lambda key: key.encode("utf-8"),
+        linger_ms=settings.KAFKA_LINGER_MS,
+        batch_size=settings.KAFKA_BATCH_SIZE,
+        compression_type=settings.KAFKA_COMPRESSION_TYPE or None,
     )
 
 
 def main():
+    start_metrics_server()
     producer = create_producer()
-    fetcher = NewsFetcher()
+    fetcher = build_news_fetcher()
 
     multi_producer = KafkaProducerSwarm(
         producer=producer,
@@ -138,6 +218,7 @@ def main():
     finally:
         multi_producer.stop()
         producer.close()
+        fetcher.close()
 
 
 if __name__ == "__main__":
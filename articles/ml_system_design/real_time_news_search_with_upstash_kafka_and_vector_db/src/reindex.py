@@ -0,0 +1,194 @@
+"""
+    Re-embeds the news index with a new embedding model, without downtime.
+        - Reindexer: Copies a namespace into a new, versioned one, re-embedding the stored chunk text
+          in batches. Upserts run concurrently with the embedding of the next batches, and the range
+          cursor is checkpointed to a progress file so that an interrupted backfill resumes.
+        - ReindexCLI: Fire CLI to backfill a version and switch the read alias to it.
+
+    Upgrading the embedding model (all of the steps run with the new EMBEDDING_* settings):
+        1. Restart the pipeline with UPSTASH_VECTOR_NAMESPACE=<version>, new articles go to <version>.
+        2. poetry run python -m src.reindex backfill --target=<version>
+        3. poetry run python -m src.reindex switch --target=<version>
+    The UI serves the previous version (and embeds queries with its model) until step 3.
+    Note:
+        All namespaces share the dimension of the index, a model of another dimension needs a new index.
+        Vectors written before the chunk text was stored (as the vector data) are re-embedded
+        from their title.
+"""
+
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+import fire
+from upstash_vector import Index, Vector
+
+from aliases import IndexAlias, IndexVersion
+from embeddings import TextEmbedder
+from logger import get_logger
+from settings import settings
+
+logger = get_logger(__name__)
+
+
+class Reindexer:
+    """
+    Args:
+        index (Index): The Upstash Vector index.
+        embedder (TextEmbedder): The embedder of the target version.
+        batch_size (int): Number of vectors read, embedded and upserted at once.
+        workers (int): Maximum number of batches being upserted concurrently.
+        progress_dir (Path): Where the progress of every target namespace is checkpointed.
+    """
+
+    def __init__(
+        self,
+        index: Index,
+        embedder: TextEmbedder,
+        batch_size: int = settings.REINDEX_BATCH_SIZE,
+        workers: int = settings.REINDEX_WORKERS,
+        progress_dir: Path = Path(settings.REINDEX_PROGRESS_DIR),
+    ):
+        self._index = index
+        self._embedder = embedder
+        self._batch_size = batch_size
+        self._workers = workers
+        self._progress_dir = Path(progress_dir)
+
+    def backfill(self, source: str, target: str) -> int:
+        """
+        Re-embed every vector of the `source` namespace into the `target` namespace, keeping their
+        ids and metadata. Resumes from the last checkpoint of `target`, if any.
+
+        Returns:
+            int: The number of vectors copied to `target` so far, including previous runs.
+        """
+        if source == target:
+            raise ValueError(f"The source and target namespaces are the same: {source}")
+        dimension = self._index.info().dimension
+        if self._embedder.embedding_size != dimension:
+            raise ValueError(
+                f"The embedding model outputs {self._embedder.embedding_size} dimensions, "
+                f"the index has {dimension}"
+            )
+
+        progress = self._load_progress(source, target)
+        if progress["done"]:
+            logger.info(f"Namespace '{target}' was already backfilled from '{source}'.")
+            return progress["copied"]
+
+        pending: Deque[Tuple[Future, str, int]] = deque()
+        with ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="reindex"
+        ) as executor:
+            cursor = progress["cursor"]
+            while True:
+                page = self._index.range(
+                    cursor=cursor,
+                    limit=self._batch_size,
+                    include_metadata=True,
+                    include_data=True,
+                    namespace=source,
+                )
+                if page.vectors:
+                    vectors = self._reembed(page.vectors)
+                    future = executor.submit(
+                        self._index.upsert, vectors=vectors, namespace=target
+                    )
+                    pending.append((future, page.next_cursor, len(vectors)))
+                cursor = page.next_cursor
+
+                # Checkpoint the batches in order, so that the saved cursor never skips one.
+                while pending and (pending[0][0].done() or len(pending) > self._workers):
+                    self._checkpoint(progress, *pending.popleft())
+                if not cursor:
+                    break
+
+            while pending:
+                self._checkpoint(progress, *pending.popleft())
+
+        progress["done"] = True
+        self._save_progress(progress)
+        logger.info(f"Backfilled {progress['copied']} vectors from '{source}' into '{target}'.")
+        return progress["copied"]
+
+    def _reembed(self, records) -> List[Vector]:
+        texts = [
+            record.data or (record.metadata or {}).get("title", "") for record in records
+        ]
+        embeddings = self._embedder.embed_many(texts)
+        if len(embeddings) != len(records):
+            raise RuntimeError(f"Failed to embed a batch of {len(records)} vectors")
+
+        return [
+            Vector(id=record.id, vector=embedding, metadata=record.metadata, data=record.data)
+            for record, embedding in zip(records, embeddings)
+        ]
+
+    def _checkpoint(self, progress: dict, future: Future, cursor: str, count: int) -> None:
+        future.result()
+        progress["cursor"] = cursor
+        progress["copied"] += count
+        self._save_progress(progress)
+
+    def _progress_path(self, target: str) -> Path:
+        return self._progress_dir / f"{target}.json"
+
+    def _load_progress(self, source: str, target: str) -> dict:
+        path = self._progress_path(target)
+        if path.exists():
+            progress = json.loads(path.read_text())
+            if progress["source"] == source:
+                logger.info(
+                    f"Resuming the backfill of '{target}' after {progress['copied']} vectors."
+                )
+                return progress
+            logger.warning(
+                f"Discarding the progress of '{target}', it was backfilled from '{progress['source']}'."
+            )
+        return {"source": source, "target": target, "cursor": "", "copied": 0, "done": False}
+
+    def _save_progress(self, progress: dict) -> None:
+        self._progress_dir.mkdir(parents=True, exist_ok=True)
+        path = self._progress_path(progress["target"])
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(progress))
+        temporary.replace(path)
+
+
+class ReindexCLI:
+    def __init__(self):
+        self._index = Index(
+            url=settings.UPSTASH_VECTOR_ENDPOINT,
+            token=settings.UPSTASH_VECTOR_KEY,
+            retries=settings.UPSTASH_VECTOR_RETRIES,
+            retry_interval=settings.UPSTASH_VECTOR_WAIT_INTERVAL,
+        )
+        self._alias = IndexAlias(self._index)
+
+    def current(self) -> dict:
+        """The version currently served under the read alias."""
+        return self._alias.resolve_or_default().model_dump()
+
+    def backfill(self, target: str, source: Optional[str] = None) -> int:
+        """Re-embed `source` (the version currently served by default) into `target`."""
+        source = self._alias.resolve_or_default().namespace if source is None else source
+        embedder = IndexVersion(namespace=target).build_embedder()
+        return Reindexer(self._index, embedder).backfill(source=source, target=target)
+
+    def switch(self, target: str) -> dict:
+        """Serve `target`, embedded with the current EMBEDDING_* settings, under the read alias."""
+        version = IndexVersion(namespace=target)
+        self._alias.switch(version)
+        logger.info(f"The read alias now serves '{target}' ({version.model_id}).")
+        return version.model_dump()
+
+
+def main():
+    fire.Fire(ReindexCLI)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+    Poll scheduling for the KafkaProducerThreads.
+        - AdaptivePollInterval: Polls a source more often when articles arrive faster.
+        - DailyQuota: Caps the API requests spent on a source per (UTC) day, and paces the polls
+          so that the quota lasts until the end of the day.
+        - ExponentialBackoff: Delays the restart of a source after consecutive failures.
+"""
+
+import datetime
+import random
+import time
+from typing import Optional
+
+
+class AdaptivePollInterval:
+    """
+    Tracks the article arrival rate of a source as an exponentially weighted moving average
+    and schedules the next poll for when about `target_articles` new articles are expected.
+
+    Args:
+        min_interval (float): Lower bound of the poll interval, in seconds.
+        max_interval (float): Upper bound of the poll interval, in seconds.
+        target_articles (int): Number of new articles a poll should ideally return.
+        alpha (float): Weight of the latest observation in the moving average.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        target_articles: int,
+        alpha: float = 0.3,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_articles = target_articles
+        self.alpha = alpha
+        self.rate: Optional[float] = None  # articles per second
+        self.interval = min_interval
+
+    def observe(self, articles: int, elapsed: float) -> float:
+        """Record that a poll returned `articles` over the last `elapsed` seconds, returns the next interval."""
+        rate = articles / max(elapsed, 1e-6)
+        self.rate = rate if self.rate is None else self.alpha * rate + (1 - self.alpha) * self.rate
+
+        if self.rate > 0:
+            interval = self.target_articles / self.rate
+        else:
+            interval = self.interval * 2
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
+
+
+class DailyQuota:
+    """
+    Counts the requests spent on a source during the current UTC day.
+
+    Args:
+        limit (int): Requests allowed per day, 0 means unlimited.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._day = self._today()
+        self._used = 0
+
+    def consume(self, requests: int = 1) -> None:
+        self._roll()
+        self._used += requests
+
+    def remaining(self) -> float:
+        if not self.limit:
+            return float("inf")
+        self._roll()
+        return self.limit - self._used
+
+    def pace(self, requests_per_poll: int) -> float:
+        """
+        The shortest interval between two polls that spreads the remaining quota over the rest
+        of the day, 0 if the quota is unlimited.
+        """
+        remaining = self.remaining()
+        if remaining == float("inf"):
+            return 0.0
+        polls_left = remaining / requests_per_poll
+        if polls_left <= 0:
+            return self.seconds_until_reset()
+        return self.seconds_until_reset() / polls_left
+
+    def seconds_until_reset(self) -> float:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        tomorrow = (now + datetime.timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return (tomorrow - now).total_seconds()
+
+    def _roll(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+
+    @staticmethod
+    def _today() -> datetime.date:
+        return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+class ExponentialBackoff:
+    """
+    Full-jitter exponential backoff: the n-th consecutive failure waits a random time
+    in [0, min(max_delay, base_delay * 2**n)].
+    """
+
+    def __init__(self, base_delay: float, max_delay: float):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+
+    def failure(self) -> float:
+        """Record a failure and return how long to wait before retrying."""
+        delay = min(self.max_delay, self.base_delay * 2**self.failures)
+        self.failures += 1
+        return random.uniform(0, delay)
+
+    def success(self) -> None:
+        self.failures = 0
+
+
+class PollSchedule:
+    """
+    The schedule of a single source: the adaptive interval, its quota and its failure backoff.
+
+    Args:
+        poll_interval (AdaptivePollInterval): Interval between successful polls.
+        quota (DailyQuota): Requests budget of the source.
+        backoff (ExponentialBackoff): Delay after failed polls.
+        requests_per_poll (int): Requests charged to the quota by a single poll.
+    """
+
+    def __init__(
+        self,
+        poll_interval: AdaptivePollInterval,
+        quota: DailyQuota,
+        backoff: ExponentialBackoff,
+        requests_per_poll: int = 1,
+    ):
+        self.poll_interval = poll_interval
+        self.quota = quota
+        self.backoff = backoff
+        self.requests_per_poll = requests_per_poll
+        self._last_poll: Optional[float] = None
+
+    def wait_before_poll(self) -> float:
+        """Seconds to wait because the quota is exhausted, 0 if the source can be polled now."""
+        if self.quota.remaining() < self.requests_per_poll:
+            return self.quota.seconds_until_reset()
+        return 0.0
+
+    def polled(self, articles: int) -> float:
+        """
+        Record a successful poll, returns the seconds to wait before the next one: the adaptive
+        interval, slowed down if needed for the quota to last the whole day.
+        """
+        now = time.monotonic()
+        elapsed = self.poll_interval.interval if self._last_poll is None else now - self._last_poll
+        self._last_poll = now
+        self.quota.consume(self.requests_per_poll)
+        self.backoff.success()
+        interval = self.poll_interval.observe(articles, elapsed)
+        return max(interval, self.quota.pace(self.requests_per_poll))
+
+    def failed(self) -> float:
+        """Record a failed poll, returns the seconds to wait before retrying."""
+        self.quota.consume(self.requests_per_poll)
+        delay = self.backoff.failure()
+        return max(delay, self.quota.pace(self.requests_per_poll))
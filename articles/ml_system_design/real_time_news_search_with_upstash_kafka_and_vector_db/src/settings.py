@@ -1,6 +1,7 @@
 """Application Settings"""
 
 from pydantic_settings import SettingsConfigDict, BaseSettings
+from typing import Dict
 import os
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -21,19 +22,71 @@ class AppSettings(BaseSettings):
     UPSTASH_VECTOR_RETRIES: int = 5
     UPSTASH_VECTOR_WAIT_INTERVAL: float = 0.1
     UPSTASH_VECTOR_UPSERT_BATCH_SIZE: int = 2
+    UPSTASH_VECTOR_NAMESPACE: str = ""  # Namespace the pipeline writes to, "" is the default one
+    UPSTASH_VECTOR_READ_ALIAS: str = "news"  # Alias of the namespace the UI reads from
     UPSTASH_KAFKA_SECURITY_PROTOCOL: str = "SASL_SSL"
     UPSTASH_KAFKA_SASL_MECHANISM: str = "SCRAM-SHA-256"
 
+    KAFKA_PRODUCER_MODE: str = "per_article"  # "per_article" or "batch"
+    KAFKA_LINGER_MS: int = 50
+    KAFKA_BATCH_SIZE: int = 65536  # bytes
+    KAFKA_COMPRESSION_TYPE: str = "lz4"  # "gzip", "snappy", "lz4", "zstd" or "" for none
+    KAFKA_WIRE_FORMAT: str = "msgpack"  # "msgpack" or "json"
+    KAFKA_WIRE_COMPRESSION: bool = False
+    KAFKA_TRUSTED_DECODE: bool = True  # Skip re-cleaning documents sent in the wire format
+
     NEWSAPI_KEY: str
     NEWSDATAIO_KEY: str
     NEWS_TOPIC: str
     ARTICLES_BATCH_SIZE: int = 5
 
-    FETCH_WAIT_WINDOW: int = 1800  # seconds (30 minutes)
+    FETCH_WAIT_WINDOW: int = 1800  # seconds (30 minutes), the longest wait between two polls
+    FETCH_MIN_INTERVAL: int = 60  # seconds, the shortest wait between two polls
+    FETCH_RATE_SMOOTHING: float = 0.3  # weight of the latest poll in the arrival rate average
+    FETCH_DAILY_QUOTAS: Dict[str, int] = {  # requests per day, by fetch function (0 = unlimited)
+        "fetch_from_newsapi": 100,
+        "fetch_from_newsdataapi": 200,
+    }
+    NEWS_FETCHER: str = "async"  # "async" or "sync"
+    FETCH_MAX_PAGES: int = 3
+    FETCH_MAX_CONNECTIONS: int = 10
+    FETCH_HTTP_TIMEOUT: float = 30  # seconds
+
+    DEDUP_TTL: int = 172800  # seconds (48 hours)
+    DEDUP_MAX_ENTRIES: int = 50000
+    DEDUP_MAX_DISTANCE: int = 3  # bits out of the 64-bit SimHash
+    DEDUP_SHARDS: int = 16  # buckets per dedup stage, at least the number of workers
+
+    DEAD_LETTER_TOPIC: str = ""  # Empty writes the dead letters to DEAD_LETTER_PATH
+    DEAD_LETTER_PATH: str = os.path.join(dir_path, "..", "dead_letters")
+    METRICS_PORT: int = 0  # 0 disables the Prometheus metrics server
+
+    PIPELINE_WORKERS_PER_PROCESS: int = 1
+    PIPELINE_RECOVERY_DIRECTORY: str = ""  # Empty disables recovery snapshots
+    PIPELINE_SNAPSHOT_INTERVAL: int = 30  # seconds
+    PIPELINE_BACKUP_INTERVAL: int = 0  # seconds
+
+    UI_QUERY_CACHE_SIZE: int = 256  # queries
+    UI_RESULTS_CACHE_TTL: int = 60  # seconds
+    UI_THUMBNAIL_WORKERS: int = 10
+    UI_THUMBNAIL_TIMEOUT: float = 5  # seconds
+    UI_THUMBNAIL_MEMORY_CACHE_BYTES: int = 32 * 1024 * 1024
+    UI_THUMBNAIL_CACHE_DIR: str = ""  # Empty keeps the thumbnails in memory only
+    UI_THUMBNAIL_DISK_CACHE_BYTES: int = 256 * 1024 * 1024
 
     EMBEDDING_MODEL_ID: str = "sentence-transformers/all-MiniLM-L6-v2"
     EMBEDDING_MODEL_MAX_INPUT_LENGTH: int = 384
     EMBEDDING_MODEL_DEVICE: str = "cpu"
+    # "cls" or "mean". all-MiniLM-L6-v2 was trained with mean pooling, but switching the pooling
+    # of an existing index requires re-embedding it.
+    EMBEDDING_MODEL_POOLING: str = "cls"
+    EMBEDDING_MODEL_NORMALIZE: bool = True  # L2 normalize, cosine similarity is unaffected
+    EMBEDDING_MODEL_DTYPE: str = "float32"  # or "float16"
+    CHUNK_OVERLAP_TOKENS: int = 32
+
+    REINDEX_BATCH_SIZE: int = 64  # vectors
+    REINDEX_WORKERS: int = 4  # concurrent upserts
+    REINDEX_PROGRESS_DIR: str = os.path.join(dir_path, "..", "reindex_progress")
 
 
 settings = AppSettings()
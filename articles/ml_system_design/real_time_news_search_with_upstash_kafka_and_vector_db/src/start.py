@@ -1,12 +1,73 @@
 """
     This script represents the Bytewax Flow entrypoint.
     To be ran with: poetry run python -m bytewax.run start:flow
+    or, in production, with multiple workers and recovery snapshots:
+        poetry run python -m src.start --workers_per_process=4 --recovery_directory=recovery
 """
 
-from bytewax.testing import run_main
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+import fire
+from bytewax.recovery import RecoveryConfig, init_db_dir
+from bytewax.run import cli_main
+
+from consumer import get_topic_partition_count
 from flow import build as build_flow
+from logger import get_logger
+from metrics import start_metrics_server
+from settings import settings
+
+logger = get_logger(__name__)
 
 flow = build_flow()
 
+
+def run(
+    workers_per_process: int = settings.PIPELINE_WORKERS_PER_PROCESS,
+    process_id: Optional[int] = None,
+    addresses: Optional[str] = None,
+    recovery_directory: str = settings.PIPELINE_RECOVERY_DIRECTORY,
+    snapshot_interval: int = settings.PIPELINE_SNAPSHOT_INTERVAL,
+    backup_interval: int = settings.PIPELINE_BACKUP_INTERVAL,
+) -> None:
+    """
+    Runs the dataflow on `workers_per_process` workers in this process.
+    Each Kafka topic partition is consumed by exactly one worker, so more workers than
+    partitions would idle. For a multi-process cluster pass the same `addresses`
+    (separated by semicolon) to every process, each with its own `process_id`.
+    """
+    addresses = addresses.split(";") if addresses else None
+    workers = workers_per_process * (len(addresses) if addresses else 1)
+    partitions = get_topic_partition_count()
+    if partitions is not None and workers > partitions:
+        logger.warning(
+            f"{workers} workers for {partitions} topic partitions: {workers - partitions} workers will idle."
+        )
+
+    recovery_config = None
+    if recovery_directory:
+        db_dir = Path(recovery_directory)
+        if not db_dir.exists():
+            db_dir.mkdir(parents=True)
+            init_db_dir(db_dir, workers)
+            logger.info(f"Initialized {workers} recovery partitions in {db_dir}.")
+        recovery_config = RecoveryConfig(
+            db_dir, backup_interval=timedelta(seconds=backup_interval)
+        )
+
+    start_metrics_server()
+    logger.info(f"Starting dataflow with {workers} workers.")
+    cli_main(
+        flow,
+        workers_per_process=workers_per_process,
+        process_id=process_id,
+        addresses=addresses,
+        epoch_interval=timedelta(seconds=snapshot_interval),
+        recovery_config=recovery_config,
+    )
+
+
 if __name__ == "__main__":
-    run_main(flow)
+    fire.Fire(run)
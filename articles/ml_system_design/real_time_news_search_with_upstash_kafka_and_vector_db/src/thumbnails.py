@@ -0,0 +1,154 @@
+"""
+    Concurrent, cached thumbnail loading for the search results of the Streamlit UI.
+        - Images are downloaded in parallel over one pooled requests.Session, with timeouts.
+        - Resized thumbnails are kept as JPEG bytes in a byte-bounded LRU cache keyed by URL,
+          optionally backed by a byte-bounded directory on disk.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from logger import get_logger
+from settings import settings
+
+logger = get_logger(__name__)
+
+
+class ByteLRUCache:
+    """A thread-safe LRU cache evicting the least recently used entries above `max_bytes`."""
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if len(value) > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class ThumbnailLoader:
+    """
+    Downloads and resizes the thumbnails of the search results.
+
+    Args:
+        size (Tuple[int, int]): The (width, height) thumbnails are resized to.
+        max_workers (int): Number of concurrent downloads, also the connection pool size.
+        timeout (float): Connect/read timeout of a download, in seconds.
+        memory_cache_bytes (int): Size bound of the in-memory cache.
+        cache_dir (Optional[Path]): Directory of the on-disk cache, None to disable it.
+        disk_cache_bytes (int): Size bound of the on-disk cache.
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int] = (200, 300),
+        max_workers: int = settings.UI_THUMBNAIL_WORKERS,
+        timeout: float = settings.UI_THUMBNAIL_TIMEOUT,
+        memory_cache_bytes: int = settings.UI_THUMBNAIL_MEMORY_CACHE_BYTES,
+        cache_dir: Optional[Path] = None,
+        disk_cache_bytes: int = settings.UI_THUMBNAIL_DISK_CACHE_BYTES,
+    ):
+        self._size = size
+        self._timeout = timeout
+        self._memory_cache = ByteLRUCache(memory_cache_bytes)
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+        self._disk_cache_bytes = disk_cache_bytes
+        if self._cache_dir:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="thumbnails"
+        )
+
+    def load_many(self, urls: List[Optional[str]]) -> List[Optional[bytes]]:
+        """Load the thumbnails of all URLs concurrently, None for the ones that failed."""
+        return list(self._executor.map(self.load, urls))
+
+    def load(self, url: Optional[str]) -> Optional[bytes]:
+        """Returns the thumbnail of the image at `url` as JPEG bytes, or None if it can't be loaded."""
+        if not url or url == "N/A":
+            return None
+
+        thumbnail = self._memory_cache.get(url)
+        if thumbnail is None:
+            thumbnail = self._read_disk_cache(url)
+            if thumbnail is None:
+                thumbnail = self._download(url)
+                if thumbnail is None:
+                    return None
+                self._write_disk_cache(url, thumbnail)
+            self._memory_cache.put(url, thumbnail)
+        return thumbnail
+
+    def _download(self, url: str) -> Optional[bytes]:
+        try:
+            response = self._session.get(url, timeout=self._timeout)
+            response.raise_for_status()
+            image = Image.open(BytesIO(response.content)).convert("RGB")
+            buffer = BytesIO()
+            image.resize(self._size).save(buffer, format="JPEG", quality=85)
+            return buffer.getvalue()
+        except Exception as e:
+            logger.warning(f"Failed to load thumbnail {url}: {e}")
+            return None
+
+    def _cache_path(self, url: str) -> Path:
+        return self._cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.jpg"
+
+    def _read_disk_cache(self, url: str) -> Optional[bytes]:
+        if not self._cache_dir:
+            return None
+        try:
+            return self._cache_path(url).read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk_cache(self, url: str, thumbnail: bytes) -> None:
+        if not self._cache_dir:
+            return
+        try:
+            self._cache_path(url).write_bytes(thumbnail)
+            self._prune_disk_cache()
+        except OSError as e:
+            logger.warning(f"Failed to cache thumbnail {url} on disk: {e}")
+
+    def _prune_disk_cache(self) -> None:
+        """Remove the least recently written thumbnails until the cache fits `disk_cache_bytes`."""
+        files = sorted(self._cache_dir.glob("*.jpg"), key=lambda f: f.stat().st_mtime)
+        total = sum(f.stat().st_size for f in files)
+        for file in files:
+            if total <= self._disk_cache_bytes:
+                break
+            total -= file.stat().st_size
+            file.unlink(missing_ok=True)
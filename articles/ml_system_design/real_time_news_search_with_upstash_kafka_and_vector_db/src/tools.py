@@ -1,13 +1,16 @@
+import asyncio
 import datetime
 import functools
 import logging
-from typing import Callable, Dict, List
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+import aiohttp
 from newsapi import NewsApiClient
 from newsdataapi import NewsDataApiClient
 from pydantic import ValidationError
 
-from models import NewsAPIModel, NewsDataIOModel
+from models import CommonDocument, NewsAPIModel, NewsDataIOModel
 from settings import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -19,9 +22,10 @@ def handle_article_fetching(func: Callable) -> Callable:
     """
     Decorator to handle exceptions for article fetching functions.
 
-    This decorator wraps article fetching functions to catch and log any exceptions
-    that occur during the fetching process. If an error occurs, it logs the error
-    and returns an empty list.
+    This decorator wraps article fetching functions to log any exceptions that occur
+    during the fetching process. The exception is then re-raised, so that the
+    KafkaProducerThread backs off the failing source instead of polling it again
+    as if it had no new articles.
 
     Args:
         func (Callable): The article fetching function to wrap.
@@ -36,10 +40,11 @@ def handle_article_fetching(func: Callable) -> Callable:
             return func(*args, **kwargs)
         except ValidationError as e:
             logger.error(f"Validation error while processing articles: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error fetching data from source: {e}")
             logger.exception(e)
-        return []
+            raise
 
     return wrapper
 
@@ -79,6 +84,8 @@ class NewsFetcher:
         sources: Returns a list of callable fetch functions.
     """
 
+    requests_per_fetch = 1
+
     def __init__(self):
         self._newsapi = NewsApiClient(api_key=settings.NEWSAPI_KEY)
         self._newsdataapi = NewsDataApiClient(apikey=settings.NEWSDATAIO_KEY)
@@ -90,7 +97,7 @@ class NewsFetcher:
         response = self._newsapi.get_everything(
             q=settings.NEWS_TOPIC,
             language="en",
-            page=settings.ARTICLES_BATCH_SIZE,
+            page=1,
             page_size=settings.ARTICLES_BATCH_SIZE,
         )
         return [
@@ -115,3 +122,231 @@ class NewsFetcher:
     def sources(self) -> List[callable]:
         """List of news fetching functions."""
         return [self.fetch_from_newsapi, self.fetch_from_newsdataapi]
+
+    def close(self) -> None:
+        """Nothing to release, kept for parity with AsyncNewsFetcher."""
+
+
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWSDATA_URL = "https://newsdata.io/api/1/news"
+
+
+class AsyncNewsFetcher:
+    """
+    An asyncio based alternative to NewsFetcher.
+
+    Every source fetches up to `settings.FETCH_MAX_PAGES` pages per call over one pooled
+    aiohttp session and only keeps the articles newer than its high-water mark, the latest
+    `published_at` it has already returned:
+        - NewsAPI pages are requested with `from=<high-water mark>`, the first one alone to learn
+          the number of results, then the remaining ones concurrently.
+        - NewsData only supports cursor paging, so its pages are requested one after the other,
+          stopping at the first page that reaches the high-water mark.
+    Both APIs return the newest articles first. When the pages of a call stop short of the
+    high-water mark, the mark stays put and the next call resumes paging where this one stopped
+    (NewsAPI within `to=<newest article of the backlog>`), so that no article is skipped. The mark
+    only moves to the newest article once the fetch reached it. The first call of a source has no
+    mark to reach, the newest articles set it.
+    Responses carrying an ETag are revalidated with If-None-Match, a 304 yields no articles.
+
+    The event loop runs on a background thread, so `sources` returns plain callables
+    that can be used by the KafkaProducerThreads exactly like NewsFetcher's.
+
+    Methods:
+        fetch_from_newsapi(): Fetches new articles from NewsAPI.
+        fetch_from_newsdataapi(): Fetches new articles from NewsDataAPI.
+        sources: Returns a list of callable fetch functions.
+        close(): Closes the HTTP session and stops the event loop.
+    """
+
+    requests_per_fetch = settings.FETCH_MAX_PAGES  # upper bound, charged to the daily quotas
+
+    def __init__(self, newsapi_url: str = NEWSAPI_URL, newsdata_url: str = NEWSDATA_URL):
+        self._newsapi_url = newsapi_url
+        self._newsdata_url = newsdata_url
+        self._high_water_marks: Dict[str, Tuple[str, Set[str]]] = {}
+        # The newest article (and the URLs published then) and the next page of unfinished fetches.
+        self._backlogs: Dict[str, Tuple[str, Set[str], Any]] = {}
+        self._etags: Dict[str, str] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    @handle_article_fetching
+    def fetch_from_newsapi(self) -> List[CommonDocument]:
+        """Fetch the articles published since the last call from NewsAPI."""
+        return self._run(self._fetch_newsapi())
+
+    @handle_article_fetching
+    def fetch_from_newsdataapi(self) -> List[CommonDocument]:
+        """Fetch the articles published since the last call from NewsDataAPI."""
+        return self._run(self._fetch_newsdata())
+
+    @property
+    def sources(self) -> List[callable]:
+        """List of news fetching functions."""
+        return [self.fetch_from_newsapi, self.fetch_from_newsdataapi]
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout=settings.FETCH_HTTP_TIMEOUT * settings.FETCH_MAX_PAGES)
+
+    async def _get(self, url: str, params: Dict[str, Any], headers: Dict[str, str]) -> Optional[Dict]:
+        """GET a JSON document, returns None if the server answered 304 Not Modified."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.FETCH_MAX_CONNECTIONS),
+                timeout=aiohttp.ClientTimeout(total=settings.FETCH_HTTP_TIMEOUT),
+                raise_for_status=True,
+            )
+
+        cache_key = f"{url}?{sorted(params.items())}"
+        headers = dict(headers)
+        if cache_key in self._etags:
+            headers["If-None-Match"] = self._etags[cache_key]
+
+        async with self._session.get(url, params=params, headers=headers) as response:
+            if response.status == 304:
+                return None
+            if "ETag" in response.headers:
+                self._etags[cache_key] = response.headers["ETag"]
+            return await response.json()
+
+    async def _fetch_newsapi(self) -> List[CommonDocument]:
+        params = {
+            "q": settings.NEWS_TOPIC,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": settings.ARTICLES_BATCH_SIZE,
+        }
+        high_water_mark = self._high_water_marks.get("newsapi")
+        if high_water_mark:
+            params["from"] = high_water_mark[0].replace(" ", "T")
+        backlog = self._backlogs.get("newsapi")
+        if backlog:
+            # Articles published since the backlog started would shift its pages.
+            params["to"] = backlog[0].replace(" ", "T")
+        start = backlog[2] if backlog else 1
+        headers = {"X-Api-Key": settings.NEWSAPI_KEY}
+
+        # The first page tells how many results there are, so no request is spent on empty pages.
+        first = await self._get(self._newsapi_url, {**params, "page": start}, headers)
+        if not first:
+            return []
+        total_pages = -(-first.get("totalResults", 0) // settings.ARTICLES_BATCH_SIZE)
+        last = min(total_pages, start + settings.FETCH_MAX_PAGES - 1)
+        responses = [first] + await asyncio.gather(
+            *(
+                self._get(self._newsapi_url, {**params, "page": page}, headers)
+                for page in range(start + 1, last + 1)
+            ),
+            return_exceptions=True,
+        )
+
+        articles = []
+        complete = True
+        for page, response in enumerate(responses, start=start):
+            if isinstance(response, Exception):
+                logger.warning(f"NewsAPI page {page} failed: {response}")
+                complete = False
+            elif response:
+                articles.extend(
+                    NewsAPIModel(**article).to_common()
+                    for article in response.get("articles", [])
+                )
+
+        new_articles = self._newer_than_high_water_mark("newsapi", articles)
+        # After a failed page, the same pages are requested again on the next call.
+        if complete:
+            self._advance_high_water_mark(
+                "newsapi", new_articles, next_page=last + 1 if last < total_pages else None
+            )
+        return new_articles
+
+    async def _fetch_newsdata(self) -> List[CommonDocument]:
+        params = {
+            "apikey": settings.NEWSDATAIO_KEY,
+            "q": settings.NEWS_TOPIC,
+            "language": "en",
+            "size": settings.ARTICLES_BATCH_SIZE,
+        }
+        high_water_mark = self._high_water_marks.get("newsdata", ("", set()))[0]
+        backlog = self._backlogs.get("newsdata")
+        if backlog:
+            params["page"] = backlog[2]
+
+        articles = []
+        next_page = None
+        for _ in range(settings.FETCH_MAX_PAGES):
+            response = await self._get(self._newsdata_url, params, headers={})
+            if not response:
+                break
+            page = [
+                NewsDataIOModel(**article).to_common()
+                for article in response.get("results", [])
+            ]
+            articles.extend(page)
+            # Results are sorted by most recent, so the next pages are all older.
+            next_page = response.get("nextPage")
+            if not next_page or any(article.published_at <= high_water_mark for article in page):
+                next_page = None
+                break
+            params = {**params, "page": next_page}
+
+        new_articles = self._newer_than_high_water_mark("newsdata", articles)
+        self._advance_high_water_mark("newsdata", new_articles, next_page=next_page)
+        return new_articles
+
+    def _newer_than_high_water_mark(
+        self, source: str, articles: List[CommonDocument]
+    ) -> List[CommonDocument]:
+        """
+        Keep the articles not returned before. Articles published exactly at the high-water mark
+        are told apart by their URL, as several can share the same (second precision) timestamp.
+        """
+        high_water_mark, seen_urls = self._high_water_marks.get(source, ("", set()))
+        return [
+            article
+            for article in articles
+            if article.published_at > high_water_mark
+            or (article.published_at == high_water_mark and article.url not in seen_urls)
+        ]
+
+    def _advance_high_water_mark(
+        self, source: str, articles: List[CommonDocument], next_page: Any = None
+    ) -> None:
+        """
+        Record the articles returned by a fetch. The high-water mark moves to the newest article
+        returned since the mark was last reached, unless the fetch stopped at `next_page` before
+        reaching it: the fetch is then kept as a backlog, resumed by the next call.
+        """
+        high_water_mark, seen_urls = self._high_water_marks.get(source, ("", set()))
+        newest, newest_urls, _ = self._backlogs.pop(source, (high_water_mark, set(seen_urls), None))
+        for article in articles:
+            if article.published_at > newest:
+                newest, newest_urls = article.published_at, set()
+            if article.published_at == newest:
+                newest_urls.add(article.url)
+
+        if next_page is None or not high_water_mark:
+            self._high_water_marks[source] = (newest, newest_urls)
+        else:
+            logger.info(f"{source} fetch stopped before the high-water mark, resuming at page {next_page}")
+            self._backlogs[source] = (newest, newest_urls, next_page)
+
+
+def build_news_fetcher():
+    """Returns the fetcher selected by settings.NEWS_FETCHER."""
+    if settings.NEWS_FETCHER == "async":
+        return AsyncNewsFetcher()
+    if settings.NEWS_FETCHER == "sync":
+        return NewsFetcher()
+    raise ValueError(f"Unknown news fetcher: {settings.NEWS_FETCHER}")
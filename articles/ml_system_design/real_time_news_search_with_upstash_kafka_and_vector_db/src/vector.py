@@ -21,6 +21,8 @@ class UpstashVectorOutput(DynamicSink):
         collection_name (str, optional): The name of the collection.
             Defaults to constants.VECTOR_DB_OUTPUT_COLLECTION_NAME.
         client (Optional[UpstashClient], optional): The Upstash client. Defaults to None.
+        namespace (str, optional): The namespace (index version) to write to.
+            Defaults to settings.UPSTASH_VECTOR_NAMESPACE.
     """
 
     def __init__(
@@ -28,9 +30,11 @@ class UpstashVectorOutput(DynamicSink):
         vector_size: int = settings.EMBEDDING_MODEL_MAX_INPUT_LENGTH,
         collection_name: str = settings.UPSTASH_VECTOR_TOPIC,
         client: Optional[Index] = None,
+        namespace: str = settings.UPSTASH_VECTOR_NAMESPACE,
     ):
         self._collection_name = collection_name
         self._vector_size = vector_size
+        self._namespace = namespace
 
         if client:
             self.client = client
@@ -45,7 +49,7 @@ class UpstashVectorOutput(DynamicSink):
     def build(
         self, step_id: str, worker_index: int, worker_count: int
     ) -> StatelessSinkPartition:
-        return UpstashVectorSink(self.client, self._collection_name)
+        return UpstashVectorSink(self.client, self._collection_name, self._namespace)
 
 
 class UpstashVectorSink(StatelessSinkPartition):
@@ -58,15 +62,18 @@ class UpstashVectorSink(StatelessSinkPartition):
         client (Index): The Upstash Vector client to use for writing.
         collection_name (str, optional): The name of the collection to write to.
             Defaults to the value of the UPSTASH_VECTOR_TOPIC environment variable.
+        namespace (str, optional): The namespace (index version) to write to.
     """
 
     def __init__(
         self,
         client: Index,
         collection_name: str = None,
+        namespace: str = settings.UPSTASH_VECTOR_NAMESPACE,
     ):
         self._client = client
         self._collection_name = collection_name
+        self._namespace = namespace
         self._upsert_batch_size = settings.UPSTASH_VECTOR_UPSERT_BATCH_SIZE
 
     def write_batch(self, documents: List[EmbeddedDocument]):
@@ -76,8 +83,15 @@ class UpstashVectorSink(StatelessSinkPartition):
         Args:
             documents (List[EmbeddedDocument]): The documents to write.
         """
+        # One vector per chunk, the article it belongs to is kept in the metadata. The chunk text
+        # is stored as the vector data, for src.reindex to re-embed it.
         vectors = [
-            Vector(id=doc.doc_id, vector=doc.embeddings, metadata=doc.metadata)
+            Vector(
+                id=doc.chunk_id,
+                vector=doc.embeddings,
+                metadata={**doc.metadata, "doc_id": doc.doc_id},
+                data=doc.text,
+            )
             for doc in documents
         ]
 
@@ -85,6 +99,6 @@ class UpstashVectorSink(StatelessSinkPartition):
         for i in range(0, len(vectors), self._upsert_batch_size):
             batch_vectors = vectors[i : i + self._upsert_batch_size]
             try:
-                self._client.upsert(vectors=batch_vectors)
+                self._client.upsert(vectors=batch_vectors, namespace=self._namespace)
             except Exception as e:
                 logger.error(f"Caught an exception during batch upsert {e}")
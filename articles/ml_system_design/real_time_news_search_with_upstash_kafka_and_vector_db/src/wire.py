@@ -0,0 +1,99 @@
+"""
+    Compact binary wire format for CommonDocument batches sent over Kafka.
+
+    Layout of a message value:
+        MAGIC (2 bytes) | VERSION (1 byte) | FLAGS (1 byte) | body
+    where body is a msgpack array of rows, each row being the document fields in `FIELDS` order
+    (optionally zlib compressed when FLAGS has FLAG_ZLIB set).
+
+    Messages produced before the wire format existed are plain JSON arrays, which is why the
+    consumer checks `is_wire_format` before falling back to JSON.
+"""
+
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+import msgpack
+import orjson
+
+from settings import settings
+
+MAGIC = b"NW"
+VERSION = 1
+FLAG_ZLIB = 0x01
+HEADER_SIZE = len(MAGIC) + 2
+
+# Version 1 schema: the order of the CommonDocument fields within a row.
+FIELDS = (
+    "article_id",
+    "title",
+    "url",
+    "published_at",
+    "source_name",
+    "image_url",
+    "author",
+    "description",
+    "content",
+)
+
+
+class WireFormatError(ValueError):
+    """Raised when a message value is not a valid wire format payload."""
+
+
+def encode_batch(payloads: List[Dict[str, Any]], compress: bool = False) -> bytes:
+    """Encode a list of CommonDocument payloads (see `CommonDocument.to_kafka_payload`)."""
+    body = msgpack.packb(
+        [[payload.get(field) for field in FIELDS] for payload in payloads],
+        use_bin_type=True,
+    )
+    flags = 0
+    if compress:
+        body = zlib.compress(body)
+        flags |= FLAG_ZLIB
+    return MAGIC + bytes((VERSION, flags)) + body
+
+
+def is_wire_format(data: Optional[bytes]) -> bool:
+    return data is not None and data[: len(MAGIC)] == MAGIC
+
+
+def decode_batch(data: bytes) -> List[list]:
+    """Decode a wire format message value into its rows. See `row_to_payload`."""
+    if not is_wire_format(data) or len(data) < HEADER_SIZE:
+        raise WireFormatError("Missing wire format header.")
+
+    version, flags = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version != VERSION:
+        raise WireFormatError(f"Unsupported wire format version: {version}")
+
+    body = data[HEADER_SIZE:]
+    try:
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        rows = msgpack.unpackb(body, raw=False)
+    except (zlib.error, ValueError, msgpack.UnpackException) as e:
+        raise WireFormatError(f"Corrupted wire format body: {e}") from e
+
+    if not isinstance(rows, list):
+        raise WireFormatError(f"Expected a list of rows, got {type(rows).__name__}")
+    return rows
+
+
+def row_to_payload(row: list) -> Dict[str, Any]:
+    """Map a decoded row back to a CommonDocument payload."""
+    if not isinstance(row, list) or len(row) != len(FIELDS):
+        raise WireFormatError(f"Expected a row of {len(FIELDS)} fields, got {row!r}")
+    return dict(zip(FIELDS, row))
+
+
+def build_value_serializer(
+    wire_format: str = settings.KAFKA_WIRE_FORMAT,
+    compress: bool = settings.KAFKA_WIRE_COMPRESSION,
+) -> Callable[[List[Dict[str, Any]]], bytes]:
+    """Returns the Kafka producer value serializer for the configured wire format."""
+    if wire_format == "msgpack":
+        return lambda payloads: encode_batch(payloads, compress=compress)
+    if wire_format == "json":
+        return orjson.dumps
+    raise ValueError(f"Unknown wire format: {wire_format}")
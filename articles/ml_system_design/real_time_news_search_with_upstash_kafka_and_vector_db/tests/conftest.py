@@ -0,0 +1,48 @@
+"""
+    Shared fixtures: a tiny randomly initialized BERT model, so that no model is downloaded.
+"""
+
+import pytest
+import torch
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from src.embeddings import SingletonMeta, TextEmbedder
+
+WORDS = ["news", "market", "rally", "today", "stocks", "rise", "fall", "the", "a", "of"]
+
+
+@pytest.fixture(scope="session")
+def model_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tiny-bert")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "."] + WORDS
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(str(path / "vocab.txt")).save_pretrained(path)
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(path)
+    return path
+
+
+@pytest.fixture
+def make_embedder(model_dir):
+    """Builds a TextEmbedder over the tiny model, dropping the singletons afterwards."""
+
+    def make(**kwargs) -> TextEmbedder:
+        return TextEmbedder(
+            model_id=str(model_dir), max_input_length=64, token_limit=16, **kwargs
+        )
+
+    yield make
+    SingletonMeta._instances.clear()
+
+
+@pytest.fixture
+def embedder(make_embedder):
+    return make_embedder()
@@ -0,0 +1,191 @@
+"""
+    This module contains tests for the AsyncNewsFetcher defined in upstash_ingest.tools,
+    served by a local aiohttp server standing in for the NewsAPI and NewsData APIs.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from src.tools import AsyncNewsFetcher
+
+
+def _newsapi_article(index: int, published_at: str) -> dict:
+    return {
+        "source": {"id": None, "name": "News18"},
+        "author": "News18",
+        "title": f"Article {index}",
+        "description": f"Description {index}",
+        "url": f"https://www.news18.com/article-{index}.html",
+        "urlToImage": None,
+        "publishedAt": published_at,
+        "content": f"Content {index}",
+    }
+
+
+def _newsdata_article(index: int, published_at: str) -> dict:
+    return {
+        "article_id": f"article-{index}",
+        "title": f"Article {index}",
+        "link": f"https://www.livemint.com/article-{index}.html",
+        "description": f"Description {index}",
+        "pubDate": published_at,
+        "source_id": "livemint",
+        "source_url": "https://www.livemint.com",
+        "source_icon": None,
+        "creator": None,
+        "image_url": None,
+        "content": f"Content {index}",
+    }
+
+
+class FakeNewsServer:
+    def __init__(self):
+        self.requests = []
+        self.articles = [_newsapi_article(i, "2024-03-14T12:18:27Z") for i in range(12)]
+        self.newsdata_articles = []
+
+    async def newsapi(self, request: web.Request) -> web.Response:
+        self.requests.append(dict(request.query))
+        page, size = int(request.query["page"]), int(request.query["pageSize"])
+        since, until = request.query.get("from", ""), request.query.get("to", "9999")
+        articles = sorted(
+            (article for article in self.articles if since <= article["publishedAt"][:19] <= until),
+            key=lambda article: article["publishedAt"],
+            reverse=True,
+        )
+        return web.json_response(
+            {
+                "totalResults": len(articles),
+                "articles": articles[(page - 1) * size : page * size],
+            }
+        )
+
+    async def newsdata_pages(self, request: web.Request) -> web.Response:
+        """Pages of `newsdata_articles`, newest first, the cursor is the index of the next article."""
+        self.requests.append(dict(request.query))
+        start, size = int(request.query.get("page", 0)), int(request.query["size"])
+        articles = sorted(self.newsdata_articles, key=lambda article: article["pubDate"], reverse=True)
+        end = start + size
+        return web.json_response(
+            {"results": articles[start:end], "nextPage": str(end) if end < len(articles) else None}
+        )
+
+    async def newsdata(self, request: web.Request) -> web.Response:
+        self.requests.append(dict(request.query))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(
+            {"results": [_newsdata_article(0, "2024-03-15 01:42:57")], "nextPage": None},
+            headers={"ETag": '"v1"'},
+        )
+
+
+@pytest.fixture
+def server():
+    fake = FakeNewsServer()
+    app = web.Application()
+    app.router.add_get("/v2/everything", fake.newsapi)
+    app.router.add_get("/api/1/news", fake.newsdata)
+    app.router.add_get("/api/1/latest", fake.newsdata_pages)
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    fake.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    yield fake
+
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_only_new_articles_are_returned(server):
+    fetcher = AsyncNewsFetcher(newsapi_url=f"{server.url}/v2/everything")
+    try:
+        first = fetcher.fetch_from_newsapi()
+        second = fetcher.fetch_from_newsapi()
+    finally:
+        fetcher.close()
+
+    assert len({article.url for article in first}) == len(server.articles)
+    assert second == []
+    assert server.requests[-1]["from"] == "2024-03-14T12:18:27"
+
+
+def test_articles_past_the_page_cap_are_fetched_by_the_next_calls(server):
+    server.articles = server.articles[:2]
+    fetcher = AsyncNewsFetcher(newsapi_url=f"{server.url}/v2/everything")
+    try:
+        fetcher.fetch_from_newsapi()
+        # 20 articles published since the last call, more than the 3 pages of 5 of a call.
+        server.articles += [_newsapi_article(100 + i, f"2024-03-15T10:{i:02d}:00Z") for i in range(20)]
+        server.requests.clear()
+
+        second = fetcher.fetch_from_newsapi()
+        third = fetcher.fetch_from_newsapi()
+        fourth = fetcher.fetch_from_newsapi()
+    finally:
+        fetcher.close()
+
+    assert len(second) == 15
+    assert len(third) == 5
+    assert {article.url for article in second + third} == {
+        f"https://www.news18.com/article-{100 + i}.html" for i in range(20)
+    }
+    assert fourth == []
+    # The window of the backlog starts at the previous mark, its 2 articles are not returned again.
+    assert [request["page"] for request in server.requests] == ["1", "2", "3", "4", "5", "1"]
+    assert server.requests[3]["from"] == "2024-03-14T12:18:27"
+    assert server.requests[3]["to"] == "2024-03-15T10:19:00"
+    assert server.requests[5]["from"] == "2024-03-15T10:19:00"
+    assert "to" not in server.requests[5]
+
+
+def test_newsdata_resumes_paging_until_the_high_water_mark(server):
+    server.newsdata_articles = [_newsdata_article(0, "2024-03-14 12:00:00")]
+    fetcher = AsyncNewsFetcher(newsdata_url=f"{server.url}/api/1/latest")
+    try:
+        fetcher.fetch_from_newsdataapi()
+        server.newsdata_articles += [_newsdata_article(1 + i, f"2024-03-15 10:{i:02d}:00") for i in range(20)]
+        server.requests.clear()
+
+        second = fetcher.fetch_from_newsdataapi()
+        third = fetcher.fetch_from_newsdataapi()
+        fourth = fetcher.fetch_from_newsdataapi()
+    finally:
+        fetcher.close()
+
+    assert len(second) == 15
+    assert {article.article_id for article in second + third} == {f"article-{1 + i}" for i in range(20)}
+    assert server.requests[3]["page"] == "15"
+    assert fourth == []
+
+
+def test_not_modified_response_yields_no_articles(server):
+    fetcher = AsyncNewsFetcher(newsdata_url=f"{server.url}/api/1/news")
+    try:
+        first = fetcher.fetch_from_newsdataapi()
+        second = fetcher.fetch_from_newsdataapi()
+    finally:
+        fetcher.close()
+
+    assert [article.article_id for article in first] == ["article-0"]
+    assert second == []
+    assert len(server.requests) == 2
+
+
+def test_fetch_errors_are_raised(server):
+    fetcher = AsyncNewsFetcher(newsapi_url=f"{server.url}/v2/missing")
+    try:
+        with pytest.raises(Exception):
+            fetcher.fetch_from_newsapi()
+    finally:
+        fetcher.close()
@@ -0,0 +1,31 @@
+"""
+    This module contains tests for the token-aware chunking defined in upstash_ingest.chunking.
+"""
+
+import pytest
+from transformers import BertTokenizerFast
+
+from src.chunking import chunk_by_tokens
+
+from .conftest import WORDS
+
+
+def test_chunks_cover_the_text_with_overlap(model_dir):
+    tokenizer = BertTokenizerFast.from_pretrained(model_dir)
+    text = " ".join(WORDS * 5)
+
+    chunks = chunk_by_tokens(text, tokenizer, max_tokens=12, overlap=4)
+
+    assert all(len(chunk.token_ids) <= 12 for chunk in chunks)
+    assert [chunk.token_ids[:4] for chunk in chunks[1:]] == [
+        chunk.token_ids[-4:] for chunk in chunks[:-1]
+    ]
+    assert chunks[0].text.startswith("news market")
+    assert chunks[-1].text.endswith("a of")
+    assert tokenizer(chunks[1].text, add_special_tokens=False)["input_ids"] == chunks[1].token_ids
+
+
+def test_token_ids_embed_like_the_text(embedder):
+    chunk = chunk_by_tokens("stocks rise today. the market rally", embedder.tokenizer, 16)[0]
+
+    assert embedder.embed_token_ids(chunk.token_ids) == pytest.approx(embedder(chunk.text))
@@ -0,0 +1,71 @@
+"""
+    This module contains equivalence tests for the fast cleaners defined in upstash_ingest.cleaners,
+    against the `unstructured` cleaners and the `dateutil` parser they replace.
+"""
+
+import random
+
+import pytest
+from dateutil import parser
+from unstructured.cleaners.core import (
+    clean,
+    clean_non_ascii_chars,
+    remove_punctuation,
+    replace_unicode_quotes,
+)
+
+from src.cleaners import clean_full, parse_date
+
+ALPHABET = list("abcXYZ 019-–\xa0\n\t.,;:!?'\"*•●\xb7\x95\xe9“”$+<>_{}[]()@#%/\\") + [
+    "&apos;",
+    "\xe2\x80\x99",
+    "\xe2\x80",
+    " - ",
+]
+
+
+def _reference_clean_full(text: str) -> str:
+    text = clean(text=text, lowercase=True, extra_whitespace=True, dashes=True, bullets=True)
+    text = replace_unicode_quotes(text)
+    text = clean_non_ascii_chars(text)
+    return remove_punctuation(text)
+
+
+def _reference_parse_date(value: str):
+    try:
+        return parser.parse(value).strftime("%Y-%m-%d %H:%M:%S")
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def test_clean_full_matches_unstructured():
+    rng = random.Random(0)
+    texts = [
+        "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 30)))
+        for _ in range(20000)
+    ]
+    texts += [
+        "•  Top events of the day: PM Modi's Kerala visit – track it here!",
+        "Still Using Paytm FASTag? Here Is A Step-by-Step Guide - News18",
+        "It&apos;s “quoted”\xa0and\n\nspaced   out …",
+    ]
+
+    assert [clean_full(text) for text in texts] == [
+        _reference_clean_full(text) for text in texts
+    ]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2024-03-15 01:42:57",
+        "2024-03-14T12:18:27Z",
+        "2024-03-14T12:18:27.123+02:00",
+        "2024-03-14T12:18:27+0530",
+        "Thu, 14 Mar 2024 12:18:27 GMT",
+        "2024-02-30 00:00:00",
+        "not a date",
+    ],
+)
+def test_parse_date_matches_dateutil(value):
+    assert parse_date(value) == _reference_parse_date(value)
@@ -0,0 +1,48 @@
+"""
+    This module contains tests for the Kafka message processing defined in upstash_ingest.consumer.
+"""
+
+import json
+from datetime import datetime
+
+from bytewax.connectors.kafka import KafkaSourceMessage
+from faker import Faker
+
+from src.consumer import CommonDocument, DeadLetter, process_message
+
+fake = Faker()
+
+
+def _message(value: bytes, offset: int = 7) -> KafkaSourceMessage:
+    return KafkaSourceMessage(
+        key=None, value=value, topic="news", partition=0, offset=offset
+    )
+
+
+def _valid_document() -> dict:
+    return CommonDocument(
+        title=fake.sentence(),
+        url=fake.url(),
+        published_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        description=fake.paragraph(),
+    ).to_kafka_payload()
+
+
+def test_malformed_message_becomes_dead_letter():
+    results = process_message(_message(b"{not json", offset=42))
+
+    assert len(results) == 1
+    assert isinstance(results[0], DeadLetter)
+    assert results[0].reason == "malformed_json"
+    assert (results[0].partition, results[0].offset) == (0, 42)
+    assert results[0].payload == "{not json"
+
+
+def test_invalid_document_does_not_drop_valid_siblings():
+    batch = [_valid_document(), {"title": ["not", "a", "string"]}, _valid_document()]
+
+    results = process_message(_message(json.dumps(batch).encode("utf-8")))
+
+    assert [type(item) for item in results] == [CommonDocument, DeadLetter, CommonDocument]
+    assert results[1].reason == "invalid_document"
+    assert results[1].index == 1
@@ -0,0 +1,89 @@
+"""
+    This module contains tests for the cross-source deduplication defined in upstash_ingest.dedup.
+"""
+
+from datetime import datetime
+
+import bytewax.operators as op
+from bytewax.dataflow import Dataflow
+from bytewax.testing import TestingSink, TestingSource, run_main
+from faker import Faker
+
+from src import flow
+from src.dedup import DedupIndex, band_value, fingerprint_of, normalize_url
+from src.models import CommonDocument
+
+fake = Faker()
+
+
+def _document(title: str, url: str, description: str = "") -> CommonDocument:
+    return CommonDocument(
+        title=title,
+        url=url,
+        published_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        description=description,
+    )
+
+
+def test_normalize_url_ignores_tracking_params():
+    assert normalize_url(
+        "https://www.example.com/story/?utm_source=rss&id=3#comments"
+    ) == normalize_url("http://example.com/story?id=3")
+
+
+def test_same_story_from_two_sources_is_dropped():
+    index = DedupIndex(ttl=3600, max_entries=100)
+    description = fake.paragraph(nb_sentences=5)
+
+    assert index.check(_document("Markets rally", fake.url(), description), now=0) is None
+    assert index.check(_document("Markets rally!", fake.url(), description), now=1) == "near_duplicate"
+    assert index.check(_document(fake.sentence(), fake.url(), fake.paragraph()), now=2) is None
+
+
+def test_entries_expire_after_ttl():
+    index = DedupIndex(ttl=10, max_entries=100)
+    document = _document(fake.sentence(), "https://example.com/a")
+
+    assert index.check(document, now=0) is None
+    assert index.check(_document(fake.sentence(), "https://example.com/a"), now=5) == "url"
+    assert index.check(_document(fake.sentence(), "https://example.com/a"), now=20) is None
+    assert len(index) == 1
+
+
+def test_index_restricted_to_one_band_only_sees_that_band():
+    description = fake.paragraph(nb_sentences=5)
+    original = _document("Markets rally", fake.url(), description)
+    near_duplicate = _document("Markets rally!", fake.url(), description)
+    fingerprint = fingerprint_of(original)
+    shared_bands = [
+        band
+        for band in range(4)
+        if band_value(fingerprint, band, 4) == band_value(fingerprint_of(near_duplicate), band, 4)
+    ]
+    assert shared_bands
+
+    index = DedupIndex(ttl=3600, max_entries=100, bands=[shared_bands[0]], urls=False)
+    assert index.check(original, now=0, simhash_value=fingerprint) is None
+    assert index.check(near_duplicate, now=1) == "near_duplicate"
+    # Without URLs, the same link under another id is not a duplicate.
+    assert index.check(_document(fake.sentence(), original.url), now=2) is None
+
+
+def test_sharded_dedup_stages_drop_duplicates(monkeypatch):
+    monkeypatch.setattr(flow.settings, "DEDUP_SHARDS", 4)
+    description = fake.paragraph(nb_sentences=5)
+    documents = [
+        _document("Markets rally", "https://example.com/a", description),
+        _document("Markets rally!", "https://other.com/b", description),
+        _document(fake.sentence(), "https://www.example.com/a/?utm_source=rss", fake.paragraph()),
+    ] + [_document(fake.sentence(), fake.url(), fake.paragraph(nb_sentences=4)) for _ in range(20)]
+
+    dataflow = Dataflow("test_dedup")
+    stream = op.input("input", dataflow, TestingSource(documents))
+    output = []
+    op.output("output", flow._deduplicate(stream), TestingSink(output))
+    run_main(dataflow)
+
+    assert sorted(doc.article_id for doc in output) == sorted(
+        doc.article_id for doc in documents[:1] + documents[3:]
+    )
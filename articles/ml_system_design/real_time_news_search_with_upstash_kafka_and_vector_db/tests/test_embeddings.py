@@ -0,0 +1,31 @@
+"""
+    This module contains tests for the pooling, normalization and dtype options of
+    upstash_ingest.embeddings.TextEmbedder.
+"""
+
+import numpy as np
+import pytest
+
+TEXT = "stocks rise today. the market rally"
+
+
+@pytest.mark.parametrize("pooling", ["cls", "mean"])
+def test_embeddings_are_l2_normalized(make_embedder, pooling):
+    embedder = make_embedder(pooling=pooling, normalize=True)
+
+    embedding = np.array(embedder(TEXT))
+
+    assert np.linalg.norm(embedding) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_mean_pooling_differs_from_cls(make_embedder):
+    cls_embedding = make_embedder(pooling="cls", normalize=False)(TEXT)
+    mean_embedding = make_embedder(pooling="mean", normalize=False)(TEXT)
+
+    assert cls_embedding != pytest.approx(mean_embedding)
+
+
+def test_output_dtype(make_embedder):
+    embedding = make_embedder(dtype="float16")(TEXT, to_list=False)
+
+    assert embedding.dtype == np.float16
@@ -0,0 +1,26 @@
+"""
+    This module contains tests for the metadata filters defined in upstash_ingest.filters.
+"""
+
+import datetime
+
+from src.filters import build_filter, normalize_source_name, to_timestamp
+
+
+def test_source_names_are_normalized():
+    assert normalize_source_name("The Verge") == "the-verge"
+    assert normalize_source_name("  News18 ") == "news18"
+    assert normalize_source_name(None) == "unknown"
+
+
+def test_published_at_is_a_utc_timestamp():
+    assert to_timestamp("2024-03-15 00:00:00") == 1710460800
+    assert to_timestamp("2024-03-15T00:00:00Z") == 1710460800
+
+
+def test_filter_combines_date_window_and_sources():
+    assert build_filter() == ""
+    assert build_filter(
+        published_after=datetime.datetime(2024, 3, 15),
+        sources=["News18", "livemint", "news18"],
+    ) == "published_at_ts >= 1710460800 AND source_name IN ('livemint', 'news18')"
@@ -0,0 +1,65 @@
+"""
+    This module contains tests for the local Kafka stand-in defined in upstash_ingest.local_kafka.
+"""
+
+import json
+
+from src.local_kafka import (
+    LocalBroker,
+    LocalKafkaProducer,
+    LocalKafkaSource,
+    OFFSET_END,
+)
+
+
+def _producer(broker: LocalBroker) -> LocalKafkaProducer:
+    return LocalKafkaProducer(
+        broker,
+        value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        key_serializer=lambda k: k.encode("utf-8"),
+    )
+
+
+def test_producer_assigns_offsets_and_keyed_partitions():
+    broker = LocalBroker(num_partitions=3)
+    producer = _producer(broker)
+
+    first = producer.send("news", value={"i": 0}, key="newsapi").get()
+    second = producer.send("news", value={"i": 1}, key="newsapi").get()
+
+    assert first.partition == second.partition
+    assert (first.offset, second.offset) == (0, 1)
+    assert broker.topic("news").lag() == 2
+
+
+def test_source_reads_batches_and_resumes_from_snapshot():
+    broker = LocalBroker(num_partitions=1)
+    producer = _producer(broker)
+    for i in range(5):
+        producer.send("news", value=[{"i": i}], key="k")
+
+    source = LocalKafkaSource(broker, ["news"], tail=False, batch_size=2)
+    assert source.list_parts() == ["0-news"]
+
+    partition = source.build_part("kafka_input", "0-news", None)
+    batch = partition.next_batch()
+    assert [msg.offset for msg in batch] == [0, 1]
+    assert json.loads(batch[0].value) == [{"i": 0}]
+
+    resumed = source.build_part("kafka_input", "0-news", partition.snapshot())
+    assert [msg.offset for msg in resumed.next_batch()] == [2, 3]
+    assert broker.topic("news").lag() == 1
+
+
+def test_file_backed_topic_is_replayable(tmp_path):
+    producer = _producer(LocalBroker(num_partitions=2, path=tmp_path))
+    for i in range(4):
+        producer.send("news", value={"i": i}, key=str(i))
+
+    replayed = LocalBroker(num_partitions=2, path=tmp_path).topic("news")
+    assert sum(replayed.end_offset(p) for p in range(2)) == 4
+
+    source = LocalKafkaSource(
+        LocalBroker(num_partitions=2, path=tmp_path), ["news"], starting_offset=OFFSET_END
+    )
+    assert list(source.build_part("kafka_input", "0-news", None).next_batch()) == []
@@ -4,7 +4,7 @@
 """
 
 from datetime import datetime
-from src.models import CommonDocument, RefinedDocument
+from src.models import CommonDocument, NewsAPIModel, RefinedDocument
 from src.cleaners import clean_full, remove_html_tags
 from faker import Faker
 
@@ -57,3 +57,23 @@ def test_refined_document_from_common():
     assert refined_doc.doc_id == str(common_doc.article_id)
     assert refined_doc.metadata["title"] == common_doc.title
     assert refined_doc.metadata["url"] == common_doc.url
+
+
+def test_newsapi_articles_keep_their_id_across_fetches():
+    def fetched(url: str, source: str = "News18") -> CommonDocument:
+        return NewsAPIModel(
+            source={"id": None, "name": source},
+            author=None,
+            title=fake.sentence(),
+            description=fake.paragraph(),
+            url=url,
+            urlToImage=None,
+            publishedAt="2024-03-14T12:18:27Z",
+            content=None,
+        ).to_common()
+
+    url = fake.url()
+
+    assert fetched(url).article_id == fetched(url).article_id
+    assert fetched(url).article_id != fetched(fake.url()).article_id
+    assert fetched(url).article_id != fetched(url, source="Mint").article_id
@@ -0,0 +1,56 @@
+"""
+    This module contains tests for the KafkaProducerThread defined in upstash_ingest.producer.
+"""
+
+from datetime import datetime
+
+from bytewax.connectors.kafka import KafkaSourceMessage
+from faker import Faker
+
+from src.consumer import CommonDocument, process_message
+from src.local_kafka import LocalBroker, LocalKafkaProducer
+from src.producer import KafkaProducerThread
+from src.wire import build_value_serializer
+
+fake = Faker()
+
+
+def _document(source_name: str) -> CommonDocument:
+    return CommonDocument(
+        title=fake.sentence(),
+        url=fake.url(),
+        published_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        source_name=source_name,
+        description=fake.paragraph(),
+    )
+
+
+def test_articles_are_sent_as_keyed_records():
+    broker = LocalBroker(num_partitions=4)
+    producer = LocalKafkaProducer(
+        broker,
+        value_serializer=build_value_serializer(),
+        key_serializer=lambda key: key.encode("utf-8"),
+    )
+    documents = [_document("livemint"), _document("news18"), _document("livemint")]
+    thread = KafkaProducerThread(0, producer, "news", fetch_function=lambda: documents)
+
+    thread.send(documents)
+
+    topic = broker.topic("news")
+    records = [
+        record
+        for partition in range(topic.num_partitions)
+        for record in topic.read(partition, 0, 10)
+    ]
+    assert sorted(record.key.decode("utf-8") for record in records) == sorted(
+        doc.article_id for doc in documents
+    )
+    decoded = [
+        doc
+        for record in records
+        for doc in process_message(KafkaSourceMessage(key=record.key, value=record.value))
+    ]
+    assert sorted(doc.article_id for doc in decoded) == sorted(
+        doc.article_id for doc in documents
+    )
@@ -0,0 +1,141 @@
+"""
+    This module contains tests for the index versioning defined in upstash_ingest.aliases and upstash_ingest.reindex,
+    and for the vectors written by upstash_ingest.vector that the reindexing copies.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from upstash_vector.types import FetchResult, RangeResult
+
+from src.aliases import IndexAlias, IndexVersion
+from src.models import ChunkedDocument, EmbeddedDocument, RefinedDocument
+from src.reindex import Reindexer
+from src.vector import UpstashVectorSink
+
+
+class InMemoryIndex:
+    """The subset of upstash_vector.Index used by the reindexing, over dicts."""
+
+    def __init__(self, dimension: int, fail_upserts_after: int = -1):
+        self.dimension = dimension
+        self.namespaces = {}
+        self._fail_upserts_after = fail_upserts_after
+
+    def info(self):
+        return SimpleNamespace(dimension=self.dimension)
+
+    def upsert(self, vectors, namespace=""):
+        if self._fail_upserts_after == 0:
+            raise ConnectionError("upsert failed")
+        self._fail_upserts_after -= 1
+        records = self.namespaces.setdefault(namespace, {})
+        for vector in vectors:
+            records[vector.id] = FetchResult(
+                id=vector.id, vector=vector.vector, metadata=vector.metadata, data=vector.data
+            )
+
+    def fetch(self, ids, include_metadata=False, namespace=""):
+        records = self.namespaces.get(namespace, {})
+        return [records.get(id) for id in ids]
+
+    def range(self, cursor="", limit=1, include_metadata=False, include_data=False, namespace=""):
+        ids = sorted(self.namespaces.get(namespace, {}))
+        start = int(cursor or 0)
+        end = start + limit
+        return RangeResult(
+            next_cursor=str(end) if end < len(ids) else "",
+            vectors=[self.namespaces[namespace][id] for id in ids[start:end]],
+        )
+
+
+@pytest.fixture
+def index(embedder):
+    index = InMemoryIndex(dimension=embedder.embedding_size)
+    index.upsert(
+        [
+            SimpleNamespace(
+                id=f"doc-{i:02d}",
+                vector=[0.0] * index.dimension,
+                metadata={"title": f"title {i}"},
+                data="stocks rise today" if i % 2 else None,
+            )
+            for i in range(10)
+        ]
+    )
+    return index
+
+
+def test_backfill_reembeds_the_stored_text(index, embedder, tmp_path):
+    reindexer = Reindexer(index, embedder, batch_size=3, workers=2, progress_dir=tmp_path)
+
+    assert reindexer.backfill(source="", target="v2") == 10
+    copied = index.namespaces["v2"]
+    assert sorted(copied) == sorted(index.namespaces[""])
+    assert copied["doc-01"].vector == pytest.approx(embedder("stocks rise today"), abs=1e-6)
+    assert copied["doc-00"].vector == pytest.approx(embedder("title 0"), abs=1e-6)
+    assert copied["doc-00"].metadata == {"title": "title 0"}
+    # A finished backfill is not redone.
+    assert reindexer.backfill(source="", target="v2") == 10
+
+
+def test_backfill_resumes_after_a_failure(index, embedder, tmp_path):
+    index._fail_upserts_after = 2
+    reindexer = Reindexer(index, embedder, batch_size=3, workers=1, progress_dir=tmp_path)
+    with pytest.raises(ConnectionError):
+        reindexer.backfill(source="", target="v2")
+    assert len(index.namespaces["v2"]) == 6
+
+    index._fail_upserts_after = -1
+    upserted = []
+    upsert = index.upsert
+    index.upsert = lambda vectors, namespace="": upserted.extend(vectors) or upsert(vectors, namespace)
+    assert reindexer.backfill(source="", target="v2") == 10
+    assert [vector.id for vector in upserted] == ["doc-06", "doc-07", "doc-08", "doc-09"]
+
+
+def test_backfill_rejects_a_model_of_another_dimension(index, embedder, tmp_path):
+    index.dimension += 1
+    with pytest.raises(ValueError):
+        Reindexer(index, embedder, progress_dir=tmp_path).backfill(source="", target="v2")
+
+
+def test_alias_switch(index):
+    alias = IndexAlias(index, name="news")
+    assert alias.resolve() is None
+    assert alias.resolve_or_default().namespace == ""
+
+    alias.switch(IndexVersion(namespace="v2", model_id="some/model", pooling="mean"))
+    served = alias.resolve()
+    assert served.namespace == "v2"
+    assert served.model_id == "some/model"
+    assert served.pooling == "mean"
+    # The alias lives apart from the documents.
+    assert "news" not in index.namespaces[""]
+
+
+def test_every_chunk_of_an_article_is_indexed_and_backfilled(embedder, tmp_path):
+    refined = RefinedDocument(
+        doc_id="article-1",
+        full_text=" ".join(["stocks rise today the market rally of the news"] * 4),
+        metadata={"title": "Stocks rise"},
+    )
+    chunks = ChunkedDocument.from_refined(refined, embedder)
+    assert len(chunks) > 1
+
+    index = InMemoryIndex(dimension=embedder.embedding_size)
+    UpstashVectorSink(index, namespace="").write_batch(
+        [EmbeddedDocument.from_chunked(chunk, embedder) for chunk in chunks]
+    )
+
+    indexed = index.namespaces[""]
+    assert len(indexed) > 1
+    assert set(indexed) == {chunk.chunk_id for chunk in chunks}
+    assert {record.metadata["doc_id"] for record in indexed.values()} == {"article-1"}
+    assert {record.data for record in indexed.values()} == {chunk.text for chunk in chunks}
+
+    Reindexer(index, embedder, batch_size=1, progress_dir=tmp_path).backfill(source="", target="v2")
+    backfilled = index.namespaces["v2"]
+    assert set(backfilled) == set(indexed)
+    for chunk in chunks:
+        assert backfilled[chunk.chunk_id].vector == pytest.approx(embedder(chunk.text), abs=1e-6)
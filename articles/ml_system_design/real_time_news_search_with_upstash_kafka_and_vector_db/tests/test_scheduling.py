@@ -0,0 +1,104 @@
+"""
+    This module contains tests for the poll scheduling defined in upstash_ingest.scheduling.
+"""
+
+import datetime
+from types import SimpleNamespace
+
+from src import scheduling
+from src.scheduling import AdaptivePollInterval, DailyQuota, ExponentialBackoff, PollSchedule
+
+
+class FakeClock:
+    """Drives both the monotonic and the UTC clocks of the scheduling module."""
+
+    def __init__(self, start: datetime.datetime):
+        self.now = start
+        clock = self
+
+        class FakeDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now
+
+        self.datetime_module = SimpleNamespace(
+            datetime=FakeDatetime,
+            date=datetime.date,
+            timedelta=datetime.timedelta,
+            timezone=datetime.timezone,
+        )
+        self.time_module = SimpleNamespace(
+            monotonic=lambda: (clock.now - start).total_seconds()
+        )
+
+    def advance(self, seconds: float) -> None:
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+def test_interval_shrinks_during_bursts_and_grows_when_quiet():
+    interval = AdaptivePollInterval(min_interval=60, max_interval=1800, target_articles=5, alpha=1)
+
+    assert interval.observe(articles=50, elapsed=600) == 60
+    assert interval.observe(articles=5, elapsed=600) == 600
+    assert interval.observe(articles=0, elapsed=600) == 1200
+    assert interval.observe(articles=0, elapsed=1200) == 1800
+
+
+def test_exhausted_quota_pauses_the_source():
+    schedule = PollSchedule(
+        poll_interval=AdaptivePollInterval(60, 1800, 5),
+        quota=DailyQuota(limit=6),
+        backoff=ExponentialBackoff(base_delay=1, max_delay=10),
+        requests_per_poll=3,
+    )
+
+    schedule.polled(articles=5)
+    assert schedule.wait_before_poll() == 0
+    schedule.failed()
+    assert schedule.wait_before_poll() > 0
+
+
+def test_backoff_is_capped_and_reset_on_success():
+    backoff = ExponentialBackoff(base_delay=1, max_delay=10)
+
+    delays = [backoff.failure() for _ in range(10)]
+    assert all(0 <= delay <= 10 for delay in delays)
+    backoff.success()
+    assert backoff.failure() <= 1
+
+
+def test_quota_lasts_the_whole_day_under_constant_bursts(monkeypatch):
+    midnight = datetime.datetime(2024, 3, 15, tzinfo=datetime.timezone.utc)
+    clock = FakeClock(midnight)
+    monkeypatch.setattr(scheduling, "datetime", clock.datetime_module)
+    monkeypatch.setattr(scheduling, "time", clock.time_module)
+    schedule = PollSchedule(
+        poll_interval=AdaptivePollInterval(min_interval=60, max_interval=1800, target_articles=5),
+        quota=DailyQuota(limit=100),
+        backoff=ExponentialBackoff(base_delay=60, max_delay=1800),
+        requests_per_poll=3,
+    )
+
+    polls = []
+    while clock.now.date() == midnight.date():
+        wait = schedule.wait_before_poll()
+        if wait:
+            break
+        polls.append(clock.now)
+        clock.advance(schedule.polled(articles=50))
+
+    assert len(polls) == 100 // 3
+    # The polls are spread over the whole day, instead of exhausting the quota in its first hour.
+    assert polls[-1] - midnight > datetime.timedelta(hours=22)
+    assert max(b - a for a, b in zip(polls, polls[1:])) < datetime.timedelta(hours=1)
+
+
+def test_failures_are_paced_by_the_quota():
+    schedule = PollSchedule(
+        poll_interval=AdaptivePollInterval(60, 1800, 5),
+        quota=DailyQuota(limit=10),
+        backoff=ExponentialBackoff(base_delay=1, max_delay=1),
+        requests_per_poll=1,
+    )
+
+    assert schedule.failed() >= schedule.quota.seconds_until_reset() / 9 - 1
@@ -0,0 +1,71 @@
+"""
+    This module contains tests for the thumbnail loading defined in upstash_ingest.thumbnails.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from src.thumbnails import ByteLRUCache, ThumbnailLoader
+
+
+def _png() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (640, 480), color="red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_server():
+    requests = []
+    body = _png()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+
+
+def test_lru_cache_is_bounded_by_bytes():
+    cache = ByteLRUCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"12345")
+
+    assert cache.get("a") == b"12345"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"12345"
+
+
+def test_thumbnails_are_downloaded_once(image_server, tmp_path):
+    url, requests = image_server
+    loader = ThumbnailLoader(cache_dir=tmp_path)
+    urls = [f"{url}/a.png", f"{url}/b.png", f"{url}/missing.png", None]
+
+    first = loader.load_many(urls)
+    second = ThumbnailLoader(cache_dir=tmp_path).load_many(urls[:2])
+
+    assert Image.open(BytesIO(first[0])).size == (200, 300)
+    assert first[2:] == [None, None]
+    assert second == first[:2]
+    assert sorted(requests) == ["/a.png", "/b.png", "/missing.png"]
@@ -0,0 +1,71 @@
+"""
+    This module contains tests for the Kafka wire format defined in upstash_ingest.wire.
+"""
+
+import json
+from datetime import datetime
+
+import msgpack
+import pytest
+from bytewax.connectors.kafka import KafkaSourceMessage
+from faker import Faker
+
+from src.consumer import CommonDocument, DeadLetter, process_message
+from src.wire import WireFormatError, decode_batch, encode_batch, row_to_payload
+
+fake = Faker()
+
+
+def _payloads(count: int = 3) -> list:
+    return [
+        CommonDocument(
+            title=fake.sentence(),
+            url=fake.url(),
+            published_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            description=fake.paragraph(),
+            content=fake.text(),
+        ).to_kafka_payload()
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_encode_decode_roundtrip(compress):
+    payloads = _payloads()
+
+    encoded = encode_batch(payloads, compress=compress)
+
+    assert [row_to_payload(row) for row in decode_batch(encoded)] == payloads
+    assert len(encoded) < len(json.dumps(payloads).encode("utf-8"))
+
+
+def test_unsupported_version_is_rejected():
+    encoded = bytearray(encode_batch(_payloads(1)))
+    encoded[2] = 99
+
+    with pytest.raises(WireFormatError):
+        decode_batch(bytes(encoded))
+
+
+def test_trusted_decode_keeps_clean_documents_as_is():
+    payloads = _payloads()
+    message = KafkaSourceMessage(key=None, value=encode_batch(payloads), offset=0)
+
+    documents = process_message(message)
+
+    assert [doc.to_kafka_payload() for doc in documents] == payloads
+
+
+def test_truncated_row_becomes_dead_letter():
+    payloads = _payloads(2)
+    encoded = encode_batch(payloads)
+    rows = decode_batch(encoded)
+    rows[0] = rows[0][:3]
+    message = KafkaSourceMessage(
+        key=None, value=encoded[:4] + msgpack.packb(rows), offset=0
+    )
+
+    results = process_message(message)
+
+    assert isinstance(results[0], DeadLetter)
+    assert isinstance(results[1], CommonDocument)
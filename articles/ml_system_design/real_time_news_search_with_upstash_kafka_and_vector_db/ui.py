@@ -1,64 +1,105 @@
 """
     Streamlit UI for querying the Upstash Vector.
     Structure:
+        - A sidebar to restrict the search to a date window and/or a list of sources
         - A text field
         - A container section with columns for displaying search results
         - Each search result is a card with an image, title, date, and a button to see more
         - The button opens the original article in a new tab
     Note:
-        It might take a few seconds to load the images, because they are downloaded from the web.
+        Thumbnails are downloaded concurrently and cached (see src/thumbnails.py), so a results page
+        takes about as long as its slowest image the first time, and no download afterwards.
+        The embedding model and the index client are loaded once per server process, and the
+        embeddings/results of the last UI_QUERY_CACHE_SIZE queries are cached by cleaned query text.
+        The index is read through the UPSTASH_VECTOR_READ_ALIAS alias (see src/aliases.py), queries
+        being embedded with the model of the version it serves, so src/reindex.py can switch it live.
 """
 
-from io import BytesIO
-import requests
+import datetime
+import time
+from typing import List
 import streamlit as st
-from PIL import Image
-from src.embeddings import TextEmbedder
+from src.aliases import IndexAlias, IndexVersion
 from src.settings import settings
 from src.cleaners import clean_full
+from src.filters import build_filter
+from src.thumbnails import ThumbnailLoader
 from upstash_vector import Index
 
-v_index = Index(url=settings.UPSTASH_VECTOR_ENDPOINT, token=settings.UPSTASH_VECTOR_KEY)
+DATE_WINDOWS = {
+    "Any time": None,
+    "Last 24 hours": datetime.timedelta(days=1),
+    "Last 7 days": datetime.timedelta(days=7),
+    "Last 30 days": datetime.timedelta(days=30),
+}
+# Several chunks of an article can match a query, enough are fetched to fill a page of articles.
+UI_CHUNKS_PER_ARTICLE = 3
 
 st.title("Upstash Real-Time News Search")
+st.sidebar.selectbox("Published", list(DATE_WINDOWS), key="date_window")
+st.sidebar.text_input("Sources (comma separated)", key="sources")
 results_placeholder = st.empty()
 
 
-def download_and_resize_image(url):
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            img = Image.open(BytesIO(response.content))
-            resized_img = img.resize((200, 300))
-            return resized_img
-        else:
-            st.error("Failed to download image.")
-    except Exception as e:
-        st.error(f"Error downloading image: {e}")
-
-
-def query_index(question: str):
-    embedder = TextEmbedder()
-    embds = embedder(question, to_list=True)
-    similars = v_index.query(
-        vector=embds, top_k=10, include_metadata=True, include_vectors=False
+@st.cache_resource
+def get_index() -> Index:
+    return Index(url=settings.UPSTASH_VECTOR_ENDPOINT, token=settings.UPSTASH_VECTOR_KEY)
+
+
+@st.cache_resource
+def get_thumbnail_loader() -> ThumbnailLoader:
+    return ThumbnailLoader(cache_dir=settings.UI_THUMBNAIL_CACHE_DIR or None)
+
+
+# Re-resolved periodically, so that a switch of the alias is picked up without a restart.
+@st.cache_data(ttl=settings.UI_RESULTS_CACHE_TTL, show_spinner=False)
+def served_version() -> dict:
+    return IndexAlias(get_index()).resolve_or_default().model_dump()
+
+
+@st.cache_data(max_entries=settings.UI_QUERY_CACHE_SIZE, show_spinner=False)
+def embed_query(question: str, version: dict) -> List[float]:
+    return IndexVersion(**version).build_embedder()(question, to_list=True)
+
+
+# Results expire so that articles ingested in the meantime show up.
+@st.cache_data(
+    max_entries=settings.UI_QUERY_CACHE_SIZE,
+    ttl=settings.UI_RESULTS_CACHE_TTL,
+    show_spinner=False,
+)
+def query_index(question: str, filter: str, version: dict):
+    embds = embed_query(question, version)
+    similars = get_index().query(
+        vector=embds,
+        top_k=10 * UI_CHUNKS_PER_ARTICLE,
+        include_metadata=True,
+        include_vectors=False,
+        filter=filter,
+        namespace=version["namespace"],
     )
 
-    return [
-        {
-            "score": sim.score,
-            "title": sim.metadata["title"],
-            "image": sim.metadata["image_url"],
-            "date": sim.metadata["published_at"],
-            "original": sim.metadata["url"],
-        }
-        for sim in similars
-    ]
+    # Articles are indexed chunk by chunk, each one is shown once, for its best matching chunk.
+    articles = {}
+    for sim in similars:
+        article_id = sim.metadata.get("doc_id", sim.id)
+        if article_id not in articles:
+            articles[article_id] = {
+                "score": sim.score,
+                "title": sim.metadata["title"],
+                "image": sim.metadata["image_url"],
+                "date": sim.metadata["published_at"],
+                "original": sim.metadata["url"],
+            }
+    return list(articles.values())[:10]
 
 
 def display_articles(articles):
     if articles:
         results_placeholder.empty()
+        images = get_thumbnail_loader().load_many(
+            [article["image"] for article in articles]
+        )
         n_cols = 2
         n_rows = (len(articles) + n_cols - 1) // n_cols
         for row in range(n_rows):
@@ -68,7 +109,7 @@ def display_articles(articles):
                 if index >= len(articles):
                     break
                 article = articles[index]
-                image = download_and_resize_image(article["image"])
+                image = images[index]
                 with cols[col]:
                     if image:
                         st.image(image, use_column_width=True, clamp=True, width=200)
@@ -88,11 +129,26 @@ def display_articles(articles):
             st.divider()
 
 
+def current_filter() -> str:
+    """The metadata filter selected in the sidebar, evaluated by Upstash on the server side."""
+    window = DATE_WINDOWS[st.session_state.date_window]
+    published_after = None
+    if window:
+        # Rounded to the minute, so that the filter (and thus the results cache key) is stable.
+        now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+        published_after = now - window
+    sources = [source for source in st.session_state.sources.split(",") if source.strip()]
+    return build_filter(published_after=published_after, sources=sources)
+
+
 def on_text_enter():
     question = st.session_state.question
     question = clean_full(question)
     if question:
-        articles = query_index(question)
+        start = time.perf_counter()
+        articles = query_index(question, current_filter(), served_version())
+        latency_ms = (time.perf_counter() - start) * 1000
+        st.caption(f"{len(articles)} results in {latency_ms:.0f} ms")
         display_articles(articles)
 
 